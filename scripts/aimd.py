@@ -0,0 +1,92 @@
+"""
+Adaptive concurrency for the scheme-wise NPS Trust endpoint (BASE_URL).
+
+The number of parallel requests the endpoint tolerates changes from day to
+day, so backfill.py and fetch.py do not use a fixed worker count. They give
+their Scheduler an AIMDController, which sizes the in-flight window with
+additive increase / multiplicative decrease:
+
+    every `limit` successes in a row          window += INCREASE
+    a 429/5xx, a network error, a response    window *= DECREASE_FACTOR
+    that fails to parse, or a latency above
+    LATENCY_TARGET
+
+The window stays between MIN_WINDOW and MAX_WINDOW. After a decrease,
+congestion signals from requests that were already in flight are ignored:
+they reflect the old window. Every change is logged ("AIMD window 6 -> 3
+(HTTP 429)") and kept in `decisions`, and summary() gives the range the
+window moved through, for tuning.
+
+tests/test_aimd.py runs a throttled download job against a local stand-in
+server. The server answers 429 whenever more than a set number of requests
+are in flight, and slows down as it nears that limit. The test verifies
+that the window settles around the server's capacity and that every task
+still completes.
+"""
+
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Configurable variables
+INITIAL_WINDOW = 2  # Requests in flight at the start
+MIN_WINDOW = 1
+MAX_WINDOW = 16  # Also the scheduler's worker thread count
+INCREASE = 1  # Window growth per window's worth of successes
+DECREASE_FACTOR = 0.5  # Window multiplier on a congestion signal
+LATENCY_TARGET = 20.0  # Seconds; a slower successful request counts as congestion
+
+
+class AIMDController:
+    """Additive-increase / multiplicative-decrease in-flight window, fed by the scheduler."""
+
+    def __init__(self, initial=INITIAL_WINDOW, minimum=MIN_WINDOW, maximum=MAX_WINDOW, increase=INCREASE,
+                 decrease=DECREASE_FACTOR, latency_target=LATENCY_TARGET, clock=time.monotonic):
+        self.window = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self.clock = clock
+        self.decisions = []  # (seconds since start, old limit, new limit, reason)
+        self._started = clock()
+        self._successes = 0
+        self._last_decrease = float('-inf')
+
+    @property
+    def limit(self):
+        return max(self.minimum, min(self.maximum, int(self.window)))
+
+    def on_success(self, latency, started):
+        """A request that began at `started` (clock time) succeeded after `latency` seconds."""
+        if self.latency_target and latency > self.latency_target:
+            self.on_congestion(f"latency {latency:.1f}s", started)
+            return
+        self._successes += 1
+        if self._successes >= self.limit:
+            self._successes = 0
+            self._set(min(self.maximum, self.window + self.increase), f"{self.limit} successes")
+
+    def on_congestion(self, reason, started):
+        """A request that began at `started` was throttled, failed or was too slow."""
+        if started < self._last_decrease:
+            return  # Sent under the old window; already accounted for
+        self._successes = 0
+        self._last_decrease = self.clock()
+        self._set(max(self.minimum, self.window * self.decrease), reason)
+
+    def _set(self, window, reason):
+        old = self.limit
+        self.window = window
+        if self.limit != old:
+            self.decisions.append((round(self.clock() - self._started, 3), old, self.limit, reason))
+            logger.info(f"AIMD window {old} -> {self.limit} ({reason})")
+
+    def summary(self):
+        limits = [self.decisions[0][1]] + [new for _, _, new, _ in self.decisions] if self.decisions else [self.limit]
+        decreases = sum(1 for _, old, new, _ in self.decisions if new < old)
+        return (f"AIMD window {min(limits)}-{max(limits)}, now {self.limit}; "
+                f"{len(self.decisions) - decreases} increases, {decreases} decreases")
+
@@ -1,6 +1,17 @@
 import os
 import json
 from datetime import datetime
+from navstore import NavStore, ordinal_to_display_date
+from tasks import DEFAULT_JOBS, jobs_from_argv, run_per_scheme
+
+# Load the NAV store once per process; historical files are written by worker processes
+_store = None
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = NavStore.load()
+    return _store
 
 # Load the base data.json file
 def load_base_data():
@@ -57,84 +68,65 @@ def generate_detailed_api_files(funds):
         
         print(f"Generated {file_path}")
 
-# Function to generate historical JSON files for each fund     
-def generate_historical_api_files():
-    data_folder = 'data'
+# Write the historical JSON files for one shard of scheme codes (runs in a worker process)
+def write_historical_files(scheme_codes):
+    api_historical_folder = 'public/api/historical'
+    store = get_store()
+    latest_dates = {}
+    
+    for scheme_code in scheme_codes:
+        series = store.get(scheme_code)
+        
+        # Newest first, matching the order of the data/{scheme_code}.json exports
+        historical_list = [
+            {
+                "date": ordinal_to_display_date(ordinal),
+                "nav": nav
+            }
+            for ordinal, nav in zip(series.ordinals[::-1].tolist(), series.navs[::-1].tolist())
+        ]
+        
+        # Series are sorted by date, so the latest point is the last entry;
+        # use current date if the series is empty
+        latest = series.last()
+        if latest is not None:
+            latest_date = ordinal_to_display_date(latest[0])
+        else:
+            latest_date = datetime.now().strftime("%d-%m-%Y")
+            
+        # Construct the full JSON structure
+        output_data = {
+            "data": historical_list,
+            "metadata": {
+                "currency": "INR",
+                "dataType": "NAV",
+                "lastUpdated": latest_date  # Already formatted as dd-mm-yyyy
+            }
+        }
+        
+        # Write the data to the corresponding JSON file in the historical folder
+        output_file_path = os.path.join(api_historical_folder, f"{scheme_code}.json")
+        with open(output_file_path, 'w') as output_file:
+            json.dump(output_data, output_file, indent=4)
+        latest_dates[scheme_code] = latest_date
+    
+    return latest_dates
+
+# Function to generate historical JSON files for each fund, sharded across `jobs` processes
+def generate_historical_api_files(jobs=DEFAULT_JOBS):
     api_historical_folder = 'public/api/historical'
     
     # Create the API/historical directory if it doesn't exist
     if not os.path.exists(api_historical_folder):
         os.makedirs(api_historical_folder)
     
-    # Loop through each file in the data folder, ignoring 'data.json'
-    # 'nifty.json' is included so it gets its own historical API file (public/api/historical/nifty.json)
-    for filename in os.listdir(data_folder):
-        if filename.endswith('.json') and filename not in ('data.json', 'changelog.json', 'missing_funds.json', 'github_stars.json'):
-            scheme_code = filename.replace('.json', '')
-            file_path = os.path.join(data_folder, filename)
-            
-            # Load the historical data from the file
-            with open(file_path, 'r') as file:
-                historical_data = json.load(file)
-            
-            # Handle both dictionary and list formats
-            historical_list = []
-            latest_date = None
-            
-            if isinstance(historical_data, dict):
-                # Handle dictionary format
-                historical_list = [
-                    {
-                        "date": format_date(date, "%d-%m-%Y"),
-                        "nav": float(nav_value)
-                    }
-                    for date, nav_value in historical_data.items()
-                ]
-                
-                # Find the latest date (the max date in the keys)
-                if historical_data:
-                    latest_date = max(historical_data.keys(), key=lambda d: datetime.strptime(d, "%m/%d/%Y"))
-                    latest_date = format_date(latest_date, "%d-%m-%Y")
-            
-            elif isinstance(historical_data, list):
-                # Handle list format - assuming the list already contains date and nav
-                for item in historical_data:
-                    if isinstance(item, dict) and 'date' in item and 'nav' in item:
-                        # Format the date if needed
-                        formatted_date = format_date(item['date'], "%d-%m-%Y") if '/' in item['date'] else item['date']
-                        historical_list.append({
-                            "date": formatted_date,
-                            "nav": float(item['nav'])
-                        })
-                
-                # Find the latest date from the list
-                if historical_list:
-                    try:
-                        latest_date = max(item['date'] for item in historical_list)
-                    except:
-                        # Use the last item's date if there's an issue comparing dates
-                        latest_date = historical_list[-1]['date'] if historical_list else None
-            
-            # Use current date if no valid latest_date found
-            if not latest_date:
-                latest_date = datetime.now().strftime("%d-%m-%Y")
-                
-            # Construct the full JSON structure
-            output_data = {
-                "data": historical_list,
-                "metadata": {
-                    "currency": "INR",
-                    "dataType": "NAV",
-                    "lastUpdated": latest_date  # Already formatted as dd-mm-yyyy
-                }
-            }
-            
-            # Write the data to the corresponding JSON file in the historical folder
-            output_file_path = os.path.join(api_historical_folder, f"{scheme_code}.json")
-            with open(output_file_path, 'w') as output_file:
-                json.dump(output_data, output_file, indent=4)
-            
-            print(f"Generated {output_file_path} with last updated date: {latest_date}")
+    # Every series in the NAV store
+    # 'nifty' is included so it gets its own historical API file (public/api/historical/nifty.json)
+    latest_dates = run_per_scheme(write_historical_files, get_store().codes(), jobs)
+    
+    for scheme_code, latest_date in latest_dates.items():
+        output_file_path = os.path.join(api_historical_folder, f"{scheme_code}.json")
+        print(f"Generated {output_file_path} with last updated date: {latest_date}")
 
 # Function to generate latest.json summarizing all funds
 def generate_latest_json(funds):
@@ -243,7 +235,7 @@ def generate_schemes_json(funds):
 
 
 # Main function to orchestrate both API text and detailed JSON file generation
-def create_api_files():
+def create_api_files(jobs=DEFAULT_JOBS):
     
     funds = load_base_data()
     
@@ -254,7 +246,7 @@ def create_api_files():
     generate_detailed_api_files(funds)
     
     # Generate historical json files
-    generate_historical_api_files()
+    generate_historical_api_files(jobs)
     
     # Generate latest.json
     generate_latest_json(funds)
@@ -269,4 +261,5 @@ def create_api_files():
 
 # Execute the script
 if __name__ == "__main__":
-    create_api_files()
+    # `--jobs N`: number of worker processes for the per-scheme files (1 = serial)
+    create_api_files(jobs_from_argv())
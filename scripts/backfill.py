@@ -1,16 +1,20 @@
-import requests
 import pandas as pd
 import os
+import sys
 import json
-from collections import OrderedDict
-from datetime import datetime, timedelta
-import concurrent.futures
+from datetime import datetime
 import urllib3
 from io import BytesIO, StringIO
 import tempfile
-import time
 import logging
 import random
+from navstore import NavStore
+from navwriter import NavWriter
+from navindex import load_index
+import http_client
+from scheduler import Scheduler, RetryableError, retry_after_seconds
+from aimd import AIMDController
+from checkpoint import CheckpointJournal
 
 # Disable SSL warnings
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -25,6 +29,17 @@ BASE_URL = "https://npstrust.org.in/scheme-wise-nav-report-excel"
 # --- CONFIGURATION ---
 # '60' retrieves the last 5 years (60 months) of data in one shot.
 BACKFILL_MONTHS = '2' 
+# Completed schemes merged into the store per commit; bounds the records held in memory
+COMMIT_EVERY = 10
+
+_store = None
+
+def get_store():
+    """Load the NAV store once per run."""
+    global _store
+    if _store is None:
+        _store = NavStore.load()
+    return _store
 
 def get_pfm_scheme_mappings():
     """Extract PFM and Scheme mappings from existing data.json"""
@@ -63,25 +78,11 @@ def get_pfm_scheme_mappings():
     return {}, {}, {}
 
 def get_existing_dates(scheme_code):
-    """Get a set of all dates already present for a specific scheme"""
-    scheme_file = os.path.join('data', f"{scheme_code}.json")
-    existing_dates = set()
-    
-    if os.path.exists(scheme_file):
-        try:
-            with open(scheme_file, 'r') as f:
-                scheme_data = json.load(f)
-            if scheme_data:
-                for date_str in scheme_data.keys():
-                    try:
-                        dt = datetime.strptime(date_str, DATE_FORMAT)
-                        existing_dates.add(dt)
-                    except ValueError:
-                        continue
-        except Exception as e:
-            logger.warning(f"Could not read existing dates for {scheme_code}: {e}")
-            
-    return existing_dates
+    """Get a set of all dates already present for a specific scheme (from the store loaded before the workers start)"""
+    series = get_store().get(scheme_code)
+    if series is None:
+        return set()
+    return {datetime.fromordinal(int(o)) for o in series.ordinals}
 
 def try_read_file_alternative(file_content):
     """Try to read file with different approaches"""
@@ -211,8 +212,8 @@ def parse_excel_data(df, pfm_code, scheme_code, pfm_names, scheme_names):
         logger.error(f"Error parsing data for {pfm_code}/{scheme_code}: {e}")
         return []
 
-def download_nav_excel_single_shot(pfm_code, scheme_code, pfm_names, scheme_names, retry_count=3):
-    """Download 5 years of data with Stealth features (Random Headers + Delays)"""
+def download_nav_excel_single_shot(pfm_code, scheme_code, pfm_names, scheme_names):
+    """Download 5 years of data with a random browser identity; transient failures raise for the scheduler to retry"""
     
     # List of different browser identities
     user_agents = [
@@ -222,12 +223,8 @@ def download_nav_excel_single_shot(pfm_code, scheme_code, pfm_names, scheme_name
         'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36'
     ]
 
-    # Stealth Feature 1: Random wait before starting
-    # This prevents all 4 workers from hitting the server simultaneously
-    time.sleep(random.uniform(1.5, 4.5))
-
     headers = {
-        # Stealth Feature 2: Pick a random browser identity for each request
+        # Pick a random browser identity for each request
         'User-Agent': random.choice(user_agents),
         'Accept': 'application/vnd.ms-excel,application/vnd.openxmlformats-officedocument.spreadsheetml.sheet,text/plain,*/*',
         'Referer': 'https://npstrust.org.in/',
@@ -240,63 +237,46 @@ def download_nav_excel_single_shot(pfm_code, scheme_code, pfm_names, scheme_name
         'navsubdataxls': scheme_code
     }
     
-    for attempt in range(retry_count):
-        try:
-            # logger.info(f"Downloading data for {pfm_code}/{scheme_code}...")
-            response = requests.get(BASE_URL, params=params, headers=headers, verify=False, timeout=45)
-            
-            if response.status_code == 200 and len(response.content) > 0:
-                try:
-                    df = try_read_file_alternative(response.content)
-                    data = parse_excel_data(df, pfm_code, scheme_code, pfm_names, scheme_names)
-                    if data:
-                        logger.info(f"Found {len(data)} NEW records for {scheme_code}")
-                    else:
-                        logger.info(f"No new records for {scheme_code}")
-                    return data
-                except Exception as e:
-                    logger.error(f"Error parsing {scheme_code}: {e}")
-                    if attempt == retry_count - 1: return []
-            else:
-                logger.warning(f"Failed {scheme_code} (Status: {response.status_code})")
-                
-        except requests.RequestException as e:
-            logger.error(f"Network error {scheme_code}: {e}")
-        
-        # Exponential backoff for retries
-        if attempt < retry_count - 1:
-            time.sleep(2 ** attempt)
-            
-    return []
+    # Connection errors and 5xx/429 responses are requeued with backoff by the scheduler
+    response = http_client.get(BASE_URL, retries=0, params=params, headers=headers, verify=False, timeout=45)
+    if response.status_code in http_client.RETRY_STATUSES:
+        raise RetryableError(f"HTTP {response.status_code}", retry_after_seconds(response))
 
-def update_scheme_json(new_data):
-    if not os.path.exists('data'): os.makedirs('data')
-    schemes_updated = {}
-    for record in new_data:
-        scheme_code = record["Scheme Code"]
-        if scheme_code not in schemes_updated: schemes_updated[scheme_code] = []
-        schemes_updated[scheme_code].append(record)
-    
-    for scheme_code, records in schemes_updated.items():
-        scheme_file = os.path.join('data', f"{scheme_code}.json")
-        try:
-            if os.path.exists(scheme_file):
-                with open(scheme_file, 'r') as f:
-                    scheme_data = json.load(f, object_pairs_hook=OrderedDict)
-            else:
-                scheme_data = OrderedDict()
-            
-            for record in records:
-                scheme_data[record["Date"]] = record["NAV"]
-            
-            sorted_scheme_data = OrderedDict(
-                sorted(scheme_data.items(), key=lambda x: datetime.strptime(x[0], DATE_FORMAT), reverse=True)
-            )
-            
-            with open(scheme_file, 'w') as f:
-                json.dump(sorted_scheme_data, f, indent=4)
-        except Exception as e:
-            logger.error(f"Error updating {scheme_file}: {e}")
+    if response.status_code != 200 or len(response.content) == 0:
+        logger.warning(f"Failed {scheme_code} (Status: {response.status_code})")
+        return []
+
+    try:
+        df = try_read_file_alternative(response.content)
+        data = parse_excel_data(df, pfm_code, scheme_code, pfm_names, scheme_names)
+        if data:
+            logger.info(f"Found {len(data)} NEW records for {scheme_code}")
+        else:
+            logger.info(f"No new records for {scheme_code}")
+        return data
+    except Exception as e:
+        # An unreadable body is usually an error page from an overloaded server: back off and retry
+        raise RetryableError(f"unparsable response: {e}")
+
+def latest_record(records):
+    return max(records, key=lambda record: datetime.strptime(record["Date"], DATE_FORMAT))
+
+def commit_schemes(batch, journal):
+    """Merge a batch of completed schemes into the store in one commit, then checkpoint them.
+
+    The journal keeps only each scheme's latest record (for data.json); its history is in the store.
+    A crash between the commit and the journal write re-downloads the batch, which adds nothing twice.
+    """
+    writer = NavWriter(get_store())
+    for scheme_code, records in batch:
+        writer.add_points(scheme_code, {record["Date"]: record["NAV"] for record in records})
+    writer.commit()
+    for scheme_code, records in batch:
+        journal.record(scheme_code, [latest_record(records)] if records else [])
+
+def checkpointed_latest_records(journal):
+    """Latest record of every scheme committed by this run or an interrupted one"""
+    return [records[0] for _, records in journal.entries() if records]
 
 def save_latest_data(new_data):
     root_file = "data/data.json"
@@ -328,40 +308,60 @@ if __name__ == "__main__":
         logger.error("No mappings found. Exiting.")
         exit(1)
     
-    all_nav_data = []
     scheme_tasks = []
     for pfm_code, scheme_codes in pfm_scheme_mappings.items():
         for scheme_code in scheme_codes:
             scheme_tasks.append((pfm_code, scheme_code))
     
-    logger.info(f"Processing {len(scheme_tasks)} schemes...")
+    # Every completed scheme is checkpointed, so an interrupted run resumes where it stopped
+    journal = CheckpointJournal('backfill', params={'months': BACKFILL_MONTHS}, fresh='--fresh' in sys.argv[1:])
+    if journal.done:
+        logger.info(f"Resuming: {len(journal.done)} schemes already downloaded by an interrupted run")
+    remaining = [(pfm, scheme) for pfm, scheme in scheme_tasks if scheme not in journal.done]
     
-    # max_workers=4 is safe with the added sleep delays
-    max_workers = 4
+    logger.info(f"Processing {len(remaining)} schemes...")
     
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_scheme = {
-            executor.submit(download_nav_excel_single_shot, pfm, scheme, pfm_names, scheme_names): (pfm, scheme) 
-            for pfm, scheme in scheme_tasks
-        }
-        
-        completed = 0
-        for future in concurrent.futures.as_completed(future_to_scheme):
-            pfm, scheme = future_to_scheme[future]
-            completed += 1
-            if completed % 5 == 0:
-                logger.info(f"Progress: {completed}/{len(scheme_tasks)} schemes processed")
-            
-            try:
-                data = future.result()
-                if data: all_nav_data.extend(data)
-            except Exception as exc:
-                logger.error(f"Scheme {scheme} failed: {exc}")
+    # Load the store before the workers start so they share one copy
+    get_store()
+    
+    # Requests go out at the scheduler's rate limit with an adaptive in-flight window;
+    # schemes without any stored history go first
+    index = load_index()
+    controller = AIMDController()
+    scheduler = Scheduler(controller=controller)
+    for pfm, scheme in remaining:
+        scheduler.submit(scheme, download_nav_excel_single_shot, pfm, scheme, pfm_names, scheme_names,
+                         priority=1 if scheme in index else 0)
+    
+    # Completed schemes are committed to the store in small batches, so memory stays bounded
+    batch = []
+    total = 0
+    
+    def on_result(scheme, data):
+        global total
+        batch.append((scheme, data))
+        total += len(data)
+        if len(batch) >= COMMIT_EVERY:
+            commit_schemes(batch, journal)
+            batch.clear()
+        if scheduler.completed % 5 == 0:
+            logger.info(f"Progress: {scheduler.completed}/{len(remaining)} schemes processed")
+    
+    scheduler.run(on_result)
+    commit_schemes(batch, journal)
+    for scheme, exc in scheduler.failures.items():
+        logger.error(f"Scheme {scheme} failed: {exc}")
+    logger.info(controller.summary())
 
-    if all_nav_data:
-        logger.info(f"Saving {len(all_nav_data)} total new records...")
-        update_scheme_json(all_nav_data)
-        save_latest_data(all_nav_data)
-        logger.info("Backfill complete!")
+    latest_records = checkpointed_latest_records(journal)
+    if latest_records:
+        logger.info(f"Saved {total} total new records")
+        save_latest_data(latest_records)
     else:
-        logger.info("No new data found.")
\ No newline at end of file
+        logger.info("No new data found.")
+    if scheduler.failures:
+        logger.warning(f"{len(scheduler.failures)} schemes failed; rerun to retry them (completed schemes are checkpointed)")
+    else:
+        journal.finish()
+        logger.info("Backfill complete!")
+    http_client.log_timing_summary(logger)
@@ -1,8 +1,12 @@
 import subprocess
+from tasks import jobs_from_argv
 
-def run_script(script_path):
+# Scripts that shard their per-scheme work across processes (see tasks.py) and take --jobs
+PARALLEL_SCRIPTS = {'scripts/api.py', 'scripts/rolling.py', 'scripts/funds.py'}
+
+def run_script(script_path, args=()):
     try:
-        subprocess.run(['python', script_path], check=True)
+        subprocess.run(['python', script_path, *args], check=True)
         print(f"Successfully ran {script_path}")
     except subprocess.CalledProcessError as e:
         print(f"Error running {script_path}: {e}")
@@ -11,12 +15,19 @@ def run_script(script_path):
 if __name__ == "__main__":
     scripts = [
         'scripts/calculate.py',
+        'scripts/risk.py',
+        'scripts/peers.py',
         'scripts/main.py',
         'scripts/api.py',
+        'scripts/rolling.py',
+        'scripts/sip.py',
         'scripts/funds.py',
         'scripts/minify.py',
         'scripts/robots-sitemap.py'
     ]
     
+    # `--jobs N`: worker processes for the per-scheme stages (default: CPU count, 1 = serial)
+    jobs = jobs_from_argv()
+    
     for script in scripts:
-        run_script(script)
+        run_script(script, ['--jobs', str(jobs)] if script in PARALLEL_SCRIPTS else [])
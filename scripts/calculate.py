@@ -1,22 +1,32 @@
-import os
+import sys
 import json
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
+from navstore import NavStore, write_atomic
+from navindex import load_index
+from periodic import generate_periodic_api_files
+from returns_engine import compute_returns, RETURN_FIELDS, STALENESS_THRESHOLDS
 
 DATE_FORMAT = '%m/%d/%Y'
+STATE_FILE = 'data/returns_state.json'  # Per-fund input fingerprints and returns of the last calculation (committed)
 
 # Load the base data.json file
 def load_base_data():
     with open('data/data.json', 'r') as file:
         return json.load(file)
 
+# Load the NAV store once; every scheme's history is read from it
+_store = None
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = NavStore.load()
+    return _store
+
 # Load the historical NAV data for a specific scheme
 def load_historical_data(scheme_code):
-    file_path = os.path.join('data', f'{scheme_code}.json')
-    if os.path.exists(file_path):
-        with open(file_path, 'r') as file:
-            return json.load(file)
-    return {}
+    return get_store().to_dict(scheme_code)
 
 # Get the NAV for the strictly previous available date before the target date
 def get_nav_for_previous_date(historical_data, target_date):
@@ -56,7 +66,8 @@ def get_global_latest_date(base_data):
             latest = fund_date
     return latest
 
-# Main function to calculate returns for a specific fund with period-based staleness detection
+# Reference implementation: calculate returns for a specific fund with period-based staleness detection.
+# The daily run uses the vectorised returns_engine; tests/test_returns_engine.py compares the two.
 def calculate_returns_for_fund(fund, global_latest_date):
     scheme_code = fund['Scheme Code']
     scheme_name = fund['Scheme Name']
@@ -126,6 +137,73 @@ def calculate_returns_for_fund(fund, global_latest_date):
     fund['3Y'] = three_year_return
     fund['5Y'] = five_year_return
 
+# Calculate returns for every fund in one vectorised pass (see returns_engine.py)
+def calculate_all_returns(base_data, global_latest_date):
+    results = compute_returns(base_data, get_store(), global_latest_date)
+    for fund, returns in zip(base_data, results):
+        if returns is None:
+            print(f"No historical data found for {fund['Scheme Code']}. Skipping...")
+            continue
+        days_behind = (global_latest_date - datetime.strptime(fund['Date'], DATE_FORMAT)).days
+        if days_behind > 2:
+            print(f"  ⚠️  {fund['Scheme Code']}: data is {days_behind} days old - some short-term returns set to null")
+        fund.update(returns)
+
+# The inputs a fund's returns depend on: its history (content hash from the metadata index),
+# its latest date/NAV in data.json and which staleness thresholds it passes against the global latest date
+def fund_fingerprint(fund, index, global_latest_date):
+    entry = index.get(fund['Scheme Code'])
+    days_behind = (global_latest_date - datetime.strptime(fund['Date'], DATE_FORMAT)).days
+    return {
+        'hash': entry['hash'] if entry else None,
+        'date': fund['Date'],
+        'nav': fund['NAV'],
+        'fresh': [days_behind <= threshold for threshold in STALENESS_THRESHOLDS],
+    }
+
+def load_returns_state():
+    try:
+        with open(STATE_FILE, 'r') as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_returns_state(state):
+    write_atomic(STATE_FILE, json.dumps(state, indent=4))
+
+# Recompute returns only for funds whose inputs changed since the last run. A fund whose inputs
+# are unchanged but whose return fields are missing from data.json (a fresh checkout, or fetch.py
+# replaced the record) gets the saved returns back without recomputing them
+def calculate_changed_returns(base_data, global_latest_date, full=False):
+    index = load_index()
+    state = {} if full else load_returns_state()
+    new_state = {}
+    changed_funds = []
+    restored = 0
+
+    for fund in base_data:
+        fingerprint = fund_fingerprint(fund, index, global_latest_date)
+        previous = state.get(fund['Scheme Code'])
+        if previous is not None and previous['inputs'] == fingerprint:
+            if previous['returns'] is not None and any(
+                    fund.get(field) != previous['returns'][field] for field in RETURN_FIELDS):
+                fund.update(previous['returns'])
+                restored += 1
+            new_state[fund['Scheme Code']] = previous
+            continue
+        changed_funds.append((fund, fingerprint))
+
+    if changed_funds:
+        calculate_all_returns([fund for fund, _ in changed_funds], global_latest_date)
+    for fund, fingerprint in changed_funds:
+        computed = all(field in fund for field in RETURN_FIELDS)
+        new_state[fund['Scheme Code']] = {
+            'inputs': fingerprint,
+            'returns': {field: fund[field] for field in RETURN_FIELDS} if computed else None,
+        }
+
+    return len(changed_funds), restored, new_state != state, new_state
+
 # Save the updated data back to data.json
 def save_updated_data(base_data):
     with open('data/data.json', 'w') as file:
@@ -139,9 +217,24 @@ if __name__ == "__main__":
     global_latest_date = get_global_latest_date(base_data)
     print(f"Global latest date: {global_latest_date.strftime(DATE_FORMAT)}")
     
-    # Iterate over all funds and calculate returns for each
-    for fund in base_data:
-        calculate_returns_for_fund(fund, global_latest_date)
-    
-    save_updated_data(base_data)
-    print("Returns calculated for all funds and data.json updated successfully.")
\ No newline at end of file
+    # `--full`: ignore the saved fingerprints and recompute every fund
+    # `--state-only`: bring data/returns_state.json up to date without writing data.json (the daily
+    # fetch workflow commits the state, so the deploy build only recomputes what changed since)
+    state_only = '--state-only' in sys.argv[1:]
+    recomputed, restored, state_changed, state = calculate_changed_returns(
+        base_data, global_latest_date, full='--full' in sys.argv[1:])
+    
+    if (recomputed or restored) and not state_only:
+        save_updated_data(base_data)
+    if state_changed:
+        save_returns_state(state)
+    
+    if recomputed or restored:
+        print(f"Returns recalculated for {recomputed} and restored from {STATE_FILE} for {restored} of {len(base_data)} funds"
+              + ("." if state_only else " and data.json updated successfully."))
+    else:
+        print("No fund inputs changed since the last run; data.json left untouched.")
+    
+    # Monthly and calendar-year returns for the site, from the series already loaded for the returns
+    if not state_only:
+        generate_periodic_api_files(get_store())
\ No newline at end of file
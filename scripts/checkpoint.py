@@ -0,0 +1,95 @@
+"""
+Checkpoint journal for long per-scheme runs (backfill.py).
+
+A deep backfill downloads hundreds of schemes. Each scheme is recorded in
+an append-only journal as soon as it has been applied (backfill.py commits
+it to the store first and journals only its latest record, for data.json),
+so a crash or CI timeout loses at most the downloads not yet recorded:
+
+    journal = CheckpointJournal('backfill', params={'months': '60'})
+    journal.done                      # schemes completed by an earlier, interrupted run
+    journal.record(code, records)     # append one scheme's records (fsynced), then mark it done
+    for code, records in journal.entries():
+        ...                           # replay every completed scheme, oldest first
+    journal.finish()                  # drop the checkpoint once the run has been applied
+
+Files live in CHECKPOINT_DIR/<name>/:
+
+    journal.jsonl   one {"scheme": code, "records": [...]} line per completed scheme
+    manifest.json   {"params", "started", "updated", "done": [codes]}
+
+The journal line is flushed to disk before the manifest lists the scheme as
+done, so every scheme in the manifest can be replayed. A torn last line
+(a crash mid-write) is skipped, and that scheme is downloaded again. A
+manifest written with different params (e.g. another BACKFILL_MONTHS) is
+discarded, and the run starts fresh.
+"""
+
+import os
+import json
+import shutil
+import logging
+from datetime import datetime
+
+from navstore import write_atomic
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_DIR = os.getenv('NAV_CHECKPOINT_DIR', '.cache/checkpoints')
+
+
+class CheckpointJournal:
+    """Append-only per-scheme journal plus a manifest of the schemes it holds."""
+
+    def __init__(self, name, params=None, fresh=False):
+        self.dir = os.path.join(CHECKPOINT_DIR, name)
+        self.journal_path = os.path.join(self.dir, 'journal.jsonl')
+        self.manifest_path = os.path.join(self.dir, 'manifest.json')
+        self.params = params or {}
+
+        manifest = self._load_manifest()
+        if manifest and (fresh or manifest.get('params') != self.params):
+            if not fresh:
+                logger.info(f"Discarding checkpoint {self.dir}: it was written for {manifest.get('params')}")
+            manifest = None
+        if manifest is None:
+            shutil.rmtree(self.dir, ignore_errors=True)
+            manifest = {'params': self.params, 'started': datetime.now().isoformat(timespec='seconds'), 'done': []}
+        self.manifest = manifest
+        self.done = set(manifest['done'])
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def record(self, code, records):
+        """Commit one completed scheme: append its records to the journal, then list it in the manifest."""
+        os.makedirs(self.dir, exist_ok=True)
+        with open(self.journal_path, 'a') as f:
+            f.write(json.dumps({'scheme': code, 'records': records}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.done.add(code)
+        self.manifest['done'].append(code)
+        self.manifest['updated'] = datetime.now().isoformat(timespec='seconds')
+        write_atomic(self.manifest_path, json.dumps(self.manifest, indent=1))
+
+    def entries(self):
+        """Yield (code, records) for every scheme listed in the manifest, in completion order."""
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Torn write from a crash; the scheme is not in the manifest
+                if entry['scheme'] in self.done:
+                    yield entry['scheme'], entry['records']
+
+    def finish(self):
+        """Remove the journal and manifest after their records have been applied."""
+        shutil.rmtree(self.dir, ignore_errors=True)
@@ -0,0 +1,262 @@
+"""
+On-disk cache of raw upstream downloads (Protean ZIPs, the NPS Trust dump).
+
+Bodies are stored content-addressed under CACHE_DIR/objects/<sha256>, and
+CACHE_DIR/index.json maps each URL to its blob and validators:
+
+    {url: {"sha256", "size", "etag", "last_modified", "immutable", "fetched_at", "used_at"}}
+
+fetch(url, immutable=...) returns a Download whose body is a file on disk:
+
+    immutable=True   served from disk whenever the URL is cached, with no
+                     request at all (a past date's Protean ZIP never changes)
+    immutable=False  revalidated with If-None-Match / If-Modified-Since when
+                     upstream sent an ETag / Last-Modified; a 304 serves the
+                     cached blob, a 200 replaces it
+
+Only 200 responses of at least min_size bytes are cached. If the network
+fails the error is raised, unless the caller passes allow_stale=True: then
+the cached copy is served with source 'stale' (Download.stale), which must
+not be read as "upstream unchanged". With NAV_CACHE_OFFLINE=1 nothing is
+requested and only cached URLs are served, so a run can be replayed offline.
+
+evict() drops entries unused for MAX_AGE_DAYS, then the least recently used
+ones until the blobs fit in MAX_BYTES, and deletes blobs no entry refers
+to. fetch.py runs it at the end of every run. `python scripts/download_cache.py
+[--evict | --clear]` prints the cache statistics after the optional action.
+"""
+
+import os
+import sys
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+
+import http_client
+from navstore import write_atomic
+
+logger = logging.getLogger(__name__)
+
+# Configurable variables
+CACHE_DIR = os.getenv('NAV_CACHE_DIR', '.cache/downloads')
+OFFLINE = os.getenv('NAV_CACHE_OFFLINE', '0') == '1'
+MAX_AGE_DAYS = 45  # Entries unused for longer are evicted
+MAX_BYTES = 256 * 1024 * 1024  # Total blob size kept after eviction
+CHUNK_SIZE = 64 * 1024  # Bytes written per chunk while downloading
+
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+_lock = threading.Lock()
+_index = None
+
+
+class Download:
+    """A fetched URL: status_code, the body's path on disk and sha256 (None unless usable) and where it came from."""
+
+    def __init__(self, status_code, sha256=None, source='network'):
+        self.status_code = status_code
+        self.sha256 = sha256
+        self.path = _blob_path(sha256) if sha256 else None
+        self.source = source  # 'network', 'cache', 'revalidated', 'stale' or 'offline'
+
+    @property
+    def ok(self):
+        return self.status_code == 200 and self.path is not None
+
+    @property
+    def stale(self):
+        """True if the body is a cached copy served because upstream could not be reached."""
+        return self.source == 'stale'
+
+    @property
+    def size(self):
+        return os.path.getsize(self.path) if self.path else 0
+
+    @property
+    def content(self):
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def open(self):
+        return open(self.path, 'rb')
+
+
+def _objects_dir():
+    return os.path.join(CACHE_DIR, 'objects')
+
+
+def _index_path():
+    return os.path.join(CACHE_DIR, 'index.json')
+
+
+def _blob_path(sha256):
+    return os.path.join(_objects_dir(), sha256)
+
+
+def _now():
+    return datetime.now().strftime(TIMESTAMP_FORMAT)
+
+
+def _load_index():
+    global _index
+    if _index is None:
+        try:
+            with open(_index_path(), 'r') as f:
+                _index = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            _index = {}
+    return _index
+
+
+def _save_index():
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    write_atomic(_index_path(), json.dumps(_index, indent=1, sort_keys=True))
+
+
+def _cached(url):
+    """The index entry of url if its blob is still on disk, else None."""
+    with _lock:
+        entry = _load_index().get(url)
+    if entry and os.path.exists(_blob_path(entry['sha256'])):
+        return entry
+    return None
+
+
+def _touch(url, **fields):
+    with _lock:
+        entry = _load_index()[url]
+        entry.update(fields, used_at=_now())
+        _save_index()
+    return entry
+
+
+def _store(url, response, immutable, min_size):
+    """Stream a 200 response into its content-addressed blob and index it; returns its sha256 or None."""
+    os.makedirs(_objects_dir(), exist_ok=True)
+    digest = hashlib.sha256()
+    tmp_path = os.path.join(_objects_dir(), f"tmp-{os.getpid()}-{threading.get_ident()}")
+    size = 0
+    with open(tmp_path, 'wb') as f:
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            digest.update(chunk)
+            f.write(chunk)
+            size += len(chunk)
+    if size < min_size:
+        os.remove(tmp_path)
+        return None
+    sha256 = digest.hexdigest()
+    os.replace(tmp_path, _blob_path(sha256))
+    with _lock:
+        _load_index()[url] = {
+            'sha256': sha256,
+            'size': size,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'immutable': immutable,
+            'fetched_at': _now(),
+            'used_at': _now(),
+        }
+        _save_index()
+    return sha256
+
+
+def fetch(url, immutable=False, min_size=0, headers=None, allow_stale=False, **kwargs):
+    """Fetch url through the cache; extra keyword arguments go to http_client.get.
+
+    A 200 body shorter than min_size bytes (an upstream error page) is
+    neither cached nor returned: the Download has no path. Network errors are
+    raised, or with allow_stale=True answered from the cache when possible.
+    """
+    entry = _cached(url)
+    if entry and (immutable or OFFLINE):
+        _touch(url)
+        return Download(200, entry['sha256'], 'cache' if immutable else 'offline')
+    if OFFLINE:
+        return Download(404, source='offline')
+
+    request_headers = dict(headers or {})
+    if entry:
+        if entry.get('etag'):
+            request_headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            request_headers['If-Modified-Since'] = entry['last_modified']
+    try:
+        with http_client.get(url, headers=request_headers, stream=True, **kwargs) as r:
+            if r.status_code == 304 and entry:
+                _touch(url, fetched_at=_now())
+                return Download(200, entry['sha256'], 'revalidated')
+            if r.status_code != 200:
+                return Download(r.status_code)
+            return Download(200, _store(url, r, immutable, min_size))
+    except Exception as e:
+        if not entry or not allow_stale:
+            raise
+        logger.warning(f"Serving cached copy of {url}: {e}")
+        _touch(url)
+        return Download(200, entry['sha256'], 'stale')
+
+
+def discard(url):
+    """Forget url (e.g. a cached body that turned out to be unreadable); its blob goes at the next evict()."""
+    with _lock:
+        if _load_index().pop(url, None) is not None:
+            _save_index()
+
+
+def evict(max_age_days=MAX_AGE_DAYS, max_bytes=MAX_BYTES):
+    """Drop old and least recently used entries, then unreferenced blobs; returns (entries, blobs) removed."""
+    with _lock:
+        index = _load_index()
+        cutoff = (datetime.now() - timedelta(days=max_age_days)).strftime(TIMESTAMP_FORMAT)
+        removed = [url for url, entry in index.items() if entry['used_at'] < cutoff]
+        for url in removed:
+            del index[url]
+
+        by_use = sorted(index, key=lambda url: index[url]['used_at'])
+        blob_sizes = {entry['sha256']: entry['size'] for entry in index.values()}
+        total = sum(blob_sizes.values())
+        while by_use and total > max_bytes:
+            url = by_use.pop(0)
+            sha256 = index.pop(url)['sha256']
+            removed.append(url)
+            if all(entry['sha256'] != sha256 for entry in index.values()):
+                total -= blob_sizes.pop(sha256)
+        if removed:
+            _save_index()
+
+        referenced = {entry['sha256'] for entry in index.values()}
+        blobs = 0
+        if os.path.isdir(_objects_dir()):
+            for name in os.listdir(_objects_dir()):
+                if name not in referenced:
+                    os.remove(os.path.join(_objects_dir(), name))
+                    blobs += 1
+    if removed or blobs:
+        logger.info(f"Download cache: evicted {len(removed)} entries, deleted {blobs} blobs")
+    return len(removed), blobs
+
+
+def stats():
+    """{"entries", "immutable", "blobs", "bytes"} of the cache."""
+    with _lock:
+        index = _load_index()
+        blobs = {entry['sha256']: entry['size'] for entry in index.values()}
+        return {
+            'entries': len(index),
+            'immutable': sum(1 for entry in index.values() if entry['immutable']),
+            'blobs': len(blobs),
+            'bytes': sum(blobs.values()),
+        }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if '--clear' in sys.argv[1:]:
+        evict(max_age_days=0, max_bytes=0)
+    elif '--evict' in sys.argv[1:]:
+        evict()
+    summary = stats()
+    print(f"{CACHE_DIR}: {summary['entries']} URLs ({summary['immutable']} immutable), "
+          f"{summary['blobs']} blobs, {summary['bytes'] / 1024:.1f} KiB")
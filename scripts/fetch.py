@@ -1,16 +1,22 @@
-import requests
-import pandas as pd
 import os
 import sys
 import json
-from collections import OrderedDict
-from datetime import datetime, timedelta
-import concurrent.futures
+from datetime import datetime
 import urllib3
 from io import BytesIO, StringIO
 import tempfile
-import time
 import logging
+from navstore import NavStore
+from navwriter import NavWriter
+from navindex import load_index
+from navmatrix import build_matrix
+from protean import fetch_protean_range
+import http_client
+import download_cache
+from navdump import DumpSnapshot
+from scheduler import Scheduler, RetryableError, retry_after_seconds
+from aimd import AIMDController
+from pipeline_state import UNCHANGED_EXIT_CODE, upstream_fingerprint, is_unchanged, record_pending
 
 # Disable SSL warnings
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -22,53 +28,41 @@ logger = logging.getLogger(__name__)
 DATE_FORMAT = '%m/%d/%Y'
 DISPLAY_DATE_FORMAT = '%d-%m-%Y'
 BASE_URL = "https://npstrust.org.in/scheme-wise-nav-report-excel"
-DISCOVERY_URL = "https://npstrust.org.in/nav-report-excel"
-PROTEAN_URL = "https://www.npscra.proteantech.in/download/NAV_File_{date_str}.zip"
 # NPS Trust started silently remapping old POP codes to DIRECT on the per-scheme endpoint
 # around this date. Entries on/after this date in old POP JSON files are corrupted.
 CORRUPTION_START_DATE = '06/15/2026'
 
+_store = None
 
-def sync_schemes_from_dump():
+
+def get_store():
+    """Load the NAV store once per run; every read and write in this script goes through it."""
+    global _store
+    if _store is None:
+        _store = NavStore.load()
+    return _store
+
+
+def sync_schemes_from_dump(snapshot):
     """
-    Hit the full NAV dump, compare against data.json, and:
+    Compare the full NAV dump snapshot against data.json, and:
     - Fix wrong scheme names
     - Auto-add new schemes (so they get backfilled in this same run)
     - Log new and dead schemes to missing_funds.json
-    Returns True if data.json was modified.
+    Returns the list of newly added schemes (False if the sync was skipped).
     """
     data_file = "data/data.json"
     missing_file = "data/missing_funds.json"
 
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-        'Referer': 'https://npstrust.org.in/',
-    }
-
     logger.info("Syncing scheme list from full NAV dump...")
-    try:
-        r = requests.get(DISCOVERY_URL, headers=headers, verify=False, timeout=30)
-        if r.status_code != 200 or len(r.content) < 100:
-            logger.warning(f"Full dump unavailable (status={r.status_code}), skipping sync")
-            return False
-        text = r.content.decode('utf-8', errors='ignore')
-        df = pd.read_csv(StringIO(text), sep='\t')
-    except Exception as e:
-        logger.warning(f"Could not fetch full dump: {e}, skipping sync")
+    if snapshot is None:
+        logger.warning("Full dump unavailable, skipping sync")
         return False
 
-    # Build dump map: scheme_code -> {name, pfm_name, nav, date}
-    dump = {}
-    for _, row in df.iterrows():
-        code = str(row.get('SCHEME ID', '')).strip()
-        if not code:
-            continue
-        dump[code] = {
-            'name': str(row.get('SCHEME NAME', '')).strip(),
-            'pfm_name': str(row.get('PFM NAME', '')).strip(),
-            'nav': str(row.get('NAV VALUE', '')).strip(),
-            'date': str(row.get('DATE OF NAV', '')).strip(),
-        }
+    # Dump map: scheme_code -> {name, pfm_name, nav, date}
+    dump = snapshot.schemes()
+    # Rows with a valid NAV and date: scheme_code -> {nav, date (MM/DD/YYYY), pfm_name, scheme_name}
+    valid = snapshot.nav_records()
 
     # Load existing data.json
     try:
@@ -87,22 +81,20 @@ def sync_schemes_from_dump():
     # Fix name mismatches and collect new schemes
     for code, info in dump.items():
         if code not in our_map:
+            # A new scheme needs a NAV and date for its data.json entry; without them it waits for a later dump
+            if code not in valid:
+                logger.warning(f"New scheme {code} - {info['name']} has no valid NAV/date in the dump; not added yet")
+                continue
             # New scheme — derive PFM code from scheme code (SM008025 -> PFM008)
             pfm_code = f"PFM{code[2:5]}"
-            # Parse date from dump (YYYY-MM-DD) to our DATE_FORMAT (MM/DD/YYYY)
-            try:
-                dt = datetime.strptime(info['date'], '%Y-%m-%d')
-                formatted_date = dt.strftime(DATE_FORMAT)
-            except Exception:
-                formatted_date = datetime.now().strftime(DATE_FORMAT)
 
             new_entry = {
-                "Date": formatted_date,
+                "Date": valid[code]['date'],
                 "PFM Code": pfm_code,
                 "PFM Name": info['pfm_name'],
                 "Scheme Code": code,
                 "Scheme Name": info['name'],
-                "NAV": info['nav'],
+                "NAV": valid[code]['nav'],
             }
             data.append(new_entry)
             our_map[code] = new_entry
@@ -147,85 +139,24 @@ def sync_schemes_from_dump():
     return new_schemes
 
 def _get_last_stored_date():
-    """Return the most recent date stored across all scheme JSON files."""
-    latest = None
-    data_dir = 'data'
-    for fname in os.listdir(data_dir):
-        if not fname.startswith('SM') or not fname.endswith('.json'):
-            continue
-        try:
-            with open(os.path.join(data_dir, fname)) as f:
-                d = json.load(f)
-            if d:
-                first_key = next(iter(d))  # files are sorted newest first
-                dt = datetime.strptime(first_key, DATE_FORMAT)
-                if latest is None or dt > latest:
-                    latest = dt
-        except Exception:
-            continue
-    return latest
+    """Return the most recent date stored across all scheme series (read from the metadata index)."""
+    return load_index().last_date()
 
 
-def _fetch_protean(dt):
-    """Fetch NAV data from Protean ZIP for a specific date. Returns {scheme_code: {nav, date, pfm_name, scheme_name}} or {}."""
-    date_str = dt.strftime('%d%m%Y')
-    url = PROTEAN_URL.format(date_str=date_str)
-    try:
-        r = requests.get(url, verify=False, timeout=30)
-        if r.status_code != 200 or len(r.content) < 100:
-            return {}
-        import zipfile as zf
-        z = zf.ZipFile(BytesIO(r.content))
-        out_file = next(f for f in z.namelist() if f.endswith('.out'))
-        lines = z.open(out_file).read().decode('utf-8', errors='ignore').strip().split('\n')
-        data = {}
-        for line in lines:
-            cols = line.strip().split(',')
-            if len(cols) == 6:
-                sc = cols[3].strip()
-                data[sc] = {
-                    'nav': str(float(cols[5].strip())),
-                    'date': cols[0].strip(),       # already MM/DD/YYYY
-                    'pfm_name': cols[2].strip(),
-                    'scheme_name': cols[4].strip(),
-                }
-        return data
-    except Exception as e:
-        logger.warning(f"Protean fetch failed for {dt.strftime('%d-%m-%Y')}: {e}")
-        return {}
+def _fetch_nps_trust(snapshot):
+    """Latest NAV data from the NPS Trust full dump snapshot. Returns {scheme_code: {nav, date, pfm_name, scheme_name}} or {}."""
+    return snapshot.nav_records() if snapshot is not None else {}
 
 
-def _fetch_nps_trust():
-    """Fetch latest NAV data from NPS Trust full dump. Returns {scheme_code: {nav, date, pfm_name, scheme_name}} or {}."""
-    headers = {'User-Agent': 'Mozilla/5.0', 'Referer': 'https://npstrust.org.in/'}
-    try:
-        r = requests.get(DISCOVERY_URL, headers=headers, verify=False, timeout=30)
-        if r.status_code != 200 or len(r.content) < 100:
-            return {}
-        df = pd.read_csv(StringIO(r.content.decode('utf-8', errors='ignore')), sep='\t')
-        data = {}
-        for _, row in df.iterrows():
-            sc = str(row.get('SCHEME ID', '')).strip()
-            nav = str(row.get('NAV VALUE', '')).strip()
-            date_raw = str(row.get('DATE OF NAV', '')).strip()
-            pfm_name = str(row.get('PFM NAME', '')).strip()
-            scheme_name = str(row.get('SCHEME NAME', '')).strip()
-            if not sc or not nav:
-                continue
-            try:
-                nav_f = str(float(nav))
-                dt = datetime.strptime(date_raw, '%Y-%m-%d')
-                formatted_date = dt.strftime(DATE_FORMAT)
-                data[sc] = {'nav': nav_f, 'date': formatted_date, 'pfm_name': pfm_name, 'scheme_name': scheme_name}
-            except (ValueError, Exception):
-                pass
-        return data
-    except Exception as e:
-        logger.warning(f"NPS Trust dump fetch failed: {e}")
-        return {}
+def fetch_protean_dates():
+    """Protean files of every trading day newer than the stored history: {date_str: {scheme_code: info}}."""
+    # Every weekday up to 30 days back is requested at once; dates on or before the most
+    # recent date we already have are cancelled as soon as that date is known (see protean.py)
+    logger.info("Fetching daily NAVs from Protean...")
+    return fetch_protean_range(datetime.now(), _get_last_stored_date)
 
 
-def fetch_and_fix_from_dump():
+def fetch_and_fix_from_dump(snapshot, protean_by_date=None):
     """
     Primary daily NAV fetch using dual-source cross-validation:
     1. Protean ZIP (primary)  — 273 schemes, date-specific, historically correct
@@ -234,27 +165,12 @@ def fetch_and_fix_from_dump():
     If both sources agree on a NAV → save with confidence.
     If they disagree → log a warning (Protean value is used; NPS Trust remapping is a known issue).
     Also detects and repairs corrupted entries (stored NAV != source NAV for same date).
+    protean_by_date is the result of fetch_protean_range (fetched here if None).
     Returns list of records for save_latest_data.
     """
-    today = datetime.now()
-
     # --- Source 1: Protean (fetch ALL missing trading days, not just the latest) ---
-    # Find the most recent date we already have across all scheme files
-    logger.info("Fetching daily NAVs from Protean...")
-    last_stored = _get_last_stored_date()
-    protean_by_date = {}  # date_str -> {scheme_code -> info}
-    for days_back in range(30):  # scan up to 30 days back
-        candidate = today - timedelta(days=days_back)
-        if candidate.weekday() >= 5:  # skip weekends
-            continue
-        if last_stored and candidate <= last_stored:
-            break  # already have everything up to here
-        result = _fetch_protean(candidate)
-        if result:
-            protean_by_date[candidate.strftime(DATE_FORMAT)] = result
-            logger.info(f"Protean: fetched {len(result)} records for {candidate.strftime('%d-%m-%Y')}")
-        else:
-            logger.debug(f"Protean: no file for {candidate.strftime('%d-%m-%Y')}")
+    if protean_by_date is None:
+        protean_by_date = fetch_protean_dates()  # date_str -> {scheme_code -> info}
 
     # Flatten to most recent date for cross-validation (NPS Trust only has today)
     if protean_by_date:
@@ -265,8 +181,8 @@ def fetch_and_fix_from_dump():
         logger.warning("Protean: no data found in last 30 days")
 
     # --- Source 2: NPS Trust full dump ---
-    logger.info("Fetching daily NAVs from NPS Trust full dump...")
-    nps = _fetch_nps_trust()
+    logger.info("Reading daily NAVs from the NPS Trust full dump snapshot...")
+    nps = _fetch_nps_trust(snapshot)
 
     if not protean and not nps:
         logger.error("Both sources unavailable — skipping daily fetch")
@@ -308,61 +224,85 @@ def fetch_and_fix_from_dump():
         logger.warning("No data from either source — nothing to save")
         return []
 
-    # --- Save to scheme JSON files ---
-    new_records = []
-    fixes = 0
-    corruption_cutoff = datetime.strptime(CORRUPTION_START_DATE, DATE_FORMAT)
+    # --- Save to the NAV store: plan the whole change set, then apply it ---
+    store = get_store()
+    changes = _plan_dump_changes(dates_to_save, store)
+    new_records, fixes = _apply_dump_changes(changes, store)
+
+    logger.info(f"Daily fetch complete: {len(new_records)} records saved, {fixes} fixes, {len(mismatches)} source mismatches")
+    return new_records
+
+
+def _plan_dump_changes(dates_to_save, store):
+    """
+    Build the in-memory change set for a dump sync without touching any file:
+    scheme_code -> {'points': {date: info}, 'repair': bool}.
+
+    A scheme is marked for repair when a stored NAV disagrees with the source;
+    applying the repair drops every stored entry from CORRUPTION_START_DATE on,
+    so all source points for that scheme are kept in the plan, not only the new ones.
+    """
+    cutoff = datetime.strptime(CORRUPTION_START_DATE, DATE_FORMAT)
+    changes = {}
 
     for date_str, schemes in sorted(dates_to_save.items(), key=lambda x: datetime.strptime(x[0], DATE_FORMAT)):
         for scheme_code, info in schemes.items():
-            nav_val = info['nav']
             formatted_date = info.get('date') or date_str
-
             if not formatted_date:
                 continue
 
-            pfm_code = f"PFM{scheme_code[2:5]}"
-            scheme_file = os.path.join('data', f"{scheme_code}.json")
-
-            if os.path.exists(scheme_file):
-                try:
-                    with open(scheme_file, 'r') as f:
-                        scheme_data = json.load(f, object_pairs_hook=OrderedDict)
-                except Exception:
-                    scheme_data = OrderedDict()
+            entry = changes.setdefault(scheme_code, {'points': {}, 'known': {}, 'repair': False})
+            stored_nav = store.nav_on(scheme_code, formatted_date)
+            if stored_nav is not None and stored_nav != info['nav']:
+                entry['repair'] = True  # Wrong value — stored history from the cutoff on is corrupted
+            if stored_nav == info['nav']:
+                entry['known'][formatted_date] = info  # Already correct, unless a repair drops it
             else:
-                scheme_data = OrderedDict()
-
-            if formatted_date in scheme_data:
-                if scheme_data[formatted_date] == nav_val:
-                    continue  # Already correct
-
-                # Wrong value — remove corrupted entries from cutoff date onwards
-                corrupted = [d for d in list(scheme_data.keys())
-                             if datetime.strptime(d, DATE_FORMAT) >= corruption_cutoff]
-                for d in corrupted:
-                    del scheme_data[d]
-                logger.info(f"Fixed {scheme_code}: removed {len(corrupted)} corrupted entries (>= {CORRUPTION_START_DATE})")
-                fixes += 1
-
-            scheme_data[formatted_date] = nav_val
-            sorted_data = OrderedDict(
-                sorted(scheme_data.items(), key=lambda x: datetime.strptime(x[0], DATE_FORMAT), reverse=True)
-            )
-            with open(scheme_file, 'w') as f:
-                json.dump(sorted_data, f, indent=4)
+                entry['points'][formatted_date] = info
+
+    for scheme_code in list(changes):
+        entry = changes[scheme_code]
+        if entry['repair']:
+            # Correct points on or after the cutoff are removed by the repair, so re-add them
+            for date_key, info in entry['known'].items():
+                if datetime.strptime(date_key, DATE_FORMAT) >= cutoff:
+                    entry['points'][date_key] = info
+        del entry['known']
+        if not entry['points'] and not entry['repair']:
+            del changes[scheme_code]
+
+    return changes
+
 
+def _apply_dump_changes(changes, store):
+    """Apply a planned change set with one store save and one write per scheme; report what changed."""
+    writer = NavWriter(store)
+    new_records = []
+    fixes = 0
+
+    for scheme_code in sorted(changes):
+        entry = changes[scheme_code]
+        if entry['repair']:
+            removed = writer.truncate_from(scheme_code, CORRUPTION_START_DATE)
+            logger.info(f"Fixed {scheme_code}: removed {removed} corrupted entries (>= {CORRUPTION_START_DATE})")
+            fixes += 1
+
+        for date_key, info in sorted(entry['points'].items(), key=lambda x: datetime.strptime(x[0], DATE_FORMAT)):
+            writer.add(scheme_code, date_key, info['nav'])
             new_records.append({
-                "Date": formatted_date,
-                "PFM Code": pfm_code,
+                "Date": date_key,
+                "PFM Code": f"PFM{scheme_code[2:5]}",
                 "PFM Name": info.get('pfm_name', ''),
                 "Scheme Code": scheme_code,
                 "Scheme Name": info.get('scheme_name', ''),
-                "NAV": nav_val,
+                "NAV": info['nav'],
             })
 
-    logger.info(f"Daily fetch complete: {len(new_records)} records saved, {fixes} fixes, {len(mismatches)} source mismatches")
-    return new_records
+    written = writer.commit()
+    total_points = sum(len(entry['points']) for entry in changes.values())
+    logger.info(f"Change set: {len(changes)} schemes, {total_points} points, {fixes} repairs; "
+                f"{len(written)} scheme files written")
+    return new_records, fixes
 
 
 def get_pfm_scheme_mappings():
@@ -404,28 +344,16 @@ def get_pfm_scheme_mappings():
 
 def get_existing_dates(scheme_code):
     """Get a set of all dates already present for a specific scheme"""
-    scheme_file = os.path.join('data', f"{scheme_code}.json")
-    existing_dates = set()
-    
-    if os.path.exists(scheme_file):
-        try:
-            with open(scheme_file, 'r') as f:
-                scheme_data = json.load(f)
-            if scheme_data:
-                # Convert string dates to datetime objects for comparison
-                for date_str in scheme_data.keys():
-                    try:
-                        dt = datetime.strptime(date_str, DATE_FORMAT)
-                        existing_dates.add(dt)
-                    except ValueError:
-                        continue
-        except Exception as e:
-            logger.warning(f"Could not read existing dates for {scheme_code}: {e}")
-            
-    return existing_dates
+    if scheme_code not in load_index():
+        return set()  # No history yet; no need to load the store
+    series = get_store().get(scheme_code)
+    if series is None:
+        return set()
+    return {datetime.fromordinal(int(o)) for o in series.ordinals}
 
 def try_read_file_alternative(file_content):
     """Try to read file with different approaches - TSV, CSV, or Excel"""
+    import pandas as pd  # Only the per-scheme backfill path needs pandas
     
     # Method 1: Try as TSV (tab-separated) file first
     try:
@@ -505,6 +433,7 @@ def try_read_file_alternative(file_content):
 
 def parse_date_string(date_str):
     """Parse date string with multiple format attempts"""
+    import pandas as pd
     if not date_str or pd.isna(date_str):
         return None, None
     
@@ -533,8 +462,8 @@ def parse_date_string(date_str):
     
     return None, None
 
-def download_nav_excel(pfm_code, scheme_code, pfm_names, scheme_names, retry_count=3):
-    """Download NAV data for a specific PFM and scheme from npstrust.org.in"""
+def download_nav_excel(pfm_code, scheme_code, pfm_names, scheme_names):
+    """Download NAV data for a specific PFM and scheme from npstrust.org.in (transient failures raise)"""
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
         'Accept': 'application/vnd.ms-excel,application/vnd.openxmlformats-officedocument.spreadsheetml.sheet,text/plain,*/*',
@@ -550,40 +479,29 @@ def download_nav_excel(pfm_code, scheme_code, pfm_names, scheme_names, retry_cou
         'navsubdataxls': scheme_code
     }
     
-    for attempt in range(retry_count):
-        try:
-            logger.info(f"Downloading NAV data for {pfm_code}/{scheme_code} (attempt {attempt + 1})")
-            response = requests.get(BASE_URL, params=params, headers=headers, verify=False, timeout=30)
-            
-            if response.status_code == 200 and len(response.content) > 0:
-                content_type = response.headers.get('content-type', '').lower()
-                logger.debug(f"Response content type: {content_type}, size: {len(response.content)} bytes")
-                
-                try:
-                    df = try_read_file_alternative(response.content)
-                    return parse_excel_data(df, pfm_code, scheme_code, pfm_names, scheme_names)
-                except Exception as e:
-                    logger.error(f"Error parsing file for {pfm_code}/{scheme_code}: {e}")
-                    if attempt == retry_count - 1:
-                        return []
-            else:
-                logger.warning(f"Failed to download data for {pfm_code}/{scheme_code}. Status: {response.status_code}")
-                if attempt == retry_count - 1:
-                    return []
-                    
-        except requests.RequestException as e:
-            logger.error(f"Error downloading {pfm_code}/{scheme_code} (attempt {attempt + 1}): {e}")
-            if attempt == retry_count - 1:
-                return []
-        
-        # Wait before retry
-        if attempt < retry_count - 1:
-            time.sleep(2 ** attempt)  # Exponential backoff
+    # Connection errors and 5xx/429 responses are requeued with backoff by the scheduler
+    logger.info(f"Downloading NAV data for {pfm_code}/{scheme_code}")
+    response = http_client.get(BASE_URL, retries=0, params=params, headers=headers, verify=False, timeout=30)
+    if response.status_code in http_client.RETRY_STATUSES:
+        raise RetryableError(f"HTTP {response.status_code}", retry_after_seconds(response))
+    
+    if response.status_code != 200 or len(response.content) == 0:
+        logger.warning(f"Failed to download data for {pfm_code}/{scheme_code}. Status: {response.status_code}")
+        return []
     
-    return []
+    content_type = response.headers.get('content-type', '').lower()
+    logger.debug(f"Response content type: {content_type}, size: {len(response.content)} bytes")
+    
+    try:
+        df = try_read_file_alternative(response.content)
+        return parse_excel_data(df, pfm_code, scheme_code, pfm_names, scheme_names)
+    except Exception as e:
+        # An unreadable body is usually an error page from an overloaded server: back off and retry
+        raise RetryableError(f"unparsable response for {pfm_code}/{scheme_code}: {e}")
 
 def parse_excel_data(df, pfm_code, scheme_code, pfm_names, scheme_names):
     """Parse the data and extract NAV information"""
+    import pandas as pd
     data_list = []
     
     try:
@@ -700,7 +618,7 @@ def parse_excel_data(df, pfm_code, scheme_code, pfm_names, scheme_names):
         return []
 
 def update_scheme_json(new_data):
-    """Update individual JSON files for schemes with only NEW data"""
+    """Update the NAV store (and the exported scheme JSON files) with only NEW data"""
     if not os.path.exists('data'):
         os.makedirs('data')
     
@@ -710,37 +628,15 @@ def update_scheme_json(new_data):
     for record in new_data:
         scheme_code = record["Scheme Code"]
         if scheme_code not in schemes_updated:
-            schemes_updated[scheme_code] = []
-        schemes_updated[scheme_code].append(record)
+            schemes_updated[scheme_code] = {}
+        schemes_updated[scheme_code][record["Date"]] = record["NAV"]
     
-    # Update each scheme file
-    for scheme_code, records in schemes_updated.items():
-        scheme_file = os.path.join('data', f"{scheme_code}.json")
-        
-        try:
-            # Load existing data
-            if os.path.exists(scheme_file):
-                with open(scheme_file, 'r') as f:
-                    scheme_data = json.load(f, object_pairs_hook=OrderedDict)
-            else:
-                scheme_data = OrderedDict()
-            
-            # Add new records
-            for record in records:
-                scheme_data[record["Date"]] = record["NAV"]
-            
-            # Sort by date (newest first)
-            sorted_scheme_data = OrderedDict(
-                sorted(scheme_data.items(), key=lambda x: datetime.strptime(x[0], DATE_FORMAT), reverse=True)
-            )
-            
-            # Save updated file
-            with open(scheme_file, 'w') as f:
-                json.dump(sorted_scheme_data, f, indent=4)
-            
-            logger.info(f"Updated {scheme_file} with {len(records)} new records")
-        except Exception as e:
-            logger.error(f"Error updating {scheme_file}: {e}")
+    writer = NavWriter(get_store())
+    for scheme_code, points in schemes_updated.items():
+        writer.add_points(scheme_code, points)
+        logger.info(f"Updated {scheme_code} with {len(points)} new records")
+    
+    writer.commit()
 
 def save_latest_data(new_data):
     """Save the latest NAV data to data.json"""
@@ -771,29 +667,37 @@ def save_latest_data(new_data):
         logger.error(f"Error saving latest data: {e}")
 
 def process_scheme(pfm_code, scheme_code, pfm_names, scheme_names):
-    """Process a single scheme: download, extract, parse, and return new data only"""
-    try:
-        nav_data = download_nav_excel(pfm_code, scheme_code, pfm_names, scheme_names)
-        
-        if nav_data:
-            logger.info(f"Found {len(nav_data)} new records for {pfm_code}/{scheme_code}")
-            return nav_data
-        else:
-            logger.debug(f"No new NAV data for {pfm_code}/{scheme_code}")
-            return []
-    except Exception as e:
-        logger.error(f"Error processing scheme {pfm_code}/{scheme_code}: {e}")
+    """Process a single scheme: download, extract, parse, and return new data only.
+    Download failures propagate so the scheduler can retry them."""
+    nav_data = download_nav_excel(pfm_code, scheme_code, pfm_names, scheme_names)
+    
+    if nav_data:
+        logger.info(f"Found {len(nav_data)} new records for {pfm_code}/{scheme_code}")
+        return nav_data
+    else:
+        logger.debug(f"No new NAV data for {pfm_code}/{scheme_code}")
         return []
 
 if __name__ == "__main__":
     logger.info("Starting NAV data fetch process...")
 
+    # The NPS Trust full dump is downloaded and parsed once, then shared by steps 1 and 2
+    snapshot = DumpSnapshot.fetch()
+    protean_by_date = fetch_protean_dates()
+
+    # Nothing new upstream since the last successful run: skip the rest of the pipeline
+    if '--force' not in sys.argv[1:] and \
+            is_unchanged(upstream_fingerprint(snapshot, protean_by_date, _get_last_stored_date())):
+        logger.info("Upstream unchanged since the last successful run; nothing to do")
+        http_client.log_timing_summary(logger)
+        sys.exit(UNCHANGED_EXIT_CODE)
+
     # Step 1: Sync scheme list — fix names, auto-add new schemes, log dead ones
-    new_schemes = sync_schemes_from_dump()
+    new_schemes = sync_schemes_from_dump(snapshot)
 
-    # Step 2: Fetch today's NAVs from full dump (1 request, correct for all schemes)
+    # Step 2: Fetch today's NAVs from Protean, cross-validated against the full dump
     # Also repairs any corrupted entries caused by per-scheme endpoint remapping
-    daily_records = fetch_and_fix_from_dump()
+    daily_records = fetch_and_fix_from_dump(snapshot, protean_by_date)
 
     if daily_records:
         save_latest_data(daily_records)
@@ -805,24 +709,31 @@ if __name__ == "__main__":
         pfm_scheme_mappings, pfm_names, scheme_names = get_pfm_scheme_mappings()
         logger.info(f"Backfilling history for {len(new_schemes)} new schemes...")
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
-            future_to_scheme = {
-                executor.submit(process_scheme, s['PFM Code'], s['Scheme Code'], pfm_names, scheme_names): s
-                for s in new_schemes
-            }
-            for future in concurrent.futures.as_completed(future_to_scheme):
-                s = future_to_scheme[future]
-                try:
-                    data = future.result()
-                    backfill_data.extend(data)
-                except Exception as exc:
-                    logger.error(f"Backfill error for {s['Scheme Code']}: {exc}")
+        # Rate-limited with an adaptive in-flight window, failed downloads requeued after a backoff
+        controller = AIMDController()
+        scheduler = Scheduler(controller=controller)
+        for s in new_schemes:
+            scheduler.submit(s['Scheme Code'], process_scheme, s['PFM Code'], s['Scheme Code'], pfm_names, scheme_names)
+        for data in scheduler.run().values():
+            backfill_data.extend(data)
+        for scheme_code, exc in scheduler.failures.items():
+            logger.error(f"Backfill error for {scheme_code}: {exc}")
+        logger.info(controller.summary())
 
         if backfill_data:
             update_scheme_json(backfill_data)
             save_latest_data(backfill_data)
             logger.info(f"Backfilled {len(backfill_data)} historical records for {len(new_schemes)} new schemes")
 
+    # Step 4: Regenerate the schemes x trading-days NAV matrix from the store
+    rows, days = build_matrix(get_store())
+    logger.info(f"Rebuilt NAV matrix: {rows} series x {days} trading days")
+    http_client.log_timing_summary(logger)
+    download_cache.evict()
+
+    # The pipeline marks this "complete" once build and deploy have succeeded (pipeline_state.py)
+    record_pending(upstream_fingerprint(snapshot, {}, _get_last_stored_date()))
+
     total = len(daily_records) + len(backfill_data)
     if total:
         logger.info(f"Script completed successfully. Total records processed: {total}")
@@ -1,13 +1,17 @@
 import requests
+import http_client
 import zipfile
 import os
 from io import BytesIO
-import json
-from collections import OrderedDict
-from datetime import datetime, timedelta
+from datetime import datetime
 import urllib3
-import sys
+import io
 import shutil
+import threading
+import concurrent.futures
+from navstore import NavStore, NIFTY_CODE
+from navwriter import NavWriter
+from presence import load_presence
 
 # Disable SSL warnings since we're disabling verification
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -15,6 +19,22 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 DATE_FORMAT = '%m/%d/%Y'
 DIRECT_IP = "144.126.254.118"
 
+# NSDL has published the daily NAV ZIP under several names over the years
+URL_VARIATIONS = [
+    "https://npscra.nsdl.co.in/download/NAV_File_{date_str}.zip",
+    "https://npscra.nsdl.co.in/download/NAV_FILE_{date_str}.zip",
+    "https://npscra.nsdl.co.in/download/NAV_file_{date_str}.zip",
+    "https://npscra.nsdl.co.in/download/NAV%20File%20{date_str}.zip",
+    "https://npscra.nsdl.co.in/download/NAV%20FILE%20{date_str}.zip",
+    "https://npscra.nsdl.co.in/download/nav%20file%20{date_str}.zip",
+    "https://npscra.nsdl.co.in/download/NAV_File{date_str}.zip",
+    "https://npscra.nsdl.co.in/download/NAV_FILE{date_str}.zip",
+    "https://npscra.nsdl.co.in/download/NAV_file{date_str}.zip",
+    "https://npscra.nsdl.co.in/download/NAV%20File{date_str}.zip",
+    "https://npscra.nsdl.co.in/download/NAV%20FILE{date_str}.zip",
+    "https://npscra.nsdl.co.in/download/nav%20file{date_str}.zip"
+]
+
 # =============================================================================
 # CONFIGURATION - MODIFY THESE AS NEEDED
 # =============================================================================
@@ -31,6 +51,11 @@ SPECIFIC_DATES = [
 "10/02/2020", "04/02/2020", "03/02/2020", "22/07/2019", "07/08/2015"
 ]
 
+# PARALLEL REPAIR: download all dates concurrently, parse the ZIPs in memory and
+# write every scheme file once at the end. False processes dates one at a time.
+PARALLEL = True
+MAX_WORKERS = 8  # Dates downloaded at once
+
 # =============================================================================
 
 # Create logs directory if it doesn't exist
@@ -47,6 +72,7 @@ log_filename = f"logs/missing_dates_{datetime.now().strftime('%Y%m%d_%H%M%S')}.t
 class Logger:
     def __init__(self, log_file):
         self.log_file = log_file
+        self.lock = threading.Lock()  # Parallel downloads log from worker threads
         # Write initial header
         with open(self.log_file, 'w', encoding='utf-8') as f:
             f.write(f"NAV Data Update Log\n")
@@ -59,16 +85,17 @@ class Logger:
         log_entry = f"[{timestamp}] {message}\n"
         
         # Write to file immediately (flush to ensure it's written even if program crashes)
-        try:
-            with open(self.log_file, 'a', encoding='utf-8') as f:
-                f.write(log_entry)
-                f.flush()  # Force write to disk
-        except Exception as e:
-            print(f"Error writing to log file: {e}")
-        
-        # Also print to console if requested
-        if also_print:
-            print(f"[{timestamp}] {message}")
+        with self.lock:
+            try:
+                with open(self.log_file, 'a', encoding='utf-8') as f:
+                    f.write(log_entry)
+                    f.flush()  # Force write to disk
+            except Exception as e:
+                print(f"Error writing to log file: {e}")
+            
+            # Also print to console if requested
+            if also_print:
+                print(f"[{timestamp}] {message}")
     
     def log_error(self, message, exception=None):
         """Log error messages"""
@@ -91,6 +118,15 @@ class Logger:
 # Initialize logger
 logger = Logger(log_filename)
 
+_store = None
+
+def get_store():
+    """Load the NAV store once per run."""
+    global _store
+    if _store is None:
+        _store = NavStore.load()
+    return _store
+
 def is_market_day(date):
     """
     Check if a date is a market day (exclude weekends).
@@ -155,20 +191,55 @@ def convert_date_format(date_str):
         # Don't log error here to avoid spam, let the calling function handle it
         return None
 
-def save_problematic_file(file_name, date_str):
-    """Save a copy of problematic files for manual inspection"""
-    debug_file = os.path.join('debug_files', f"debug_{date_str}_{file_name}")
+def save_problematic_file(file_name, date_str, content=None):
+    """Save a copy of problematic files (or of their in-memory content) for manual inspection"""
+    debug_file = os.path.join('debug_files', f"debug_{date_str}_{os.path.basename(file_name)}")
     try:
-        shutil.copy2(file_name, debug_file)
+        if content is not None:
+            with open(debug_file, 'wb') as f:
+                f.write(content)
+        else:
+            shutil.copy2(file_name, debug_file)
         logger.log(f"Saved problematic file to: {debug_file}")
     except Exception as e:
         logger.log_error(f"Failed to save debug file", e)
 
+def _out_member(content):
+    """Name of the .out file in a ZIP (None if it has none); raises zipfile.BadZipFile for a non-ZIP body."""
+    with zipfile.ZipFile(BytesIO(content)) as zip_ref:
+        return next((f for f in zip_ref.namelist() if f.endswith('.out')), None)
+
 def download_and_extract_nav(date_str, url_variations):
     """
     Attempt to download and extract the NAV data for a given date using multiple URL variations.
     Returns the extracted file name if successful, otherwise returns None.
     """
+    downloaded = download_nav_zip(date_str, url_variations)
+    if not downloaded:
+        return None
+    content, file_name = downloaded
+    with zipfile.ZipFile(BytesIO(content)) as zip_ref:
+        zip_ref.extract(file_name, os.getcwd())
+    logger.log(f"Extracted: {file_name}")
+    return file_name
+
+def read_nav_member(date_str, url_variations):
+    """
+    Download the NAV ZIP for a given date and read its .out member in memory (nothing is written to disk).
+    Returns (file_name, content) if successful, otherwise returns None.
+    """
+    downloaded = download_nav_zip(date_str, url_variations)
+    if not downloaded:
+        return None
+    content, file_name = downloaded
+    with zipfile.ZipFile(BytesIO(content)) as zip_ref:
+        return file_name, zip_ref.read(file_name)
+
+def download_nav_zip(date_str, url_variations):
+    """
+    Attempt to download the NAV ZIP for a given date using multiple URL variations.
+    Returns (zip content, .out member name) if successful, otherwise returns None.
+    """
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
         'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
@@ -184,17 +255,14 @@ def download_and_extract_nav(date_str, url_variations):
         logger.log(f"  Trying URL variation {i}/{len(url_variations)}: {domain_url}")
         
         try:
-            response = requests.get(domain_url, headers=domain_headers, verify=False, timeout=30)
+            response = http_client.get(domain_url, headers=domain_headers, verify=False, timeout=30)
             
             if response.status_code == 200:
                 logger.log(f"Downloaded ZIP file from: {domain_url}")
                 try:
-                    with zipfile.ZipFile(BytesIO(response.content)) as zip_ref:
-                        for file_name in zip_ref.namelist():
-                            if file_name.endswith('.out'):
-                                zip_ref.extract(file_name, os.getcwd())
-                                logger.log(f"Extracted: {file_name}")
-                                return file_name
+                    file_name = _out_member(response.content)
+                    if file_name:
+                        return response.content, file_name
                 except zipfile.BadZipFile:
                     logger.log_error(f"Invalid ZIP file received from {domain_url}")
                     continue
@@ -209,16 +277,13 @@ def download_and_extract_nav(date_str, url_variations):
                 logger.log(f"  IP fallback URL: {ip_url}")
                 
                 try:
-                    response = requests.get(ip_url, headers=ip_headers, verify=False, timeout=30)
+                    response = http_client.get(ip_url, headers=ip_headers, verify=False, timeout=30)
                     if response.status_code == 200:
                         logger.log(f"Downloaded ZIP file from IP fallback: {ip_url}")
                         try:
-                            with zipfile.ZipFile(BytesIO(response.content)) as zip_ref:
-                                for file_name in zip_ref.namelist():
-                                    if file_name.endswith('.out'):
-                                        zip_ref.extract(file_name, os.getcwd())
-                                        logger.log(f"Extracted: {file_name}")
-                                        return file_name
+                            file_name = _out_member(response.content)
+                            if file_name:
+                                return response.content, file_name
                         except zipfile.BadZipFile:
                             logger.log_error(f"Invalid ZIP file received from IP {ip_url}")
                             continue
@@ -241,16 +306,13 @@ def download_and_extract_nav(date_str, url_variations):
                 
                 logger.log(f"  Trying IP fallback due to connection error: {ip_url}")
                 
-                response = requests.get(ip_url, headers=ip_headers, verify=False, timeout=30)
+                response = http_client.get(ip_url, headers=ip_headers, verify=False, timeout=30)
                 if response.status_code == 200:
                     logger.log(f"Downloaded ZIP file from IP fallback: {ip_url}")
                     try:
-                        with zipfile.ZipFile(BytesIO(response.content)) as zip_ref:
-                            for file_name in zip_ref.namelist():
-                                if file_name.endswith('.out'):
-                                    zip_ref.extract(file_name, os.getcwd())
-                                    logger.log(f"Extracted: {file_name}")
-                                    return file_name
+                        file_name = _out_member(response.content)
+                        if file_name:
+                            return response.content, file_name
                     except zipfile.BadZipFile:
                         logger.log_error(f"Invalid ZIP file from IP {ip_url}")
                         continue
@@ -259,17 +321,26 @@ def download_and_extract_nav(date_str, url_variations):
     
     return None
 
-def parse_out_file(file_name):
-    """Parse the .out file and extract the NAV data with proper format detection."""
+def _open_out_file(file_name, content=None):
+    """The .out file as text: parsed from memory when its content is given, else read from disk."""
+    if content is not None:
+        return io.TextIOWrapper(BytesIO(content), encoding='utf-8')
+    return open(file_name, 'r', encoding='utf-8')
+
+def parse_out_file(file_name, content=None):
+    """Parse the .out file (or its in-memory content) and extract the NAV data with proper format detection."""
     logger.log(f"Parsing file: {file_name}")
     data_list = []
     invalid_dates = 0
     
     try:
         # First, examine the raw content to understand the format
-        with open(file_name, 'rb') as file:
-            raw_sample = file.read(200)
-            logger.log(f"Raw file sample: {raw_sample}")
+        if content is not None:
+            raw_sample = content[:200]
+        else:
+            with open(file_name, 'rb') as file:
+                raw_sample = file.read(200)
+        logger.log(f"Raw file sample: {raw_sample}")
         
         # Determine the correct format based on file content
         if b'\t' in raw_sample:
@@ -301,7 +372,7 @@ def parse_out_file(file_name):
             if b'"' in raw_sample and (b'PFM001,' in raw_sample or b'PFM001SBI' in raw_sample):
                 logger.log("Detected malformed 2015 format - attempting to fix")
                 # This needs special handling
-                return parse_malformed_2015_format(file_name)
+                return parse_malformed_2015_format(file_name, content)
             else:
                 # Normal comma format: Date, PFM_Code, PFM_Name, Scheme_Code, Scheme_Name, NAV
                 date_col, pfm_code_col, pfm_name_col, scheme_code_col, scheme_name_col, nav_col = 0, 1, 2, 3, 4, 5
@@ -311,7 +382,7 @@ def parse_out_file(file_name):
             return []
 
         # Parse the file with the detected format
-        with open(file_name, 'r', encoding='utf-8') as file:
+        with _open_out_file(file_name, content) as file:
             for line_num, line in enumerate(file, 1):
                 line = line.strip()
                 if not line:
@@ -378,13 +449,13 @@ def parse_out_file(file_name):
     
     return data_list
 
-def parse_malformed_2015_format(file_name):
+def parse_malformed_2015_format(file_name, content=None):
     """Special parser for malformed 2015 format files."""
     logger.log("Using special parser for malformed 2015 format")
     data_list = []
     
     try:
-        with open(file_name, 'r', encoding='utf-8') as file:
+        with _open_out_file(file_name, content) as file:
             for line_num, line in enumerate(file, 1):
                 line = line.strip().strip('"')  # Remove outer quotes
                 
@@ -457,8 +528,10 @@ def parse_malformed_2015_format(file_name):
 
 def find_missing_dates(start_date_str, end_date_str):
     """
-    Find dates that are missing from our data by checking backwards from end_date to start_date.
-    Excludes weekends and non-fund JSON files.
+    Find dates that are missing from our data between start_date and end_date.
+    A weekday is missing when no fund has a NAV for it, or when some fund lacks a NAV
+    that other funds have (within that fund's own first..last stored date).
+    Excludes weekends and non-fund series.
     """
     logger.log_section("SCANNING FOR MISSING DATES")
     
@@ -478,72 +551,53 @@ def find_missing_dates(start_date_str, end_date_str):
         logger.log_error(f"Start date ({start_date_str}) cannot be after end date ({end_date_str})")
         return [], 0, 0
     
-    # Files to exclude from fund file checking
-    exclude_files = {'data.json', 'nifty.json', 'sensex.json', 'summary.json', 'index.json', 'banknifty.json'}
+    # Only fund series are checked (Nifty and other index series are excluded).
+    # The presence bitmap answers this for every fund at once, without loading any series.
+    presence = load_presence()
+    fund_codes = presence.scheme_codes()
+    start_ordinal, end_ordinal = start_date.toordinal(), end_date.toordinal()
     
-    logger.log(f"Scanning from {end_date.strftime('%d-%m-%Y')} back to {start_date.strftime('%d-%m-%Y')}")
+    logger.log(f"Scanning {len(fund_codes)} fund series from {end_date.strftime('%d-%m-%Y')} back to {start_date.strftime('%d-%m-%Y')}")
     logger.log("Excluding weekends (Saturday and Sunday)")
-    logger.log(f"Excluding non-fund files: {exclude_files}")
+    logger.log(f"Excluding non-fund series: {NIFTY_CODE}")
     
-    missing_dates = []
-    weekends_skipped = 0
-    market_days_checked = 0
-    current_date = end_date  # FIXED: This should use the parameter end_date
+    total_days = end_ordinal - start_ordinal + 1
+    no_fund_days = set(presence.missing_days(start_ordinal, end_ordinal).tolist())
+    scheme_gaps = presence.gaps(start_ordinal, end_ordinal, fund_codes)
     
-    logger.log(f"Starting scan from: {current_date.strftime('%d-%m-%Y')}")
+    # Weekend days only count when a fund missed a NAV that others published on them
+    gaps_by_day = {}
+    for scheme_code, ordinals in scheme_gaps.items():
+        for ordinal in ordinals.tolist():
+            gaps_by_day.setdefault(ordinal, []).append(scheme_code)
     
-    while current_date >= start_date:
-        if is_market_day(current_date):
-            market_days_checked += 1
-            date_str = current_date.strftime(DATE_FORMAT)
-            date_found = False
-            
-            # Check only fund files
-            data_dir = "data"
-            if os.path.exists(data_dir):
-                fund_files = [f for f in os.listdir(data_dir) 
-                             if f.endswith('.json') and f not in exclude_files]
-                
-                # Check first few fund files
-                files_checked = 0
-                files_with_date = 0
-                check_limit = min(5, len(fund_files))  # Check first 5 fund files
-                
-                for filename in fund_files[:check_limit]:
-                    fund_file = os.path.join(data_dir, filename)
-                    try:
-                        with open(fund_file, 'r') as f:
-                            fund_data = json.load(f)
-                            if date_str in fund_data:
-                                files_with_date += 1
-                            files_checked += 1
-                    except (json.JSONDecodeError, FileNotFoundError):
-                        continue
-                
-                # Date exists if found in majority of checked files
-                if files_checked > 0:
-                    date_found = (files_with_date / files_checked) >= 0.6  # 60% threshold
-            
-            if not date_found:
-                missing_dates.append(current_date)
-                logger.log(f"Missing: {current_date.strftime('%d-%m-%Y')} ({current_date.strftime('%A')}) - found in {files_with_date}/{files_checked} fund files")
-            else:
-                logger.log(f"Found: {current_date.strftime('%d-%m-%Y')} ({current_date.strftime('%A')}) - found in {files_with_date}/{files_checked} fund files")
+    market_days_checked = sum(1 for ordinal in range(start_ordinal, end_ordinal + 1) if (ordinal - 1) % 7 < 5)
+    weekends_skipped = total_days - market_days_checked
+    
+    missing_dates = []
+    for ordinal in sorted(no_fund_days | set(gaps_by_day), reverse=True):
+        current_date = datetime.fromordinal(ordinal)
+        missing_dates.append(current_date)
+        if ordinal in no_fund_days:
+            logger.log(f"Missing: {current_date.strftime('%d-%m-%Y')} ({current_date.strftime('%A')}) - found in 0/{len(fund_codes)} fund series")
         else:
-            weekends_skipped += 1
-            logger.log(f"Skipped: {current_date.strftime('%d-%m-%Y')} ({current_date.strftime('%A')}) - Weekend")
-        
-        current_date -= timedelta(days=1)
+            codes = gaps_by_day[ordinal]
+            shown = ', '.join(codes[:10]) + (f" (+{len(codes) - 10} more)" if len(codes) > 10 else '')
+            logger.log(f"Partial: {current_date.strftime('%d-%m-%Y')} ({current_date.strftime('%A')}) - missing in {len(codes)} fund series: {shown}")
     
-    # Sort missing dates (most recent first)
-    missing_dates.sort(reverse=True)
+    if scheme_gaps:
+        logger.log(f"\nGaps per fund series ({len(scheme_gaps)} series):")
+        for scheme_code, ordinals in sorted(scheme_gaps.items()):
+            logger.log(f"  {scheme_code}: {len(ordinals)} missing dates, {datetime.fromordinal(int(ordinals[0])).strftime('%d-%m-%Y')} to {datetime.fromordinal(int(ordinals[-1])).strftime('%d-%m-%Y')}")
     
     logger.log(f"\nScan complete:")
     logger.log(f"  - Date range: {start_date.strftime('%d-%m-%Y')} to {end_date.strftime('%d-%m-%Y')}")
     logger.log(f"  - Total missing market days: {len(missing_dates)}")
+    logger.log(f"  - Days with no fund data: {len(no_fund_days)}")
+    logger.log(f"  - Days missing for some funds: {len(set(gaps_by_day) - no_fund_days)}")
     logger.log(f"  - Market days checked: {market_days_checked}")
     logger.log(f"  - Weekends skipped: {weekends_skipped}")
-    logger.log(f"  - Total days scanned: {(end_date - start_date).days + 1}")
+    logger.log(f"  - Total days scanned: {total_days}")
     
     return missing_dates, market_days_checked, weekends_skipped
 
@@ -581,7 +635,7 @@ def get_specific_dates():
     return valid_dates, len(weekends_skipped), len(invalid_dates)
 
 def update_fund_json_files(nav_data):
-    """Update individual fund JSON files with new NAV data."""
+    """Update the NAV store and the exported fund JSON files with new NAV data."""
     if not os.path.exists('data'):
         os.makedirs('data')
     
@@ -595,50 +649,38 @@ def update_fund_json_files(nav_data):
             schemes_data[scheme_code] = []
         schemes_data[scheme_code].append(entry)
     
-    logger.log(f"Processing {len(schemes_data)} fund files...")
+    logger.log(f"Processing {len(schemes_data)} fund series...")
+    
+    store = get_store()
+    writer = NavWriter(store)
     
-    # Update each fund's JSON file
+    # Update each fund's series
     for scheme_code, entries in schemes_data.items():
-        scheme_file = os.path.join('data', f"{scheme_code}.json")
-        
         try:
-            # Load existing data
-            if os.path.exists(scheme_file):
-                with open(scheme_file, 'r') as f:
-                    scheme_data = json.load(f, object_pairs_hook=OrderedDict)
-            else:
-                scheme_data = OrderedDict()
-                logger.log(f"  Creating new file: {scheme_code}.json")
+            series = store.get(scheme_code)
+            if series is None:
+                logger.log(f"  Creating new series: {scheme_code}")
             
             # Add new entries (there should typically be only one entry per scheme per date)
-            new_entries_added = 0
+            new_points = {}
             for entry in entries:
                 date_key = entry["Date"]
-                if date_key not in scheme_data:
-                    scheme_data[date_key] = entry["NAV"]
-                    new_entries_added += 1
+                if (series is None or series.get(date_key) is None) and date_key not in new_points:
+                    new_points[date_key] = entry["NAV"]
                 else:
-                    logger.log(f"  Date {date_key} already exists in {scheme_code}.json, skipping")
+                    logger.log(f"  Date {date_key} already exists in {scheme_code}, skipping")
             
-            if new_entries_added > 0:
-                # Sort by date (most recent first)
-                sorted_scheme_data = OrderedDict(
-                    sorted(scheme_data.items(), 
-                          key=lambda x: datetime.strptime(x[0], DATE_FORMAT), 
-                          reverse=True)
-                )
-                
-                # Save updated data
-                with open(scheme_file, 'w') as f:
-                    json.dump(sorted_scheme_data, f, indent=4)
-                
+            if new_points:
+                writer.add_points(scheme_code, new_points)
                 updated_funds.append(scheme_code)
-                logger.log(f"  Successfully updated {scheme_code}.json (+{new_entries_added} entries)")
+                logger.log(f"  Successfully updated {scheme_code} (+{len(new_points)} entries)")
             else:
-                logger.log(f"  No new entries to add for {scheme_code}.json")
+                logger.log(f"  No new entries to add for {scheme_code}")
         
         except Exception as e:
-            logger.log_error(f"Failed to update {scheme_code}.json", e)
+            logger.log_error(f"Failed to update {scheme_code}", e)
+    
+    writer.commit()
     
     return updated_funds
 
@@ -648,20 +690,7 @@ def process_dates(dates_to_process, mode_name):
         logger.log_success(f"No dates to process in {mode_name} mode!")
         return [], [], [], 0
     
-    url_variations = [
-        "https://npscra.nsdl.co.in/download/NAV_File_{date_str}.zip",
-        "https://npscra.nsdl.co.in/download/NAV_FILE_{date_str}.zip",
-        "https://npscra.nsdl.co.in/download/NAV_file_{date_str}.zip",
-        "https://npscra.nsdl.co.in/download/NAV%20File%20{date_str}.zip",
-        "https://npscra.nsdl.co.in/download/NAV%20FILE%20{date_str}.zip",
-        "https://npscra.nsdl.co.in/download/nav%20file%20{date_str}.zip",
-        "https://npscra.nsdl.co.in/download/NAV_File{date_str}.zip",
-        "https://npscra.nsdl.co.in/download/NAV_FILE{date_str}.zip",
-        "https://npscra.nsdl.co.in/download/NAV_file{date_str}.zip",
-        "https://npscra.nsdl.co.in/download/NAV%20File{date_str}.zip",
-        "https://npscra.nsdl.co.in/download/NAV%20FILE{date_str}.zip",
-        "https://npscra.nsdl.co.in/download/nav%20file{date_str}.zip"
-    ]
+    url_variations = URL_VARIATIONS
     
     dates_successfully_updated = []
     dates_no_data = []
@@ -712,6 +741,93 @@ def process_dates(dates_to_process, mode_name):
     
     return dates_successfully_updated, dates_no_data, dates_found_but_failed_update, total_updated_funds
 
+def merge_nav_data(changes, nav_data, store):
+    """Add the points of one date's nav_data that are not stored yet to changes ({code: {date: nav}}); returns how many."""
+    added = 0
+    for entry in nav_data:
+        scheme_code = entry["Scheme Code"]
+        date_key = entry["Date"]
+        series = store.get(scheme_code)
+        points = changes.setdefault(scheme_code, {})
+        if (series is None or series.get(date_key) is None) and date_key not in points:
+            points[date_key] = entry["NAV"]
+            added += 1
+    return added
+
+def process_dates_parallel(dates_to_process, mode_name):
+    """
+    Process a list of dates with concurrent downloads. Each ZIP is read and parsed in memory,
+    the new points of all dates are merged into one change set, and every touched fund file
+    is written once at the end. Returns the same summary as process_dates.
+    """
+    if not dates_to_process:
+        logger.log_success(f"No dates to process in {mode_name} mode!")
+        return [], [], [], 0
+    
+    dates_successfully_updated = []
+    dates_no_data = []
+    dates_found_but_failed_update = []
+    
+    logger.log_section(f"DOWNLOADING {len(dates_to_process)} DATES IN {mode_name.upper()} MODE ({MAX_WORKERS} AT A TIME)")
+    
+    store = get_store()
+    changes = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {executor.submit(read_nav_member, date.strftime("%d%m%Y"), URL_VARIATIONS): date for date in dates_to_process}
+        # Parse in this thread as downloads complete, so the store is only read here
+        for i, future in enumerate(concurrent.futures.as_completed(futures), 1):
+            date = futures[future]
+            date_str = date.strftime("%d%m%Y")
+            date_display = date.strftime('%d-%m-%Y (%A)')
+            
+            try:
+                member = future.result()
+            except Exception as e:
+                logger.log_error(f"Download failed for {date_display}", e)
+                member = None
+            if not member:
+                logger.log(f"[{i}/{len(dates_to_process)}] No data available for {date_display}")
+                dates_no_data.append(date_display)
+                continue
+            
+            file_name, content = member
+            nav_data = parse_out_file(file_name, content)
+            if not nav_data:
+                save_problematic_file(file_name, date_str, content)
+                dates_found_but_failed_update.append(date_display)
+                logger.log_error(f"Data downloaded for {date_display} but no valid entries found in parsed file")
+                continue
+            
+            added = merge_nav_data(changes, nav_data, store)
+            if added:
+                dates_successfully_updated.append(date_display)
+                logger.log(f"[{i}/{len(dates_to_process)}] {date_display}: {added} new entries from {len(nav_data)} parsed")
+            else:
+                dates_found_but_failed_update.append(date_display)
+                logger.log_error(f"Data found for {date_display} but every entry is already stored")
+    
+    changes = {code: points for code, points in changes.items() if points}
+    logger.log_section(f"WRITING {len(changes)} FUND SERIES")
+    writer = NavWriter(store)
+    for scheme_code, points in changes.items():
+        if store.get(scheme_code) is None:
+            logger.log(f"  Creating new series: {scheme_code}")
+        writer.add_points(scheme_code, points)
+    try:
+        writer.commit()
+    except Exception as e:
+        logger.log_error("Failed to write the merged change set", e)
+        dates_found_but_failed_update.extend(dates_successfully_updated)
+        return [], dates_no_data, dates_found_but_failed_update, 0
+    logger.log_success(f"Updated {len(changes)} fund files with {sum(len(p) for p in changes.values())} entries")
+    
+    # as_completed finishes dates in download order; report them most recent first like process_dates
+    order = {date.strftime('%d-%m-%Y (%A)'): n for n, date in enumerate(dates_to_process)}
+    for dates in (dates_successfully_updated, dates_no_data, dates_found_but_failed_update):
+        dates.sort(key=order.get)
+    
+    return dates_successfully_updated, dates_no_data, dates_found_but_failed_update, len(changes)
+
 def main():
    """Main function to process dates based on selected mode."""
    try:
@@ -743,7 +859,9 @@ def main():
            return
        
        # Process the dates
-       dates_successfully_updated, dates_no_data, dates_found_but_failed_update, total_updated_funds = process_dates(dates_to_process, mode_name)
+       logger.log(f"Parallel downloads: {'ON (' + str(MAX_WORKERS) + ' workers)' if PARALLEL else 'OFF'}")
+       process = process_dates_parallel if PARALLEL else process_dates
+       dates_successfully_updated, dates_no_data, dates_found_but_failed_update, total_updated_funds = process(dates_to_process, mode_name)
        
        # Final summary with numbers first, then dates
        logger.log_section("FINAL SUMMARY")
@@ -1,8 +1,10 @@
 import json
 import os
 import re
-from datetime import datetime, timedelta
+from datetime import datetime
 from jinja2 import Environment, FileSystemLoader
+from navstore import NavStore, NIFTY_CODE, ordinal_to_date
+from tasks import DEFAULT_JOBS, jobs_from_argv, run_per_scheme
 
 # Inline chart data covers this window; older data is lazy-fetched from the historical API on demand
 INLINE_WINDOW_DAYS = 370
@@ -55,109 +57,119 @@ def shorten_scheme_name(name):
 
     return " ".join(cleaned_name.split())
 
-# Load the templates
-env = Environment(loader=FileSystemLoader('src/templates'))
-
-# main.py runs earlier in the build and writes this cache after fetching from GitHub;
-# reuse it here instead of hitting the API again
-try:
-    with open('data/github_stars.json', 'r') as f:
-        env.globals['GITHUB_STARS'] = json.load(f)['count']
-except (FileNotFoundError, KeyError, ValueError):
-    env.globals['GITHUB_STARS'] = None
-
-template = env.get_template('funds.html')
-
-# Load the data.json file
-with open('data/data.json', 'r') as f:
-    funds_data = json.load(f)
-
-# Function to load Nifty data
-def load_nifty_data():
-    try:
-        with open('data/nifty.json', 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        print("Warning: nifty.json not found")
-        return {}
-
-# Load Nifty data once
-nifty_data = load_nifty_data()
-
 # Directory for generated HTML files
 output_dir = 'public/funds'
-os.makedirs(output_dir, exist_ok=True)
-
-# Loop through each fund in data.json
-for fund in funds_data:
-    scheme_code = fund['Scheme Code']
-    scheme_name = shorten_scheme_name(fund['Scheme Name']).upper()
-    pfm_name = fund['PFM Name']
-    current_nav = round(float(fund['NAV']), 2)
-    nav_date = format_display_date(fund['Date'])
-    
-    print(f"Processing fund: {scheme_name} (Scheme Code: {scheme_code})")
-    
-    # Load the individual fund JSON for historic NAVs
-    nav_file = f'data/{scheme_code}.json'
-    
-    # ADD THIS SAFETY CHECK
-    if not os.path.exists(nav_file):
-        print(f"Warning: {nav_file} not found. Skipping {scheme_name}")
-        continue
-    
-    with open(nav_file, 'r') as nav_f:
-        historical_navs = json.load(nav_f)
-
-    # Skip if historical data is empty
-    if not historical_navs:
-        print(f"Warning: No historical data for {scheme_name}. Skipping.")
-        continue
-
-    # True first/last dates require chronological (not lexicographic) comparison,
-    # since keys spanning multiple years don't sort correctly as mm/dd/yyyy strings
-    parsed_dates = {date: datetime.strptime(date, "%m/%d/%Y") for date in historical_navs}
-    first_date = min(parsed_dates, key=parsed_dates.get)
-    last_date = max(parsed_dates, key=parsed_dates.get)
-    cutoff = parsed_dates[last_date] - timedelta(days=INLINE_WINDOW_DAYS)
-
-    # Only inline a recent window for fast initial chart render; full history is
-    # fetched lazily from /api/historical/{scheme_code}.json for longer timeframes
-    nav_data = [
-        {"date": date, "nav": nav}
-        for date, nav in historical_navs.items()
-        if parsed_dates[date] >= cutoff
-    ]
 
-    nifty_nav_data = [
-        {"date": date, "nav": nav}
-        for date, nav in nifty_data.items()
-        if datetime.strptime(date, "%m/%d/%Y") >= cutoff
-    ]
-    
-    rendered_html = template.render(
-        scheme_name=scheme_name,
-        pfm_name=pfm_name,
-        current_nav=current_nav,
-        nav_date=nav_date,
-        nav_data=nav_data,
-        nifty_data=nifty_nav_data,  # Added Nifty data
-        returns={
-            "1M": fund["1M"],
-            "3M": fund["3M"],
-            "6M": fund["6M"],
-            "1Y": fund["1Y"],
-            "3Y": fund["3Y"],
-            "5Y": fund["5Y"]
-        },
-        first_date=first_date,
-        last_date=last_date,
-        scheme_code=scheme_code  # scheme_code for canonical
-    )
-    
-    # Write the rendered HTML to a file with UTF-8 encoding
-    output_path = os.path.join(output_dir, f'{scheme_code}.html')
-    with open(output_path, 'w', encoding='utf-8') as output_f:
-        output_f.write(rendered_html)
-
-print("Fund pages generated successfully.")
+# Template, data.json funds and NAV store, loaded once per (worker) process
+_context = None
+
+def get_context():
+    global _context
+    if _context is None:
+        # Load the templates
+        env = Environment(loader=FileSystemLoader('src/templates'))
+
+        # main.py runs earlier in the build and writes this cache after fetching from GitHub;
+        # reuse it here instead of hitting the API again
+        try:
+            with open('data/github_stars.json', 'r') as f:
+                env.globals['GITHUB_STARS'] = json.load(f)['count']
+        except (FileNotFoundError, KeyError, ValueError):
+            env.globals['GITHUB_STARS'] = None
+
+        # Load the data.json file, keyed by scheme code
+        with open('data/data.json', 'r') as f:
+            funds_by_code = {fund['Scheme Code']: fund for fund in json.load(f)}
+
+        # Load every NAV series (funds and Nifty) from the store in one read
+        _context = (env.get_template('funds.html'), funds_by_code, NavStore.load())
+    return _context
+
+def inline_window(series, cutoff):
+    """Chart points on or after the cutoff ordinal, newest first as in the JSON files."""
+    if series is None:
+        return []
+    return [{"date": date_str, "nav": nav} for date_str, nav in series.between(cutoff).items()]
+
+def render_fund_pages(scheme_codes):
+    """Render the pages of one shard of scheme codes; returns {code: log lines}."""
+    template, funds_by_code, store = get_context()
+    nifty_series = store.get(NIFTY_CODE)
+    logs = {}
+
+    for scheme_code in scheme_codes:
+        fund = funds_by_code[scheme_code]
+        scheme_name = shorten_scheme_name(fund['Scheme Name']).upper()
+        pfm_name = fund['PFM Name']
+        current_nav = round(float(fund['NAV']), 2)
+        nav_date = format_display_date(fund['Date'])
+        
+        log = logs[scheme_code] = [f"Processing fund: {scheme_name} (Scheme Code: {scheme_code})"]
+        
+        # Load the fund's historic NAVs from the store
+        series = store.get(scheme_code)
+        
+        if series is None:
+            log.append(f"Warning: no NAV history for {scheme_code}. Skipping {scheme_name}")
+            continue
+
+        # Skip if historical data is empty
+        if not len(series):
+            log.append(f"Warning: No historical data for {scheme_name}. Skipping.")
+            continue
+
+        # Series are sorted by date, so the true first/last dates are the array ends
+        first_ordinal, _ = series.first()
+        last_ordinal, _ = series.last()
+        first_date = ordinal_to_date(first_ordinal)
+        last_date = ordinal_to_date(last_ordinal)
+        cutoff = last_ordinal - INLINE_WINDOW_DAYS
+
+        # Only inline a recent window for fast initial chart render; full history is
+        # fetched lazily from /api/historical/{scheme_code}.json for longer timeframes
+        nav_data = inline_window(series, cutoff)
+        nifty_nav_data = inline_window(nifty_series, cutoff)
+        
+        rendered_html = template.render(
+            scheme_name=scheme_name,
+            pfm_name=pfm_name,
+            current_nav=current_nav,
+            nav_date=nav_date,
+            nav_data=nav_data,
+            nifty_data=nifty_nav_data,  # Added Nifty data
+            returns={
+                "1M": fund["1M"],
+                "3M": fund["3M"],
+                "6M": fund["6M"],
+                "1Y": fund["1Y"],
+                "3Y": fund["3Y"],
+                "5Y": fund["5Y"]
+            },
+            first_date=first_date,
+            last_date=last_date,
+            scheme_code=scheme_code  # scheme_code for canonical
+        )
+        
+        # Write the rendered HTML to a file with UTF-8 encoding
+        output_path = os.path.join(output_dir, f'{scheme_code}.html')
+        with open(output_path, 'w', encoding='utf-8') as output_f:
+            output_f.write(rendered_html)
+
+    return logs
+
+def generate_fund_pages(jobs=DEFAULT_JOBS):
+    """Render one page per fund in data.json, sharded across `jobs` processes."""
+    _, funds_by_code, store = get_context()
+    if store.get(NIFTY_CODE) is None:
+        print("Warning: nifty series not found in the NAV store")
+
+    os.makedirs(output_dir, exist_ok=True)
+    logs = run_per_scheme(render_fund_pages, list(funds_by_code), jobs)
+    for log in logs.values():
+        print("\n".join(log))
+
+    print("Fund pages generated successfully.")
+
+if __name__ == "__main__":
+    # `--jobs N`: number of worker processes (1 = serial)
+    generate_fund_pages(jobs_from_argv())
@@ -0,0 +1,152 @@
+"""
+Shared HTTP client for the fetch scripts.
+
+Every script fetches through one process-wide requests.Session (get_session(),
+or the get()/post() shortcuts), so connections are kept alive and reused per
+host instead of paying a new TCP + TLS handshake per request. The session
+is safe to share between the worker threads of backfill.py and protean.py.
+Each host's pool holds up to POOL_MAXSIZE connections.
+
+Transient failures are retried by urllib3 rather than by hand-written loops:
+connection errors, read errors and RETRY_STATUSES are retried up to
+RETRIES times. The backoff between attempts is exponential
+(BACKOFF_FACTOR * 2 ** n seconds) plus random jitter up to BACKOFF_JITTER.
+Only idempotent methods are retried, so POSTs are sent once. Once retries
+are exhausted on a retryable status, the last response is returned, so
+callers keep checking status_code as before. Callers that retry at a
+higher level (scheduler.py) pass retries=0 to get a session that fails fast. Every request gets a default
+timeout of DEFAULT_TIMEOUT seconds unless it passes its own.
+
+Each response is timed. add_timing_hook(fn) registers a callback
+fn(method, url, status, seconds), and log_timing_summary() logs request
+counts and latencies per host at the end of a run.
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+logger = logging.getLogger(__name__)
+
+# Configurable variables
+RETRIES = int(os.getenv('HTTP_RETRIES', '3'))  # Retries after the first attempt
+BACKOFF_FACTOR = 1.0  # Seconds; doubles with every retry
+BACKOFF_JITTER = 1.0  # Up to this many random seconds added to every backoff
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+DEFAULT_TIMEOUT = 30  # Seconds, unless the request passes its own timeout
+POOL_CONNECTIONS = 10  # Hosts whose connection pools are kept
+POOL_MAXSIZE = 16  # Keep-alive connections per host (>= the largest worker pool)
+
+_sessions = {}  # retries -> session
+_session_lock = threading.Lock()
+_timing_hooks = []
+_timings = defaultdict(list)  # host -> [seconds]
+_timings_lock = threading.Lock()
+
+
+def make_retry(retries=RETRIES):
+    """The urllib3 retry policy used by the shared session."""
+    return Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=BACKOFF_FACTOR,
+        backoff_jitter=BACKOFF_JITTER,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies DEFAULT_TIMEOUT when a request does not set one."""
+
+    def send(self, request, timeout=None, **kwargs):
+        return super().send(request, timeout=DEFAULT_TIMEOUT if timeout is None else timeout, **kwargs)
+
+
+def add_timing_hook(hook):
+    """Call hook(method, url, status, seconds) after every response."""
+    _timing_hooks.append(hook)
+
+
+def _record_timing(response, *args, **kwargs):
+    seconds = response.elapsed.total_seconds()
+    with _timings_lock:
+        _timings[urlsplit(response.url).netloc].append(seconds)
+    logger.debug(f"{response.request.method} {response.url} -> {response.status_code} in {seconds:.2f}s")
+    for hook in _timing_hooks:
+        hook(response.request.method, response.url, response.status_code, seconds)
+
+
+def timing_summary():
+    """{host: {"requests", "total", "mean", "max"}} of the responses seen so far (seconds)."""
+    with _timings_lock:
+        return {
+            host: {
+                'requests': len(times),
+                'total': round(sum(times), 3),
+                'mean': round(sum(times) / len(times), 3),
+                'max': round(max(times), 3),
+            }
+            for host, times in _timings.items() if times
+        }
+
+
+def log_timing_summary(log=logger):
+    for host, stats in sorted(timing_summary().items()):
+        log.info(f"HTTP {host}: {stats['requests']} requests, {stats['total']:.1f}s total, "
+                 f"{stats['mean']:.2f}s mean, {stats['max']:.2f}s max")
+
+
+def new_session(retries=RETRIES):
+    """A session with the shared pooling, retry, timeout and timing setup."""
+    session = requests.Session()
+    adapter = TimeoutHTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE,
+                                 max_retries=make_retry(retries))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.hooks['response'].append(_record_timing)
+    return session
+
+
+def get_session(retries=RETRIES):
+    """The process-wide shared session (one per retry count)."""
+    if retries not in _sessions:
+        with _session_lock:
+            if retries not in _sessions:
+                _sessions[retries] = new_session(retries)
+    return _sessions[retries]
+
+
+def get(url, retries=RETRIES, **kwargs):
+    return get_session(retries).get(url, **kwargs)
+
+
+def post(url, retries=RETRIES, **kwargs):
+    return get_session(retries).post(url, **kwargs)
+
+
+if __name__ == "__main__":
+    # `python scripts/http_client.py URL [N]`: fetch URL N times and show connection reuse and timings
+    import sys
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    url, count = sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    started = time.perf_counter()
+    for _ in range(count):
+        response = get(url, verify=False)
+        logger.info(f"{response.status_code} {len(response.content)} bytes")
+    logger.info(f"{count} requests in {time.perf_counter() - started:.2f}s")
+    log_timing_summary()
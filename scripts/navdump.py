@@ -0,0 +1,123 @@
+"""
+DumpSnapshot: one download of the NPS Trust full NAV dump, parsed once.
+
+The dump (DISCOVERY_URL, a TSV with one row per live scheme) feeds three
+consumers: the scheme-list sync and the cross-validation source in fetch.py,
+and fund discovery in discover_new_funds.py. A run fetches it once with
+DumpSnapshot.fetch() and hands the snapshot to each of them. The download
+goes through the download cache (revalidated with the upstream validators),
+is parsed as a stream from disk (navparse.iter_dump_rows, no pandas) and
+indexed by scheme code. Every consumer reads its own view of the same rows:
+
+    snapshot.schemes()            {code: {name, pfm_name, nav, date}}  raw dump values (sync)
+    snapshot.nav_records()        {code: {nav, date, pfm_name, scheme_name}}  MM/DD/YYYY, valid NAVs only
+    snapshot.fund_combinations()  [{PFM Code, PFM Name, Scheme Code, Scheme Name}]  (discovery)
+"""
+
+import hashlib
+import logging
+from io import BytesIO
+from datetime import datetime
+
+import download_cache
+from navparse import iter_dump_rows
+
+logger = logging.getLogger(__name__)
+
+DATE_FORMAT = '%m/%d/%Y'
+DISCOVERY_URL = "https://npstrust.org.in/nav-report-excel"
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Referer': 'https://npstrust.org.in/',
+}
+
+
+def _nav_text(nav):
+    """NAV as the dump's float value printed back (the form the scripts have always stored)."""
+    return '' if nav is None else str(nav)
+
+
+class DumpSnapshot:
+    """The parsed full NAV dump: {scheme_code: {name, pfm_name, nav, date}} plus fetch time and content hash."""
+
+    def __init__(self, rows, fetched_at=None, sha256=None):
+        self.rows = rows
+        self.fetched_at = fetched_at or datetime.now()
+        self.sha256 = sha256  # Of the raw dump, to tell whether upstream changed between runs
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, code):
+        return code in self.rows
+
+    def get(self, code):
+        return self.rows.get(code)
+
+    @classmethod
+    def parse(cls, content):
+        """Parse the dump's bytes (TSV) into a snapshot."""
+        return cls.parse_stream(BytesIO(content), sha256=hashlib.sha256(content).hexdigest())
+
+    @classmethod
+    def parse_stream(cls, source, sha256=None):
+        """Parse the dump row by row from a binary stream or an iterable of byte chunks."""
+        rows = {}
+        for row in iter_dump_rows(source):
+            rows[row.scheme_code] = {'name': row.scheme_name, 'pfm_name': row.pfm_name,
+                                     'nav': _nav_text(row.nav), 'date': row.date}
+        return cls(rows, sha256=sha256)
+
+    @classmethod
+    def fetch(cls, url=DISCOVERY_URL):
+        """Download (or revalidate the cached copy of) the dump and parse it; None if unavailable or unreadable.
+
+        A cached copy is never served in place of an unreachable upstream: its hash would
+        make fetch.py read an outage as "upstream unchanged".
+        """
+        try:
+            download = download_cache.fetch(url, headers=HEADERS, min_size=100, verify=False, timeout=30)
+            if not download.ok:
+                logger.warning(f"Full dump unavailable (status={download.status_code})")
+                return None
+            with download.open() as f:
+                snapshot = cls.parse_stream(f, sha256=download.sha256)
+        except Exception as e:
+            logger.warning(f"Could not fetch full dump: {e}")
+            return None
+        if not len(snapshot):
+            logger.warning("Full dump unavailable (no scheme rows)")
+            return None
+        logger.info(f"Full dump: {len(snapshot)} schemes ({download.source})")
+        return snapshot
+
+    def schemes(self):
+        """{code: {name, pfm_name, nav, date}} with the dump's values (date as YYYY-MM-DD)."""
+        return self.rows
+
+    def nav_records(self):
+        """{code: {nav, date, pfm_name, scheme_name}} for rows with a valid NAV and date (date as MM/DD/YYYY)."""
+        records = {}
+        for code, row in self.rows.items():
+            if not row['nav']:
+                continue
+            try:
+                nav = str(float(row['nav']))
+                date_str = datetime.strptime(row['date'], '%Y-%m-%d').strftime(DATE_FORMAT)
+            except ValueError:
+                continue
+            records[code] = {'nav': nav, 'date': date_str, 'pfm_name': row['pfm_name'], 'scheme_name': row['name']}
+        return records
+
+    def fund_combinations(self):
+        """[{PFM Code, PFM Name, Scheme Code, Scheme Name}] of every scheme with a PFM derivable from its code."""
+        funds = []
+        for code, row in self.rows.items():
+            if code.startswith('SM') and len(code) >= 6 and row['pfm_name'] and row['name']:
+                funds.append({
+                    'PFM Code': f"PFM{code[2:5]}",  # SM001001 -> PFM001
+                    'PFM Name': row['pfm_name'],
+                    'Scheme Code': code,
+                    'Scheme Name': row['name'],
+                })
+        return funds
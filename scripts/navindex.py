@@ -0,0 +1,146 @@
+"""
+Per-series metadata index for the NAV store.
+
+data/navindex.json keeps, for every series in data/navstore.bin:
+    first   first stored date (MM/DD/YYYY)
+    last    last stored date (MM/DD/YYYY)
+    count   number of stored points
+    hash    SHA-1 of the series content (dates, NAVs and published strings)
+    run     ID of the run that last changed the series
+
+NavWriter updates the entries of the series it commits, so questions like
+"what is the latest stored date?" or "does this scheme have any history?"
+can be answered from a small JSON file without loading the whole store.
+The index also records the content digest of the store it describes (see
+store_digest() in navstore.py); load_index() refreshes it from the store when
+it is missing or the digest no longer matches (e.g. after a manual
+navstore.py rebuild that changed a NAV). Entries whose hash is unchanged keep
+their run ID.
+
+Usage:
+    python scripts/navindex.py   # rebuild data/navindex.json from the store
+"""
+
+import os
+import json
+import hashlib
+from datetime import datetime
+
+from navstore import NavStore, DATA_DIR, STORE_FILE, date_to_ordinal, ordinal_to_date, write_atomic, store_digest, \
+    json_changed_since_store
+
+INDEX_FILE = os.path.join(DATA_DIR, 'navindex.json')
+
+
+def current_run_id():
+    """ID recorded against changed series: the GitHub Actions run, or a local timestamp."""
+    return os.getenv('GITHUB_RUN_ID') or datetime.now().strftime('local-%Y%m%dT%H%M%S')
+
+
+def series_hash(series):
+    """SHA-1 over a series' dates, NAV values, decimals and verbatim strings."""
+    digest = hashlib.sha1()
+    digest.update(series.ordinals.astype('<i4').tobytes())
+    digest.update(series.navs.astype('<f8').tobytes())
+    digest.update(series.decimals.astype('u1').tobytes())
+    for ordinal, text in sorted(series.overrides.items()):
+        digest.update(f"{ordinal}={text};".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def series_entry(series, run_id):
+    """Index entry for one series."""
+    if not len(series):
+        return {'first': None, 'last': None, 'count': 0, 'hash': series_hash(series), 'run': run_id}
+    return {
+        'first': ordinal_to_date(series.ordinals[0]),
+        'last': ordinal_to_date(series.ordinals[-1]),
+        'count': len(series),
+        'hash': series_hash(series),
+        'run': run_id,
+    }
+
+
+class NavIndex:
+    """{code: entry} metadata for every stored series."""
+
+    def __init__(self, entries=None, path=INDEX_FILE, store_digest=None):
+        self.entries = entries if entries is not None else {}
+        self.path = path
+        self.store_digest = store_digest
+
+    def __contains__(self, code):
+        return code in self.entries
+
+    def get(self, code):
+        return self.entries.get(code)
+
+    def scheme_codes(self):
+        return sorted(code for code in self.entries if code.startswith('SM'))
+
+    def last_date(self, codes=None):
+        """Latest stored date (datetime) across the given series (default: all schemes)."""
+        lasts = [date_to_ordinal(self.entries[code]['last'])
+                 for code in (codes if codes is not None else self.scheme_codes())
+                 if code in self.entries and self.entries[code]['last']]
+        return datetime.fromordinal(max(lasts)) if lasts else None
+
+    def update(self, store, codes, run_id=None):
+        """Refresh the entries of the given series from the store; returns the codes whose hash changed."""
+        run_id = run_id or current_run_id()
+        changed = []
+        for code in codes:
+            series = store.get(code)
+            if series is None:
+                self.entries.pop(code, None)
+                continue
+            old = self.entries.get(code)
+            entry = series_entry(series, run_id)
+            if old is not None and old['hash'] == entry['hash']:
+                continue
+            self.entries[code] = entry
+            changed.append(code)
+        return changed
+
+    def sync(self, store, run_id=None):
+        """Bring every entry in line with the store (drops series that no longer exist)."""
+        for code in [code for code in self.entries if code not in store]:
+            del self.entries[code]
+        changed = self.update(store, store.codes(), run_id)
+        self.store_digest = store.digest
+        return changed
+
+    @classmethod
+    def load(cls, path=INDEX_FILE):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        return cls(data['series'], path=path, store_digest=data.get('store_digest'))
+
+    def save(self, path=None):
+        data = {'store_digest': self.store_digest, 'series': dict(sorted(self.entries.items()))}
+        write_atomic(path or self.path, json.dumps(data, indent=4))
+
+
+def load_index(path=INDEX_FILE, store_path=STORE_FILE, store=None):
+    """Load the index, refreshing it from the store if it is missing or stale.
+
+    A store older than the JSON files (hand edits, a pull) is reloaded first, so its
+    digest, and with it this check, reflects the JSON content.
+    """
+    data_dir = os.path.dirname(store_path)
+    index = NavIndex.load(path) if os.path.exists(path) else NavIndex(path=path)
+    if store is None and json_changed_since_store(store_path, data_dir):
+        store = NavStore.load(store_path, data_dir)
+    digest = store.digest if store is not None else store_digest(store_path)
+    if index.store_digest is not None and digest == index.store_digest:
+        return index
+    index.sync(store if store is not None else NavStore.load(store_path, data_dir))
+    index.save()
+    return index
+
+
+if __name__ == "__main__":
+    index = NavIndex.load() if os.path.exists(INDEX_FILE) else NavIndex()
+    index.sync(NavStore.load())
+    index.save()
+    print(f"Rebuilt {INDEX_FILE} for {len(index.entries)} series")
@@ -0,0 +1,171 @@
+"""
+Memory-mapped schemes x trading-days NAV matrix.
+
+data/navmatrix.bin holds every series of the NAV store (see navstore.py) as
+one row of a float64 matrix with one column per trading day (the union of
+all stored dates) and NaN where a series has no NAV. A small header carries
+the row codes and the date axis, so cross-scheme work (returns for every
+fund as of a date, correlations, ...) is a slice over shared pages instead of
+one lookup per series. Opening it with np.memmap lets several processes share
+the same pages without copying.
+
+The matrix is derived data: fetch.py regenerates it at the end of every run,
+and load_matrix() rebuilds it whenever it is missing or older than the store
+(after reloading a store that is older than the JSON files).
+
+Usage:
+    python scripts/navmatrix.py   # rebuild data/navmatrix.bin from the store
+"""
+
+import os
+import json
+import struct
+
+import numpy as np
+
+from navstore import NavStore, STORE_FILE, DATA_DIR, json_changed_since_store
+
+MATRIX_FILE = os.path.join(DATA_DIR, 'navmatrix.bin')
+
+MAGIC = b'NPSMTX01'
+MATRIX_VERSION = 1
+
+
+def build_matrix(store, path=MATRIX_FILE):
+    """Write the NAV matrix for every series in the store (atomically)."""
+    codes = store.codes()
+    series_list = [store.get(code) for code in codes]
+    non_empty = [s.ordinals for s in series_list if len(s)]
+    axis = np.unique(np.concatenate(non_empty)).astype(np.int32) if non_empty else np.empty(0, dtype=np.int32)
+
+    header = json.dumps({'version': MATRIX_VERSION, 'codes': codes, 'days': len(axis)},
+                        separators=(',', ':')).encode('utf-8')
+    # Pad so the date axis + matrix start on an 8-byte boundary
+    header += b' ' * (-(12 + len(header)) % 8)
+    axis_bytes = axis.astype('<i4').tobytes()
+    axis_bytes += b'\0' * (-len(axis_bytes) % 8)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header)))
+        f.write(header)
+        f.write(axis_bytes)
+        for series in series_list:
+            row = np.full(len(axis), np.nan, dtype='<f8')
+            if len(series):
+                row[np.searchsorted(axis, series.ordinals)] = series.navs
+            f.write(row.tobytes())
+    os.replace(tmp_path, path)
+    return len(codes), len(axis)
+
+
+class NavMatrix:
+    """Read-only, memory-mapped view of data/navmatrix.bin."""
+
+    def __init__(self, path=MATRIX_FILE):
+        with open(path, 'rb') as f:
+            prefix = f.read(12)
+            if prefix[:8] != MAGIC:
+                raise ValueError(f"{path} is not a NAV matrix file")
+            (header_len,) = struct.unpack_from('<I', prefix, 8)
+            header = json.loads(f.read(header_len))
+        if header['version'] != MATRIX_VERSION:
+            raise ValueError(f"Unsupported NAV matrix version {header['version']} in {path}")
+
+        self.path = path
+        self.codes = header['codes']
+        self.row_index = {code: i for i, code in enumerate(self.codes)}
+        days = header['days']
+        axis_offset = 12 + header_len
+        self.ordinals = np.memmap(path, dtype='<i4', mode='r', offset=axis_offset, shape=(days,))
+        matrix_offset = axis_offset + days * 4 + (-(days * 4) % 8)
+        self.values = np.memmap(path, dtype='<f8', mode='r', offset=matrix_offset,
+                                shape=(len(self.codes), days))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def rows(self, codes):
+        """Row indices for the given codes (unknown codes are skipped)."""
+        return [self.row_index[code] for code in codes if code in self.row_index]
+
+    def row(self, code):
+        """(ordinals, navs) of one series with the NaN gaps removed."""
+        values = np.asarray(self.values[self.row_index[code]])
+        present = ~np.isnan(values)
+        return np.asarray(self.ordinals)[present], values[present]
+
+    def column(self, ordinal):
+        """Index of the last trading day on or before ordinal (-1 if before the axis)."""
+        return int(np.searchsorted(self.ordinals, ordinal, side='right')) - 1
+
+    def asof(self, ordinal, rows=None):
+        """(ordinals, navs) of every row's last NAV on or before ordinal.
+
+        Rows with no NAV up to that date get ordinal 0 and NaN.
+        """
+        end = self.column(ordinal) + 1
+        block = self.values[:, :end] if rows is None else self.values[rows, :end]
+        block = np.asarray(block)
+        if end == 0:
+            return np.zeros(len(block), dtype=np.int32), np.full(len(block), np.nan)
+        present = ~np.isnan(block)
+        last = end - 1 - np.argmax(present[:, ::-1], axis=1)
+        has_value = present.any(axis=1)
+        navs = np.where(has_value, block[np.arange(len(block)), last], np.nan)
+        dates = np.where(has_value, np.asarray(self.ordinals)[last], 0).astype(np.int32)
+        return dates, navs
+
+    def returns(self, start_ordinal, end_ordinal, rows=None):
+        """Simple return of every row between its as-of NAVs at the two dates."""
+        _, start_navs = self.asof(start_ordinal, rows)
+        _, end_navs = self.asof(end_ordinal, rows)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return end_navs / start_navs - 1
+
+    def window(self, start_ordinal, end_ordinal, rows=None):
+        """(ordinals, values) sub-matrix for the trading days in [start, end]."""
+        lo = int(np.searchsorted(self.ordinals, start_ordinal, side='left'))
+        hi = int(np.searchsorted(self.ordinals, end_ordinal, side='right'))
+        block = self.values[:, lo:hi] if rows is None else self.values[rows, lo:hi]
+        return np.asarray(self.ordinals[lo:hi]), np.asarray(block)
+
+    def correlations(self, start_ordinal, end_ordinal, rows=None):
+        """Correlation matrix of daily returns over [start, end].
+
+        Gaps are forward-filled within the window; rows without a complete
+        window of returns come out as NaN.
+        """
+        _, block = self.window(start_ordinal, end_ordinal, rows)
+        filled = forward_fill(block)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            daily = filled[:, 1:] / filled[:, :-1] - 1
+            return np.corrcoef(daily)
+
+
+def forward_fill(block):
+    """Carry the last non-NaN value of each row forward along the columns."""
+    present = ~np.isnan(block)
+    idx = np.where(present, np.arange(block.shape[1]), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    filled = block[np.arange(block.shape[0])[:, None], idx]
+    # Leading gaps (before the first value) stay NaN
+    filled[~np.maximum.accumulate(present, axis=1)] = np.nan
+    return filled
+
+
+def load_matrix(path=MATRIX_FILE, store_path=STORE_FILE):
+    """Open the NAV matrix, rebuilding it first if it is missing or stale."""
+    data_dir = os.path.dirname(store_path)
+    if json_changed_since_store(store_path, data_dir):
+        NavStore.load(store_path, data_dir)  # Folds JSON edits in and saves a newer store
+    if not os.path.exists(path) or (
+            os.path.exists(store_path) and os.path.getmtime(store_path) > os.path.getmtime(path)):
+        build_matrix(NavStore.load(store_path, data_dir), path)
+    return NavMatrix(path)
+
+
+if __name__ == "__main__":
+    rows, days = build_matrix(NavStore.load())
+    print(f"Built {MATRIX_FILE}: {rows} series x {days} trading days")
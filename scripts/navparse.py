@@ -0,0 +1,108 @@
+"""
+Streaming parsers for the daily NAV sources, built on the csv module.
+
+    iter_dump_rows(source)      NPS Trust full dump (TSV with a header row) -> DumpRow
+    iter_protean_rows(source)   Protean .out file (headerless CSV)         -> ProteanRow
+    read_protean_zip(content)   Protean rows read straight from the ZIP's .out member
+
+A source is a binary file object (a ZIP member, an open file) or an iterable
+of byte chunks (response.iter_content()). It is decoded incrementally and
+parsed one row at a time, so no copy of the whole text and no list of lines
+is ever built, and pandas is not needed. Records are small named tuples with the NAV already a float
+(None when it is missing or unparsable). The dump's column positions are
+looked up by name once per distinct header (column_positions is cached on
+the header tuple), so reordered or extra columns keep working.
+"""
+
+import io
+import csv
+import codecs
+import zipfile
+from collections import namedtuple
+from functools import lru_cache
+
+DumpRow = namedtuple('DumpRow', 'scheme_code scheme_name pfm_name nav date')
+ProteanRow = namedtuple('ProteanRow', 'date pfm_code pfm_name scheme_code scheme_name nav')
+
+# Dump header name -> DumpRow field
+DUMP_COLUMNS = {
+    'SCHEME ID': 'scheme_code',
+    'SCHEME NAME': 'scheme_name',
+    'PFM NAME': 'pfm_name',
+    'NAV VALUE': 'nav',
+    'DATE OF NAV': 'date',
+}
+PROTEAN_COLUMNS = 6  # date, PFM code, PFM name, scheme code, scheme name, NAV
+
+
+def _lines(source):
+    """Incrementally decoded lines of a binary stream or an iterable of byte chunks."""
+    if hasattr(source, 'read'):
+        yield from io.TextIOWrapper(source, encoding='utf-8', errors='ignore', newline='')
+        return
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+    pending = ''
+    for chunk in source:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split('\n')
+        for line in lines:
+            yield line + '\n'
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+
+def _float(text):
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=16)
+def column_positions(header):
+    """Position of every DumpRow field in a header tuple (None for a missing column)."""
+    names = [name.strip().upper() for name in header]
+    return tuple(names.index(column) if column in names else None for column in DUMP_COLUMNS)
+
+
+def iter_dump_rows(source):
+    """Yield a DumpRow for every row of the dump that has a scheme code."""
+    reader = csv.reader(_lines(source), delimiter='\t')
+    header = next(reader, None)
+    if header is None:
+        return
+    code_pos, name_pos, pfm_pos, nav_pos, date_pos = column_positions(tuple(header))
+    if code_pos is None:
+        raise ValueError(f"Dump header has no SCHEME ID column: {header}")
+
+    def field(row, pos):
+        return row[pos].strip() if pos is not None and pos < len(row) else ''
+
+    for row in reader:
+        code = field(row, code_pos)
+        if not code:
+            continue
+        nav = field(row, nav_pos)
+        yield DumpRow(code, field(row, name_pos), field(row, pfm_pos), _float(nav) if nav else None,
+                      field(row, date_pos))
+
+
+def iter_protean_rows(source):
+    """Yield a ProteanRow for every well-formed line of a Protean .out file (dates stay MM/DD/YYYY)."""
+    # QUOTE_NONE: a stray '"' in a scheme name stays in that field instead of swallowing the next lines
+    for row in csv.reader(_lines(source), quoting=csv.QUOTE_NONE):
+        if len(row) != PROTEAN_COLUMNS:
+            continue
+        nav = _float(row[5].strip())
+        if nav is None:
+            continue
+        yield ProteanRow(row[0].strip(), row[1].strip(), row[2].strip(), row[3].strip(), row[4].strip(), nav)
+
+
+def read_protean_zip(content):
+    """Yield the ProteanRows of the .out member of a Protean ZIP (bytes)."""
+    with zipfile.ZipFile(io.BytesIO(content)) as z:
+        out_file = next(f for f in z.namelist() if f.endswith('.out'))
+        with z.open(out_file) as member:
+            yield from iter_protean_rows(member)
@@ -0,0 +1,231 @@
+"""
+NavSeries: one sorted, array-backed NAV series.
+
+Dates are held as int32 day ordinals (date.toordinal()) in ascending order,
+next to the float64 NAVs and the number of decimals of each published NAV
+string, so every date lookup is a binary search instead of a scan over a
+dict keyed by date strings:
+
+    series.asof('03/31/2024')       # (ordinal, nav) of the last NAV on or before
+    series.between(a, b)            # sub-series for a <= date <= b (array views)
+    series.resample('M')            # last NAV of every month
+    series.pct_change(1)            # (ordinals, returns) between observations
+
+Dates may be given as MM/DD/YYYY strings, date/datetime objects or ordinals.
+This is the series type the NAV store (navstore.py) hands out.
+"""
+
+from collections import OrderedDict
+from datetime import date, datetime
+from functools import lru_cache
+
+import numpy as np
+
+DATE_FORMAT = '%m/%d/%Y'
+
+# Day ordinal of 1970-01-01, for converting ordinals to numpy datetime64[D]
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_RESAMPLE_UNITS = {'W': None, 'M': 'M', 'Q': 'M', 'Y': 'Y'}
+
+
+def date_to_ordinal(date_str):
+    """Convert a stored MM/DD/YYYY date string to a day ordinal."""
+    if len(date_str) == 10:
+        return date(int(date_str[6:10]), int(date_str[0:2]), int(date_str[3:5])).toordinal()
+    return datetime.strptime(date_str, DATE_FORMAT).toordinal()
+
+
+@lru_cache(maxsize=None)
+def ordinal_to_date(ordinal):
+    """Convert a day ordinal back to the stored MM/DD/YYYY date string."""
+    d = date.fromordinal(int(ordinal))
+    return f"{d.month:02d}/{d.day:02d}/{d.year}"
+
+
+@lru_cache(maxsize=None)
+def ordinal_to_display_date(ordinal):
+    """Convert a day ordinal to the DD-MM-YYYY format used by the public API."""
+    d = date.fromordinal(int(ordinal))
+    return f"{d.day:02d}-{d.month:02d}-{d.year}"
+
+
+def to_ordinal(when):
+    """Day ordinal for a MM/DD/YYYY string, a date/datetime or an ordinal."""
+    if isinstance(when, str):
+        return date_to_ordinal(when)
+    if isinstance(when, (date, datetime)):
+        return when.toordinal()
+    return int(when)
+
+
+def shift_months(ordinals, months):
+    """Vectorised date + relativedelta(months=months) on day ordinals.
+
+    Like relativedelta, a day that does not exist in the target month is clipped
+    to its last day (e.g. 03/31 - 1 month = 02/28 or 02/29).
+    """
+    days = (np.asarray(ordinals, dtype=np.int64) - _EPOCH_ORDINAL).astype('datetime64[D]')
+    month_start = days.astype('datetime64[M]')
+    day_of_month = (days - month_start.astype('datetime64[D]')).astype(np.int64)
+    target_month = month_start + months
+    month_length = ((target_month + 1).astype('datetime64[D]') - target_month.astype('datetime64[D]')).astype(np.int64)
+    target = target_month.astype('datetime64[D]') + np.minimum(day_of_month, month_length - 1)
+    return target.astype(np.int64) + _EPOCH_ORDINAL
+
+
+def parse_nav(text):
+    """Split a published NAV string into (value, decimals, verbatim_text_or_None)."""
+    value = float(text)
+    decimals = len(text) - text.index('.') - 1 if '.' in text else 0
+    if decimals > 255 or format_nav(value, decimals) != text:
+        return value, min(decimals, 255), text
+    return value, decimals, None
+
+
+def format_nav(value, decimals):
+    """Format a NAV value back to its published string."""
+    return f"{value:.{decimals}f}"
+
+
+class NavSeries:
+    """One NAV series: parallel arrays sorted by ascending date."""
+
+    __slots__ = ('ordinals', 'navs', 'decimals', 'overrides')
+
+    def __init__(self, ordinals, navs, decimals, overrides=None):
+        self.ordinals = ordinals
+        self.navs = navs
+        self.decimals = decimals
+        self.overrides = overrides or {}
+
+    def __len__(self):
+        return len(self.ordinals)
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float64), np.empty(0, dtype=np.uint8))
+
+    @classmethod
+    def from_dict(cls, nav_dict):
+        """Build a series from a {"MM/DD/YYYY": "nav"} mapping (any order)."""
+        n = len(nav_dict)
+        ordinals = np.empty(n, dtype=np.int32)
+        navs = np.empty(n, dtype=np.float64)
+        decimals = np.empty(n, dtype=np.uint8)
+        overrides = {}
+        for i, (date_str, nav_text) in enumerate(nav_dict.items()):
+            nav_text = str(nav_text)
+            ordinal = date_to_ordinal(date_str)
+            value, dec, verbatim = parse_nav(nav_text)
+            ordinals[i] = ordinal
+            navs[i] = value
+            decimals[i] = dec
+            if verbatim is not None:
+                overrides[ordinal] = verbatim
+        order = np.argsort(ordinals, kind='stable')
+        return cls(ordinals[order], navs[order], decimals[order], overrides)
+
+    def _slice(self, start, stop):
+        """Sub-series over positions [start, stop) sharing the arrays."""
+        ordinals = self.ordinals[start:stop]
+        overrides = self.overrides
+        if overrides and len(ordinals):
+            lo, hi = int(ordinals[0]), int(ordinals[-1])
+            overrides = {o: t for o, t in overrides.items() if lo <= o <= hi}
+        return NavSeries(ordinals, self.navs[start:stop], self.decimals[start:stop], overrides)
+
+    # ---------------------------------------------------------
+    # Point access
+    # ---------------------------------------------------------
+
+    def nav_text(self, i):
+        """Published NAV string for position i."""
+        ordinal = int(self.ordinals[i])
+        if ordinal in self.overrides:
+            return self.overrides[ordinal]
+        return format_nav(float(self.navs[i]), int(self.decimals[i]))
+
+    def get(self, date_str, default=None):
+        """Published NAV string stored for exactly date_str, or default."""
+        ordinal = to_ordinal(date_str)
+        i = int(np.searchsorted(self.ordinals, ordinal))
+        if i < len(self.ordinals) and self.ordinals[i] == ordinal:
+            return self.nav_text(i)
+        return default
+
+    def first(self):
+        """(ordinal, nav) of the oldest point, or None if empty."""
+        return (int(self.ordinals[0]), float(self.navs[0])) if len(self) else None
+
+    def last(self):
+        """(ordinal, nav) of the newest point, or None if empty."""
+        return (int(self.ordinals[-1]), float(self.navs[-1])) if len(self) else None
+
+    def asof_index(self, when):
+        """Position of the last point on or before when, or -1."""
+        return int(np.searchsorted(self.ordinals, to_ordinal(when), side='right')) - 1
+
+    def asof(self, when):
+        """(ordinal, nav) of the last point on or before when, or None."""
+        i = self.asof_index(when)
+        return (int(self.ordinals[i]), float(self.navs[i])) if i >= 0 else None
+
+    def asof_many(self, ordinals):
+        """As-of NAVs for an array of ordinals (NaN where there is no earlier point)."""
+        pos = np.searchsorted(self.ordinals, ordinals, side='right') - 1
+        result = np.full(np.shape(pos), np.nan)
+        valid = pos >= 0
+        result[valid] = self.navs[pos[valid]]
+        return result
+
+    # ---------------------------------------------------------
+    # Ranges and derived series
+    # ---------------------------------------------------------
+
+    def between(self, start=None, end=None):
+        """Sub-series with start <= date <= end (either bound may be None)."""
+        lo = 0 if start is None else int(np.searchsorted(self.ordinals, to_ordinal(start), side='left'))
+        hi = len(self) if end is None else int(np.searchsorted(self.ordinals, to_ordinal(end), side='right'))
+        return self._slice(lo, max(lo, hi))
+
+    def period_keys(self, freq):
+        """Integer period label of every point for 'W', 'M', 'Q' or 'Y'."""
+        if freq not in _RESAMPLE_UNITS:
+            raise ValueError(f"Unsupported frequency {freq!r}; use 'W', 'M', 'Q' or 'Y'")
+        if freq == 'W':
+            # Monday-to-Sunday weeks: ordinal 1 (0001-01-01) was a Monday. numpy's
+            # datetime64[W] counts from 1970-01-01, a Thursday, so it is not used here.
+            return (self.ordinals.astype(np.int64) - 1) // 7
+        days = (self.ordinals.astype(np.int64) - _EPOCH_ORDINAL).astype('datetime64[D]')
+        keys = days.astype(f'datetime64[{_RESAMPLE_UNITS[freq]}]').astype(np.int64)
+        return keys // 3 if freq == 'Q' else keys
+
+    def resample(self, freq):
+        """Last point of every week/month/quarter/year ('W', 'M', 'Q', 'Y')."""
+        if not len(self):
+            return self
+        keys = self.period_keys(freq)
+        last = np.flatnonzero(np.append(keys[1:] != keys[:-1], True))
+        overrides = {int(self.ordinals[i]): self.overrides[int(self.ordinals[i])]
+                     for i in last if int(self.ordinals[i]) in self.overrides}
+        return NavSeries(self.ordinals[last], self.navs[last], self.decimals[last], overrides)
+
+    def pct_change(self, lag=1):
+        """(ordinals, returns) of navs[i] / navs[i - lag] - 1 over observations."""
+        if lag < 1 or len(self) <= lag:
+            return self.ordinals[:0], np.empty(0)
+        return self.ordinals[lag:], self.navs[lag:] / self.navs[:-lag] - 1
+
+    # ---------------------------------------------------------
+    # JSON layout
+    # ---------------------------------------------------------
+
+    def items(self):
+        """Yield (date_str, nav_text) pairs newest first, like the JSON files."""
+        for i in range(len(self.ordinals) - 1, -1, -1):
+            yield ordinal_to_date(self.ordinals[i]), self.nav_text(i)
+
+    def to_dict(self):
+        """Return the series in the original JSON layout (newest first)."""
+        return OrderedDict(self.items())
+
@@ -0,0 +1,361 @@
+"""
+Columnar binary store for every NAV series (one per scheme, plus Nifty).
+
+data/navstore.bin holds every historical NAV in one file that loads with a
+single read. Each series is a NavSeries (navseries.py): three parallel arrays
+sorted by date (oldest first):
+    ordinals  int32    proleptic Gregorian day numbers (date.toordinal())
+    navs      float64  NAV values
+    decimals  uint8    digits after the decimal point in the published string
+The few published strings that cannot be reproduced from (nav, decimals),
+e.g. "+0035.9220", are kept verbatim so the JSON export is byte-identical.
+
+The per-scheme data/{code}.json files, in the original layout
+("MM/DD/YYYY": "nav", newest first), are what is committed; the store is a
+local, gitignored cache of them. NavStore.load() builds it from the JSON files
+when it is missing (e.g. in a fresh CI checkout) and reloads every series whose
+JSON file is newer than the store, so hand edits and pulled commits are picked
+up before anything is written back. NavWriter writes the JSON exports before
+saving the store, so its own writes never look newer.
+
+Usage:
+    python scripts/navstore.py rebuild   # rebuild the store from data/*.json
+    python scripts/navstore.py export    # rewrite data/*.json from the store
+"""
+
+import os
+import sys
+import json
+import struct
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+# Date/NAV helpers are re-exported for the scripts that import them from here
+from navseries import (
+    NavSeries, DATE_FORMAT, date_to_ordinal, ordinal_to_date, ordinal_to_display_date,
+    parse_nav, format_nav,
+)
+
+DATA_DIR = 'data'
+STORE_FILE = os.path.join(DATA_DIR, 'navstore.bin')
+NIFTY_CODE = 'nifty'
+
+MAGIC = b'NPSNAV01'
+STORE_VERSION = 1
+
+
+class NavStore:
+    """All NAV series, keyed by scheme code (file stem of data/{code}.json)."""
+
+    def __init__(self, series=None, path=STORE_FILE, digest=None):
+        self.series = series if series is not None else {}
+        self.path = path
+        self.digest = digest  # Content digest of the store file as last loaded or saved
+
+    def __contains__(self, code):
+        return code in self.series
+
+    def __len__(self):
+        return len(self.series)
+
+    def codes(self):
+        return sorted(self.series)
+
+    def scheme_codes(self):
+        return [code for code in self.codes() if code.startswith('SM')]
+
+    def get(self, code):
+        return self.series.get(code)
+
+    def nav_on(self, code, date_str):
+        """Published NAV string for a series on date_str, or None."""
+        series = self.series.get(code)
+        return series.get(date_str) if series is not None else None
+
+    def to_dict(self, code):
+        """{"MM/DD/YYYY": "nav"} for a series, newest first; {} if unknown."""
+        series = self.series.get(code)
+        return series.to_dict() if series is not None else OrderedDict()
+
+    # ---------------------------------------------------------
+    # Loading / saving
+    # ---------------------------------------------------------
+
+    @classmethod
+    def load(cls, path=STORE_FILE, data_dir=DATA_DIR):
+        """Load the store with a single read; build it from the JSON files if missing, refresh it if they changed."""
+        if not os.path.exists(path):
+            store = cls.from_json_dir(data_dir, path=path)
+            store.save()
+            return store
+
+        with open(path, 'rb') as f:
+            buf = f.read()
+
+        if buf[:8] != MAGIC:
+            raise ValueError(f"{path} is not a NAV store file")
+        (header_len,) = struct.unpack_from('<I', buf, 8)
+        header = json.loads(buf[12:12 + header_len])
+        if header['version'] != STORE_VERSION:
+            raise ValueError(f"Unsupported NAV store version {header['version']} in {path}")
+
+        total = header['count']
+        base = 12 + header_len
+        navs = np.frombuffer(buf, dtype='<f8', count=total, offset=base)
+        ordinals = np.frombuffer(buf, dtype='<i4', count=total, offset=base + 8 * total)
+        decimals = np.frombuffer(buf, dtype='u1', count=total, offset=base + 12 * total)
+
+        series = {}
+        for code, start, length, overrides in header['series']:
+            end = start + length
+            series[code] = NavSeries(
+                ordinals[start:end], navs[start:end], decimals[start:end],
+                {int(ordinal): text for ordinal, text in overrides},
+            )
+        store = cls(series, path=path, digest=header.get('digest'))
+        # A store written before stores carried a digest gets one here
+        if store.refresh_from_json(data_dir) or store.digest is None:
+            store.save()
+        return store
+
+    def refresh_from_json(self, data_dir=DATA_DIR):
+        """Reload the series whose data/{code}.json is newer than the store file, add new files and
+        drop series whose file is gone. Returns the codes that changed."""
+        stored_at = os.stat(self.path).st_mtime_ns
+        changed = []
+        reread = False
+        on_disk = set()
+        with os.scandir(data_dir) as entries:
+            for entry in entries:
+                code = _json_code(entry.name)
+                if code is None:
+                    continue
+                on_disk.add(code)
+                if code in self.series and entry.stat().st_mtime_ns <= stored_at:
+                    continue
+                reread = True
+                with open(entry.path, 'r') as f:
+                    series = NavSeries.from_dict(json.load(f))
+                current = self.series.get(code)
+                if current is None or not _same_series(current, series):
+                    self.series[code] = series
+                    changed.append(code)
+        for code in [code for code in self.series if code not in on_disk]:
+            del self.series[code]
+            changed.append(code)
+        if reread and not changed:
+            os.utime(self.path)  # Newer files with the same content; don't read them again next time
+        return sorted(changed)
+
+    @classmethod
+    def from_json_dir(cls, data_dir=DATA_DIR, path=STORE_FILE):
+        """Build a store from data/SM*.json and data/nifty.json."""
+        series = {}
+        for filename in sorted(os.listdir(data_dir)):
+            if not filename.endswith('.json'):
+                continue
+            code = filename[:-5]
+            if not (code.startswith('SM') or code == NIFTY_CODE):
+                continue
+            with open(os.path.join(data_dir, filename), 'r') as f:
+                series[code] = NavSeries.from_dict(json.load(f))
+        return cls(series, path=path)
+
+    def save(self, path=None):
+        """Write the store atomically (temp file + rename)."""
+        path = path or self.path
+        entries = []
+        start = 0
+        for code in self.codes():
+            s = self.series[code]
+            overrides = [[int(o), t] for o, t in sorted(s.overrides.items())]
+            entries.append([code, start, len(s), overrides])
+            start += len(s)
+
+        codes = self.codes()
+        navs = np.concatenate([self.series[c].navs for c in codes]) if codes else np.empty(0)
+        ordinals = np.concatenate([self.series[c].ordinals for c in codes]) if codes else np.empty(0)
+        decimals = np.concatenate([self.series[c].decimals for c in codes]) if codes else np.empty(0)
+
+        # SHA-1 of the series table and the three arrays: the same content always gives the same digest
+        digest = hashlib.sha1(json.dumps(entries, separators=(',', ':')).encode('utf-8'))
+        digest.update(navs.astype('<f8').tobytes())
+        digest.update(ordinals.astype('<i4').tobytes())
+        digest.update(decimals.astype('u1').tobytes())
+        self.digest = digest.hexdigest()
+
+        header = json.dumps({'version': STORE_VERSION, 'count': start, 'series': entries, 'digest': self.digest},
+                            separators=(',', ':')).encode('utf-8')
+        # Pad so the float64 block starts on an 8-byte boundary
+        header += b' ' * (-(12 + len(header)) % 8)
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack('<I', len(header)))
+            f.write(header)
+            f.write(navs.astype('<f8').tobytes())
+            f.write(ordinals.astype('<i4').tobytes())
+            f.write(decimals.astype('u1').tobytes())
+        os.replace(tmp_path, path)
+
+    # ---------------------------------------------------------
+    # Mutation
+    # ---------------------------------------------------------
+
+    def update(self, code, points):
+        """Merge {"MM/DD/YYYY": "nav"} points into a series (new values win).
+
+        Returns the number of points that were added or changed.
+        """
+        if not points:
+            return 0
+        new = NavSeries.from_dict(points)
+        current = self.series.get(code)
+        if current is None or not len(current):
+            self.series[code] = new
+            return len(new)
+
+        # Locate every new point with a binary search; no re-sort of the series
+        idx = np.searchsorted(current.ordinals, new.ordinals)
+        found = idx < len(current)
+        found[found] = current.ordinals[idx[found]] == new.ordinals[found]
+        changed = [i for i in range(len(new))
+                   if not found[i] or current.nav_text(idx[i]) != new.nav_text(i)]
+        if not changed:
+            return 0
+
+        navs, decimals = current.navs, current.decimals
+        if found.any():
+            navs, decimals = navs.copy(), decimals.copy()
+            navs[idx[found]] = new.navs[found]
+            decimals[idx[found]] = new.decimals[found]
+        inserted = ~found
+        replaced = set(new.ordinals[found].tolist())
+        overrides = {o: t for o, t in current.overrides.items() if o not in replaced}
+        overrides.update(new.overrides)
+        self.series[code] = NavSeries(
+            np.insert(current.ordinals, idx[inserted], new.ordinals[inserted]),
+            np.insert(navs, idx[inserted], new.navs[inserted]),
+            np.insert(decimals, idx[inserted], new.decimals[inserted]),
+            overrides,
+        )
+        return len(changed)
+
+    def truncate_from(self, code, date_str):
+        """Drop every point on or after date_str. Returns the number removed."""
+        series = self.series.get(code)
+        if series is None:
+            return 0
+        cutoff = date_to_ordinal(date_str)
+        keep = int(np.searchsorted(series.ordinals, cutoff, side='left'))
+        removed = len(series) - keep
+        if removed:
+            self.series[code] = NavSeries(
+                series.ordinals[:keep], series.navs[:keep], series.decimals[:keep],
+                {o: t for o, t in series.overrides.items() if o < cutoff},
+            )
+        return removed
+
+    # ---------------------------------------------------------
+    # JSON export
+    # ---------------------------------------------------------
+
+    def export_json(self, codes=None, data_dir=DATA_DIR):
+        """Write data/{code}.json in the original layout for the given series."""
+        for code in (codes if codes is not None else self.codes()):
+            series = self.series.get(code)
+            if series is None:
+                continue
+            write_atomic(os.path.join(data_dir, f"{code}.json"), series_to_json(series))
+
+
+def _same_series(a, b):
+    return (np.array_equal(a.ordinals, b.ordinals) and np.array_equal(a.navs, b.navs)
+            and np.array_equal(a.decimals, b.decimals) and a.overrides == b.overrides)
+
+
+def _json_code(filename):
+    """Series code of a data/{code}.json file name, or None for files that are not series."""
+    code = filename[:-5]
+    if filename.endswith('.json') and (code.startswith('SM') or code == NIFTY_CODE):
+        return code
+    return None
+
+
+def _read_header(path):
+    """A store file's JSON header (read without loading the arrays); None if it is not a store file."""
+    with open(path, 'rb') as f:
+        prefix = f.read(12)
+        if prefix[:8] != MAGIC:
+            return None
+        (header_len,) = struct.unpack_from('<I', prefix, 8)
+        return json.loads(f.read(header_len))
+
+
+def store_digest(path=STORE_FILE):
+    """Content digest recorded in a store file's header; None if absent."""
+    try:
+        header = _read_header(path)
+    except FileNotFoundError:
+        return None
+    return header.get('digest') if header else None
+
+
+def json_changed_since_store(path=STORE_FILE, data_dir=DATA_DIR):
+    """True if the store is missing or a data/{code}.json file was added, removed or modified after it was
+    saved, i.e. NavStore.load() would change it. Only stats the files."""
+    try:
+        stored_at = os.stat(path).st_mtime_ns
+        header = _read_header(path)
+    except FileNotFoundError:
+        return True
+    if header is None:
+        return True
+    stored_codes = {entry[0] for entry in header['series']}
+    on_disk = set()
+    with os.scandir(data_dir) as entries:
+        for entry in entries:
+            code = _json_code(entry.name)
+            if code is None:
+                continue
+            if code not in stored_codes or entry.stat().st_mtime_ns > stored_at:
+                return True
+            on_disk.add(code)
+    return on_disk != stored_codes
+
+
+def series_to_json(series):
+    """Render a series exactly as json.dump(..., indent=4) writes data/{code}.json."""
+    return json.dumps(series.to_dict(), indent=4)
+
+
+def write_atomic(path, text):
+    """Write text to path through a temp file + rename, so readers never see a partial file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def load_store():
+    """Load the NAV store from its default location."""
+    return NavStore.load()
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else 'rebuild'
+    if command == 'rebuild':
+        store = NavStore.from_json_dir()
+        store.save()
+        print(f"Rebuilt {STORE_FILE} from {len(store)} JSON series")
+    elif command == 'export':
+        store = NavStore.load()
+        store.export_json()
+        os.utime(store.path)  # The exports match the store; keep them from looking newer
+        print(f"Exported {len(store)} series from {STORE_FILE} to {DATA_DIR}/")
+    else:
+        print("Usage: python scripts/navstore.py [rebuild|export]")
+        sys.exit(1)
@@ -0,0 +1,151 @@
+"""
+Shared writer for NAV series.
+
+Every script that adds NAV points (fetch.py, backfill.py, fetch_missing.py,
+nifty.py, sort.py) goes through NavWriter instead of loading, re-sorting and
+rewriting files itself:
+
+    writer = NavWriter(store)
+    writer.add('SM001001', '10/17/2025', '45.1234')
+    writer.add_points('SM001002', {'10/16/2025': '30.12', '10/17/2025': '30.15'})
+    writer.commit()   # one store save + one write per touched data/{code}.json
+
+Pending points are batched per series and merged into the store with a
+binary search on their day ordinals, so existing points are never re-parsed
+or re-sorted. On commit each touched series is exported exactly once through
+an atomic rename, and series whose content did not change are not written.
+When every new point is newer than the last stored one (the daily case), the
+export is spliced in front of the existing file instead of re-rendering the
+whole history. The metadata index (navindex.py) and the date-presence bitmap
+(presence.py) are refreshed for the series that were committed.
+"""
+
+import os
+
+from navstore import DATA_DIR, date_to_ordinal, ordinal_to_date, series_to_json, write_atomic, store_digest
+from navindex import NavIndex
+from presence import PresenceIndex, load_presence
+
+# Start of every non-empty export written by json.dump(..., indent=4)
+_EXPORT_PREFIX = '{\n    "'
+
+
+class NavWriter:
+    """Batches NAV points per series and commits each touched series once."""
+
+    def __init__(self, store, data_dir=DATA_DIR):
+        self.store = store
+        self.data_dir = data_dir
+        self.index_path = os.path.join(data_dir, 'navindex.json')
+        self.presence_path = os.path.join(data_dir, 'presence.bin')
+        self.pending = {}      # code -> {"MM/DD/YYYY": "nav"}
+        self.rewrite = set()   # codes whose export must be fully re-rendered
+
+    def add(self, code, date_str, nav):
+        """Queue one point; a later value for the same date wins."""
+        self.pending.setdefault(code, {})[date_str] = str(nav)
+
+    def add_points(self, code, points):
+        """Queue a {"MM/DD/YYYY": "nav"} mapping for one series."""
+        if points:
+            queued = self.pending.setdefault(code, {})
+            for date_str, nav in points.items():
+                queued[date_str] = str(nav)
+
+    def truncate_from(self, code, date_str):
+        """Drop stored and queued points on or after date_str. Returns the number of stored points removed."""
+        cutoff = date_to_ordinal(date_str)
+        queued = self.pending.get(code)
+        if queued:
+            for queued_date in [d for d in queued if date_to_ordinal(d) >= cutoff]:
+                del queued[queued_date]
+        removed = self.store.truncate_from(code, date_str)
+        if removed:
+            self.rewrite.add(code)
+        return removed
+
+    def mark_dirty(self, code):
+        """Re-export a series on commit even if no point is queued for it (skipped if the file is unchanged)."""
+        self.rewrite.add(code)
+
+    def commit(self):
+        """Merge all queued points, save the store once and export each touched series once.
+
+        Returns {code: points added or changed} for every series whose export was written.
+        """
+        written = {}
+        store_changed = False
+        touched = sorted(set(self.pending) | self.rewrite)
+        for code in touched:
+            before = self.store.get(code)
+            last_before = int(before.ordinals[-1]) if before is not None and len(before) else None
+            points = self.pending.get(code, {})
+            changed = self.store.update(code, points)
+            store_changed = store_changed or changed > 0 or code in self.rewrite
+
+            if not changed and code not in self.rewrite:
+                continue
+            appended_only = (
+                code not in self.rewrite and last_before is not None
+                and min(date_to_ordinal(d) for d in points) > last_before
+            )
+            if self._export(code, last_before if appended_only else None):
+                written[code] = changed
+
+        if store_changed:
+            old_digest = store_digest(self.store.path)
+            self.store.save()
+            self._update_index(touched, old_digest)
+            self._update_presence(touched, old_digest)
+        self.pending = {}
+        self.rewrite = set()
+        return written
+
+    def _update_index(self, codes, old_store_digest):
+        """Refresh the index entries of the committed series (everything if the index was stale)."""
+        index = NavIndex.load(self.index_path) if os.path.exists(self.index_path) else NavIndex(path=self.index_path)
+        if index.store_digest is not None and index.store_digest == old_store_digest:
+            index.update(self.store, codes)
+            index.store_digest = self.store.digest
+        else:
+            index.sync(self.store)
+        index.save()
+
+    def _update_presence(self, codes, old_store_digest):
+        """Refresh the presence rows of the committed series (rebuild if the bitmap was stale)."""
+        try:
+            presence = PresenceIndex.load(self.presence_path)
+        except (FileNotFoundError, ValueError):
+            presence = None
+        if presence is not None and presence.store_digest is not None and presence.store_digest == old_store_digest:
+            presence.update(self.store, codes)
+            presence.store_digest = self.store.digest
+            presence.save()
+        else:
+            load_presence(self.presence_path, self.store.path, self.store)
+
+    def _export(self, code, append_after):
+        """Write data/{code}.json; returns False when the file already matched."""
+        path = os.path.join(self.data_dir, f"{code}.json")
+        series = self.store.get(code)
+
+        existing = None
+        if os.path.exists(path):
+            with open(path, 'r', newline='') as f:
+                existing = f.read()
+
+        if append_after is not None and existing and existing.startswith(_EXPORT_PREFIX):
+            # New points all sort after the stored ones, i.e. they go at the top of the file
+            lines = []
+            i = len(series) - 1
+            while i >= 0 and series.ordinals[i] > append_after:
+                lines.append(f'    "{ordinal_to_date(series.ordinals[i])}": "{series.nav_text(i)}"')
+                i -= 1
+            text = '{\n' + ',\n'.join(lines) + ',\n' + existing[2:]
+        else:
+            text = series_to_json(series)
+            if text == existing:
+                return False
+
+        write_atomic(path, text)
+        return True
@@ -1,8 +1,9 @@
-import json
 import os
 import requests
+import http_client
 from datetime import datetime
-from pathlib import Path
+from navstore import NavStore, NIFTY_CODE
+from navwriter import NavWriter
 
 DATE_FORMAT = '%m/%d/%Y'  # Define the date format for consistency
 
@@ -15,7 +16,7 @@ def fetch_nifty_data():
         raise ValueError("NIFTY_ENDPOINT_URL environment variable not set. Please add it as a GitHub secret.")
     
     try:
-        response = requests.get(endpoint_url, timeout=10)
+        response = http_client.get(endpoint_url, timeout=10)
         response.raise_for_status()
         return response.json()
     except requests.exceptions.RequestException as e:
@@ -47,37 +48,23 @@ def main():
         # Convert date format from DD-MM-YYYY to MM/DD/YYYY
         date_formatted = convert_date_format(data['date'])
         
-        # Ensure data directory exists
-        data_dir = Path('data')
-        data_dir.mkdir(exist_ok=True)
-        
-        # Load existing JSON data or initialize new dictionary
-        json_file_path = data_dir / 'nifty.json'
-        if json_file_path.exists():
-            with json_file_path.open('r') as f:
-                json_data = json.load(f)
-        else:
-            json_data = {}
+        # Load the Nifty series from the NAV store
+        store = NavStore.load()
+        stored_price = store.nav_on(NIFTY_CODE, date_formatted)
 
         # Check if today's data exists and if it needs updating
-        if date_formatted in json_data:
-            if json_data[date_formatted] != closing_price_formatted:
-                print(f"Updating Nifty 50 data for {date_formatted}: {json_data[date_formatted]} -> {closing_price_formatted}")
-                json_data[date_formatted] = closing_price_formatted
+        if stored_price is not None:
+            if stored_price != closing_price_formatted:
+                print(f"Updating Nifty 50 data for {date_formatted}: {stored_price} -> {closing_price_formatted}")
             else:
                 print(f"Data for {date_formatted} is already up-to-date.")
         else:
             print(f"Adding new data for {date_formatted}: {closing_price_formatted}")
-            json_data[date_formatted] = closing_price_formatted
-
-        # Sort the data by date in reverse order (newest date first)
-        sorted_json_data = dict(
-            sorted(json_data.items(), key=lambda x: datetime.strptime(x[0], DATE_FORMAT), reverse=True)
-        )
 
-        # Save the updated data back to the JSON file
-        with json_file_path.open('w') as f:
-            json.dump(sorted_json_data, f, indent=4)
+        # Save to the store and re-export data/nifty.json (newest date first); no-op if unchanged
+        writer = NavWriter(store)
+        writer.add(NIFTY_CODE, date_formatted, closing_price_formatted)
+        writer.commit()
 
         print(f"Nifty 50 closing price for {date_formatted}: {closing_price_formatted}")
         
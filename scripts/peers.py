@@ -0,0 +1,148 @@
+"""
+Peer-group ranks for every fund.
+
+Funds are grouped by (scheme type, tier, variant), the classification main.py
+uses for the site tables. Runs after calculate.py and risk.py and adds a
+"Peer Rank" entry to every fund in data/data.json, so the detailed API and
+latest.json publish it:
+
+    "Peer Rank": {
+        "Group": "Scheme E | Tier I | Regular",
+        "Returns": {"1Y": {"Rank": 3, "Peers": 12, "Percentile": 81.82, "Quartile": 1}, ...},
+        "Risk": {"3Y": {"Sharpe": {...}, "Volatility": {...}, ...}, ...}
+    }
+
+Rank 1 is the best value in the group: the highest return, Sharpe, Sortino or
+max drawdown (closest to zero), and the lowest volatility. Beta and
+correlation describe exposure rather than quality, so they are not ranked.
+Ties share the best rank. "Peers" counts the group's funds that have a value.
+"Percentile" is the share of those peers ranked below the fund (100 for the
+sole fund of a group). Quartile 1 is a percentile of 75 or more, quartile 4
+below 25.
+Funds without a value for a metric get null.
+
+Every metric is ranked for all groups in one pass. One lexsort orders the
+funds by (group, value), and the start of each group and each run of tied
+values is then propagated with a running maximum. The cost is one sort per
+metric, with no pairwise comparisons.
+"""
+
+import json
+
+import numpy as np
+
+from main import extract_scheme_type, extract_tier, extract_variant
+from returns_engine import RETURN_FIELDS
+from risk import WINDOWS
+
+# (metric, True if higher is better)
+RISK_METRICS = [
+    ('Volatility', False),
+    ('Max Drawdown', True),
+    ('Sharpe', True),
+    ('Sortino', True),
+]
+
+
+def peer_group(fund):
+    """(scheme type, tier, variant) of a fund."""
+    name = fund.get('Scheme Name', '')
+    return (extract_scheme_type(name, fund['Scheme Code']), extract_tier(name), extract_variant(name))
+
+
+def group_ranks(group_ids, values, higher_is_better=True):
+    """Competition ranks of values within their groups, with the number of ranked peers.
+
+    group_ids are small non-negative ints, values floats (NaN = not ranked).
+    Returns (ranks, peers) int arrays; rank 0 where the value is NaN.
+    """
+    valid = ~np.isnan(values)
+    ranks = np.zeros(len(values), dtype=np.int64)
+    peers = np.zeros(len(values), dtype=np.int64)
+    if not valid.any():
+        return ranks, peers
+
+    groups = group_ids[valid]
+    keyed = -values[valid] if higher_is_better else values[valid]
+    order = np.lexsort((keyed, groups))
+    sorted_groups, sorted_values = groups[order], keyed[order]
+
+    positions = np.arange(len(order))
+    new_group = np.append(True, sorted_groups[1:] != sorted_groups[:-1])
+    new_run = new_group | np.append(True, sorted_values[1:] != sorted_values[:-1])
+    group_start = np.maximum.accumulate(np.where(new_group, positions, 0))
+    run_start = np.maximum.accumulate(np.where(new_run, positions, 0))
+
+    valid_ranks = np.empty(len(order), dtype=np.int64)
+    valid_ranks[order] = run_start - group_start + 1
+    ranks[valid] = valid_ranks
+    peers[valid] = np.bincount(groups)[groups]
+    return ranks, peers
+
+
+def _rank_entries(ranks, peers):
+    entries = []
+    for rank, count in zip(ranks.tolist(), peers.tolist()):
+        if not rank:
+            entries.append(None)
+            continue
+        percentile = (count - rank) / (count - 1) * 100 if count > 1 else 100.0
+        entries.append({
+            "Rank": rank,
+            "Peers": count,
+            "Percentile": round(percentile, 2),
+            "Quartile": 4 - min(int(percentile // 25), 3),
+        })
+    return entries
+
+
+def _values(funds, getter):
+    values = np.full(len(funds), np.nan)
+    for i, fund in enumerate(funds):
+        value = getter(fund)
+        if value is not None:
+            values[i] = float(value)
+    return values
+
+
+def calculate_peer_ranks(funds):
+    """Return one "Peer Rank" dict per fund."""
+    groups = [peer_group(fund) for fund in funds]
+    labels, group_ids = np.unique([' | '.join(group) for group in groups], return_inverse=True)
+
+    returns = {}
+    for field in RETURN_FIELDS:
+        values = _values(funds, lambda fund: fund.get(field))
+        returns[field] = _rank_entries(*group_ranks(group_ids, values))
+
+    risk = {}
+    for label, _ in WINDOWS:
+        for metric, higher_is_better in RISK_METRICS:
+            values = _values(funds, lambda fund: ((fund.get('Risk') or {}).get(label) or {}).get(metric))
+            risk[(label, metric)] = _rank_entries(*group_ranks(group_ids, values, higher_is_better))
+
+    results = []
+    for i in range(len(funds)):
+        results.append({
+            "Group": str(labels[group_ids[i]]),
+            "Returns": {field: returns[field][i] for field in RETURN_FIELDS},
+            "Risk": {label: {metric: risk[(label, metric)][i] for metric, _ in RISK_METRICS}
+                     for label, _ in WINDOWS},
+        })
+    return results
+
+
+if __name__ == "__main__":
+    with open('data/data.json', 'r') as file:
+        base_data = json.load(file)
+
+    changed = 0
+    for fund, peer_rank in zip(base_data, calculate_peer_ranks(base_data)):
+        if fund.get('Peer Rank') != peer_rank:
+            fund['Peer Rank'] = peer_rank
+            changed += 1
+
+    if changed:
+        with open('data/data.json', 'w') as file:
+            json.dump(base_data, file, indent=4)
+    print(f"Peer ranks updated for {changed} of {len(base_data)} funds.")
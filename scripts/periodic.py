@@ -0,0 +1,120 @@
+"""
+Month-by-month and calendar-year returns for every scheme.
+
+The month-end and year-end as-of NAVs (last NAV on or before the last day of
+the period) of all schemes are looked up together in one batched search over
+the store's series (returns_engine.asof_navs), on a shared calendar grid from
+the oldest history to the newest. A period's return is its closing as-of NAV
+against the previous period's, in percent. It is null when the scheme has no
+NAV on or before the previous period end, or no NAV after it (dead schemes).
+The period containing a scheme's latest NAV is month-/year-to-date.
+
+calculate.py writes these files in build.py's returns stage (its first),
+from the store it already loaded for the returns; `--state-only` runs write
+no site files. `python scripts/periodic.py` regenerates them on its own.
+
+Output:
+    public/api/periodic/{scheme_code}.json (plus nifty.json)
+        {"data": {"monthly": {"2024": [Jan, ..., Dec], ...},
+                  "yearly": {"2024": 12.34, ...}},
+         "metadata": {"dataType": "Periodic Returns", ...}}
+    public/api/periodic.json: the same "monthly"/"yearly" tables for all schemes
+"""
+
+import os
+import json
+from datetime import date
+
+import numpy as np
+
+from navstore import NavStore, ordinal_to_display_date
+from returns_engine import asof_navs
+
+OUTPUT_DIR = 'public/api/periodic'
+ALL_SCHEMES_FILE = 'public/api/periodic.json'
+
+
+def _month_end_ordinals(first_ordinal, last_ordinal):
+    """(years, months, last-day ordinals) of every month from the one before first_ordinal to last_ordinal's."""
+    first, last = date.fromordinal(int(first_ordinal)), date.fromordinal(int(last_ordinal))
+    index = np.arange(first.year * 12 + first.month - 2, last.year * 12 + last.month)  # year * 12 + month - 1
+    years, months = index // 12, index % 12 + 1
+    next_month_starts = [date(int(y) + (m == 12), int(m) % 12 + 1, 1).toordinal() for y, m in zip(years, months)]
+    return years, months, np.array(next_month_starts, dtype=np.int64) - 1
+
+
+def _period_returns(closing, last_ordinals, ends):
+    """Returns between consecutive period closes (rows x periods-1), NaN where not defined."""
+    previous, current = closing[:, :-1], closing[:, 1:]
+    # No NAV after the previous period end means the scheme had stopped by then
+    alive = last_ordinals[:, None] > ends[None, :-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = (current / previous - 1) * 100
+    return np.where(alive & np.isfinite(returns), returns, np.nan)
+
+
+def periodic_returns(store, codes):
+    """{code: {"monthly": {year: [12 values]}, "yearly": {year: value}}} for all codes in one pass."""
+    series_list = [store.get(code) for code in codes]
+    present = [(code, s) for code, s in zip(codes, series_list) if s is not None and len(s)]
+    if not present:
+        return {}
+    codes = [code for code, _ in present]
+    series_list = [s for _, s in present]
+    first_ordinals = np.array([int(s.ordinals[0]) for s in series_list], dtype=np.int64)
+    last_ordinals = np.array([int(s.ordinals[-1]) for s in series_list], dtype=np.int64)
+
+    years, months, month_ends = _month_end_ordinals(first_ordinals.min(), last_ordinals.max())
+    year_numbers = np.arange(years[0] - 1 if months[0] != 12 else years[0], years[-1] + 1)
+    year_ends = np.array([date(int(y), 12, 31).toordinal() for y in year_numbers], dtype=np.int64)
+
+    # One batched as-of lookup for every (scheme, month end) and (scheme, year end)
+    targets = np.broadcast_to(np.concatenate([month_ends, year_ends]), (len(codes), len(month_ends) + len(year_ends)))
+    closing = asof_navs(series_list, np.ascontiguousarray(targets))
+    monthly = _period_returns(closing[:, :len(month_ends)], last_ordinals, month_ends)
+    yearly = _period_returns(closing[:, len(month_ends):], last_ordinals, year_ends)
+
+    # Grid positions: monthly[:, k] is month k + 1 of the grid, yearly[:, k] is year k + 1
+    grid_years, grid_months = years[1:], months[1:]
+    results = {}
+    for row, code in enumerate(codes):
+        table = {}
+        for k in np.flatnonzero(~np.isnan(monthly[row])):
+            year = str(int(grid_years[k]))
+            table.setdefault(year, [None] * 12)[int(grid_months[k]) - 1] = round(float(monthly[row, k]), 2)
+        results[code] = {
+            "monthly": table,
+            "yearly": {str(int(year_numbers[k + 1])): round(float(yearly[row, k]), 2)
+                       for k in np.flatnonzero(~np.isnan(yearly[row]))},
+        }
+    return results
+
+
+def generate_periodic_api_files(store):
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    results = periodic_returns(store, store.codes())
+
+    for scheme_code, tables in results.items():
+        series = store.get(scheme_code)
+        output_data = {
+            "data": tables,
+            "metadata": {
+                "dataType": "Periodic Returns",
+                "unit": "percent",
+                "from": ordinal_to_display_date(series.ordinals[0]),
+                "lastUpdated": ordinal_to_display_date(series.ordinals[-1])
+            }
+        }
+        output_file_path = os.path.join(OUTPUT_DIR, f"{scheme_code}.json")
+        with open(output_file_path, 'w') as output_file:
+            json.dump(output_data, output_file, indent=4)
+
+    with open(ALL_SCHEMES_FILE, 'w') as output_file:
+        json.dump({"data": results, "metadata": {"dataType": "Periodic Returns", "unit": "percent"}},
+                  output_file, separators=(',', ':'))
+
+    print(f"Generated periodic returns for {len(results)} schemes in {OUTPUT_DIR} and {ALL_SCHEMES_FILE}")
+
+
+if __name__ == "__main__":
+    generate_periodic_api_files(NavStore.load())
@@ -0,0 +1,83 @@
+"""
+Upstream fingerprint of the last successful pipeline run (data/pipeline_state.json).
+
+Most scheduled runs find nothing new upstream. fetch.py fingerprints what
+it saw upstream: the sha256 of the NPS Trust dump and the latest NAV date
+(the newest Protean date fetched, or the newest stored date when Protean
+had nothing newer). It compares that with the fingerprint of the last
+successful run, and when they match it exits with UNCHANGED_EXIT_CODE (3)
+before touching any file. The Makefile and the daily workflow then skip
+calculate, build, DB sync and deploy.
+
+A run that does fetch records its fingerprint as "pending". The pipeline
+marks it "complete" with `python scripts/pipeline_state.py complete` once
+everything downstream has succeeded. A run that failed half-way therefore
+never short-circuits the next one. `fetch.py --force` ignores the
+fingerprint.
+
+    {"status": "complete", "fingerprint": {"dump_sha256", "latest_date"}, "updated": "..."}
+"""
+
+import sys
+import json
+from datetime import datetime
+
+from navstore import write_atomic
+
+STATE_FILE = 'data/pipeline_state.json'
+UNCHANGED_EXIT_CODE = 3
+DATE_FORMAT = '%m/%d/%Y'
+
+
+def load_state():
+    try:
+        with open(STATE_FILE, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_state(state):
+    write_atomic(STATE_FILE, json.dumps(state, indent=4))
+
+
+def upstream_fingerprint(snapshot, protean_by_date, last_stored_date):
+    """Fingerprint of one run's upstream view: dump hash plus the newest NAV date seen or stored."""
+    dates = [datetime.strptime(date_str, DATE_FORMAT) for date_str in protean_by_date]
+    if last_stored_date:
+        dates.append(last_stored_date)
+    return {
+        'dump_sha256': snapshot.sha256 if snapshot is not None else None,
+        'latest_date': max(dates).strftime('%Y-%m-%d') if dates else None,
+    }
+
+
+def is_unchanged(fingerprint):
+    """True if fingerprint matches the last successful run's and the dump was actually read."""
+    state = load_state()
+    return (fingerprint['dump_sha256'] is not None
+            and state.get('status') == 'complete'
+            and state.get('fingerprint') == fingerprint)
+
+
+def record_pending(fingerprint):
+    save_state({'status': 'pending', 'fingerprint': fingerprint, 'updated': datetime.now().isoformat(timespec='seconds')})
+
+
+def mark_complete():
+    """Mark the recorded fingerprint as the last successful run; False if there is none."""
+    state = load_state()
+    if not state.get('fingerprint'):
+        return False
+    state['status'] = 'complete'
+    state['updated'] = datetime.now().isoformat(timespec='seconds')
+    save_state(state)
+    return True
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ['complete']:
+        print("Pipeline state: complete" if mark_complete() else "Pipeline state: no fingerprint recorded")
+    else:
+        state = load_state()
+        print(json.dumps(state, indent=4) if state else "Pipeline state: none recorded")
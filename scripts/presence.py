@@ -0,0 +1,254 @@
+"""
+Date-presence bitmap for the NAV store: one bit per (series, day).
+
+data/presence.bin holds, for every series in data/navstore.bin, a row of
+bits over a calendar-day axis from the earliest stored date onwards, packed
+with np.packbits (little bit order, so bit i of a row is day start + i). A
+bit is set when the series has a NAV on that day. Rows are stored
+calendar-day wide rather than weekday wide because a few funds publish on
+weekends.
+
+Gap detection is then bitwise over whole rows instead of series lookups:
+
+    trading = OR of every fund row          days at least one fund has a NAV
+    gaps    = trading & live & range & ~row days a fund missed while others published
+    missing = weekdays & range & ~trading   weekdays no fund has a NAV for
+
+where live covers a fund's own first..last stored date (days before its
+launch are not gaps). gaps() reports these exactly for every requested
+scheme. missing_days() covers dates no file was ever fetched for, holidays
+included.
+
+NavWriter updates the rows of the series it commits. load_presence()
+rebuilds the file in one pass over the store when it is missing or was
+written for a store with a different content digest (e.g. after a manual
+navstore.py rebuild). The file is derived data and is not committed.
+
+Usage:
+    python scripts/presence.py                          # rebuild data/presence.bin and summarise gaps
+    python scripts/presence.py 01/01/2024 12/31/2024    # summarise the gaps in a date range (MM/DD/YYYY)
+"""
+
+import os
+import sys
+import json
+import struct
+
+import numpy as np
+
+from navstore import NavStore, DATA_DIR, STORE_FILE, NIFTY_CODE, date_to_ordinal, ordinal_to_date, store_digest, \
+    json_changed_since_store
+
+PRESENCE_FILE = os.path.join(DATA_DIR, 'presence.bin')
+
+MAGIC = b'NPSPRS01'
+PRESENCE_VERSION = 1
+
+
+def _row_bytes(days):
+    return (days + 7) // 8
+
+
+def _pack(columns, days):
+    """Packed row with the given column positions set."""
+    row = np.zeros(_row_bytes(days) * 8, dtype=bool)
+    row[columns] = True
+    return np.packbits(row, bitorder='little')
+
+
+def _span_mask(first, last, days):
+    """Packed rows (one per first/last pair) with columns first..last set."""
+    columns = np.arange(_row_bytes(days) * 8)
+    return np.packbits((columns >= first[:, None]) & (columns <= last[:, None]), axis=1, bitorder='little')
+
+
+class PresenceIndex:
+    """Packed (series x day) presence bits with a calendar-day axis starting at `start` (a date ordinal)."""
+
+    def __init__(self, codes=None, start=None, days=0, bits=None, path=PRESENCE_FILE, store_digest=None):
+        self.codes = list(codes or [])
+        self.row_index = {code: i for i, code in enumerate(self.codes)}
+        self.start = start
+        self.days = days
+        self.bits = bits if bits is not None else np.zeros((len(self.codes), _row_bytes(days)), dtype=np.uint8)
+        self.path = path
+        self.store_digest = store_digest
+
+    def __contains__(self, code):
+        return code in self.row_index
+
+    def __len__(self):
+        return len(self.codes)
+
+    # ---------------------------------------------------------
+    # Building / maintenance
+    # ---------------------------------------------------------
+
+    @classmethod
+    def build(cls, store, path=PRESENCE_FILE):
+        """Presence bits for every series in the store, in one pass."""
+        codes = store.codes()
+        non_empty = [store.get(code).ordinals for code in codes if len(store.get(code))]
+        start = int(min(o[0] for o in non_empty)) if non_empty else None
+        days = int(max(o[-1] for o in non_empty)) - start + 1 if non_empty else 0
+        index = cls(codes, start, days, path=path)
+        for i, code in enumerate(codes):
+            index.bits[i] = _pack(store.get(code).ordinals - start, days) if len(store.get(code)) else 0
+        index.store_digest = store.digest
+        return index
+
+    def update(self, store, codes):
+        """Refresh the rows of the given series from the store (series missing from it are dropped)."""
+        ordinals = [store.get(code).ordinals for code in codes if store.get(code) is not None and len(store.get(code))]
+        if ordinals and self.start is not None and min(int(o[0]) for o in ordinals) < self.start:
+            # A date before the axis start would shift every row; rebuild instead
+            rebuilt = self.build(store, self.path)
+            self.__dict__.update(rebuilt.__dict__)
+            return
+        if ordinals:
+            if self.start is None:
+                self.start = min(int(o[0]) for o in ordinals)
+            days = max(self.days, max(int(o[-1]) for o in ordinals) - self.start + 1)
+            if _row_bytes(days) > self.bits.shape[1]:
+                self.bits = np.pad(self.bits, ((0, 0), (0, _row_bytes(days) - self.bits.shape[1])))
+            self.days = days
+
+        for code in codes:
+            series = store.get(code)
+            if series is None:
+                if code in self.row_index:
+                    keep = [i for i, c in enumerate(self.codes) if c != code]
+                    self.bits = self.bits[keep]
+                    self.codes = [self.codes[i] for i in keep]
+                    self.row_index = {c: i for i, c in enumerate(self.codes)}
+                continue
+            if code not in self.row_index:
+                self.row_index[code] = len(self.codes)
+                self.codes.append(code)
+                self.bits = np.vstack([self.bits, np.zeros((1, self.bits.shape[1]), dtype=np.uint8)])
+            self.bits[self.row_index[code]] = _pack(series.ordinals - self.start, self.days) if len(series) else 0
+
+    # ---------------------------------------------------------
+    # Queries
+    # ---------------------------------------------------------
+
+    def scheme_codes(self):
+        return [code for code in self.codes if code.startswith('SM')]
+
+    def _rows(self, codes):
+        return np.array([self.row_index[code] for code in codes if code in self.row_index], dtype=np.intp)
+
+    def _range_mask(self, start_ordinal=None, end_ordinal=None):
+        first = 0 if start_ordinal is None else start_ordinal - self.start
+        last = self.days - 1 if end_ordinal is None else end_ordinal - self.start
+        return _span_mask(np.array([first]), np.array([last]), self.days)[0]
+
+    def _ordinals(self, packed):
+        return np.flatnonzero(np.unpackbits(packed, count=self.days, bitorder='little')) + self.start
+
+    def has(self, code, ordinal):
+        column = ordinal - self.start if self.start is not None else -1
+        if code not in self.row_index or not 0 <= column < self.days:
+            return False
+        return bool(self.bits[self.row_index[code], column >> 3] >> (column & 7) & 1)
+
+    def trading(self, codes=None):
+        """Packed row of the days at least one of the series (default: every fund) has a NAV."""
+        rows = self.bits[self._rows(self.scheme_codes() if codes is None else codes)]
+        return np.bitwise_or.reduce(rows, axis=0) if len(rows) else np.zeros(self.bits.shape[1], dtype=np.uint8)
+
+    def trading_days(self, start_ordinal=None, end_ordinal=None):
+        """Ordinals in the range that at least one fund has a NAV for."""
+        if self.start is None:
+            return np.empty(0, dtype=np.int64)
+        return self._ordinals(self.trading() & self._range_mask(start_ordinal, end_ordinal))
+
+    def missing_days(self, start_ordinal, end_ordinal):
+        """Weekday ordinals in the range that no fund has a NAV for (including days past the last stored one)."""
+        weekdays = np.arange(start_ordinal, end_ordinal + 1)
+        weekdays = weekdays[(weekdays - 1) % 7 < 5]  # ordinal 1 (0001-01-01) was a Monday
+        if self.start is None:
+            return weekdays
+        traded = set(self.trading_days(start_ordinal, end_ordinal).tolist())
+        return np.array([o for o in weekdays if o not in traded], dtype=np.int64)
+
+    def gaps(self, start_ordinal=None, end_ordinal=None, codes=None):
+        """{code: ordinals} of the trading days within each series' own first..last date that it has no NAV for."""
+        codes = [code for code in (self.scheme_codes() if codes is None else codes) if code in self.row_index]
+        if not codes or self.start is None:
+            return {}
+        rows = self.bits[self._rows(codes)]
+        unpacked = np.unpackbits(rows, axis=1, count=self.days, bitorder='little').astype(bool)
+        has_data = unpacked.any(axis=1)
+        first = np.where(has_data, unpacked.argmax(axis=1), self.days)
+        last = np.where(has_data, self.days - 1 - unpacked[:, ::-1].argmax(axis=1), -1)
+
+        candidates = self.trading() & self._range_mask(start_ordinal, end_ordinal)
+        missed = candidates & _span_mask(first, last, self.days) & ~rows
+        return {code: self._ordinals(missed[i]) for i, code in enumerate(codes) if missed[i].any()}
+
+    # ---------------------------------------------------------
+    # Loading / saving
+    # ---------------------------------------------------------
+
+    @classmethod
+    def load(cls, path=PRESENCE_FILE):
+        with open(path, 'rb') as f:
+            prefix = f.read(12)
+            if prefix[:8] != MAGIC:
+                raise ValueError(f"{path} is not a presence bitmap file")
+            (header_len,) = struct.unpack_from('<I', prefix, 8)
+            header = json.loads(f.read(header_len))
+            if header['version'] != PRESENCE_VERSION:
+                raise ValueError(f"Unsupported presence bitmap version {header['version']} in {path}")
+            bits = np.frombuffer(f.read(), dtype=np.uint8)
+        bits = bits.reshape(len(header['codes']), _row_bytes(header['days'])).copy()
+        return cls(header['codes'], header['start'], header['days'], bits, path=path,
+                   store_digest=header.get('store_digest'))
+
+    def save(self, path=None):
+        path = path or self.path
+        header = json.dumps({'version': PRESENCE_VERSION, 'codes': self.codes, 'start': self.start, 'days': self.days,
+                             'store_digest': self.store_digest}, separators=(',', ':')).encode('utf-8')
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack('<I', len(header)))
+            f.write(header)
+            f.write(np.ascontiguousarray(self.bits, dtype=np.uint8).tobytes())
+        os.replace(tmp_path, path)
+
+
+def load_presence(path=PRESENCE_FILE, store_path=STORE_FILE, store=None):
+    """Load the bitmap, rebuilding it from the store if it is missing, unreadable or stale
+    (a store older than the JSON files is reloaded first, as in load_index)."""
+    data_dir = os.path.dirname(store_path)
+    try:
+        index = PresenceIndex.load(path)
+    except (FileNotFoundError, ValueError):
+        index = None
+    if store is None and json_changed_since_store(store_path, data_dir):
+        store = NavStore.load(store_path, data_dir)
+    digest = store.digest if store is not None else store_digest(store_path)
+    if index is not None and index.store_digest is not None and digest == index.store_digest:
+        return index
+    index = PresenceIndex.build(store if store is not None else NavStore.load(store_path, data_dir), path)
+    index.save()
+    return index
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args:
+        index = load_presence()
+        start_ordinal, end_ordinal = date_to_ordinal(args[0]), date_to_ordinal(args[1])
+    else:
+        index = PresenceIndex.build(NavStore.load())
+        index.save()
+        print(f"Rebuilt {PRESENCE_FILE} for {len(index)} series over {index.days} days")
+        start_ordinal = end_ordinal = None
+    gaps = index.gaps(start_ordinal, end_ordinal)
+    print(f"{sum(len(days) for days in gaps.values())} scheme-day gaps in {len(gaps)} of "
+          f"{len(index.scheme_codes())} schemes (excluding {NIFTY_CODE})")
+    for code, days in sorted(gaps.items(), key=lambda item: -len(item[1]))[:20]:
+        print(f"  {code}: {len(days)} gaps, {ordinal_to_date(days[0])} .. {ordinal_to_date(days[-1])}")
@@ -0,0 +1,138 @@
+"""
+Concurrent fetcher for the Protean daily NAV ZIPs.
+
+The daily job (fetch.py) needs the Protean file of every weekday since the
+newest stored date, up to SCAN_DAYS back. Instead of one 30 s round trip per
+date, fetch_protean_range() requests every candidate date at once on an
+asyncio loop. Each blocking download runs in a thread via asyncio.to_thread.
+Concurrency is bounded overall (MAX_CONCURRENCY) and per host
+(PER_HOST_LIMIT).
+
+The newest stored date is looked up while the downloads start. Once it is
+known, the tasks for dates on or before it are cancelled. Tasks still waiting
+for a slot never issue their request, and results of requests already in
+flight are discarded. The result has the same layout the serial loop built:
+
+    {"MM/DD/YYYY": {scheme_code: {"nav", "date", "pfm_name", "scheme_name"}}}
+
+Past dates' files are served from the download cache once fetched
+(download_cache.py). The URL template can be overridden with the
+PROTEAN_URL environment variable, e.g. to point the job at a local
+stand-in server (tests/test_protean.py runs it against one).
+"""
+
+import os
+import asyncio
+import logging
+from datetime import date, timedelta
+from urllib.parse import urlsplit
+
+import urllib3
+
+import download_cache
+from navparse import read_protean_zip
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+logger = logging.getLogger(__name__)
+
+DATE_FORMAT = '%m/%d/%Y'
+PROTEAN_URL = os.getenv('PROTEAN_URL', "https://www.npscra.proteantech.in/download/NAV_File_{date_str}.zip")
+
+# Configurable variables
+SCAN_DAYS = 30  # Calendar days scanned back from today
+MAX_CONCURRENCY = 8  # Downloads in flight at once
+PER_HOST_LIMIT = 4  # Downloads in flight per host
+REQUEST_TIMEOUT = 30  # Seconds per download
+
+
+def protean_url(dt):
+    return PROTEAN_URL.format(date_str=dt.strftime('%d%m%Y'))
+
+
+def parse_protean_zip(content):
+    """Parse a Protean NAV ZIP into {scheme_code: {nav, date, pfm_name, scheme_name}}."""
+    return {
+        row.scheme_code: {
+            'nav': str(row.nav),
+            'date': row.date,  # already MM/DD/YYYY
+            'pfm_name': row.pfm_name,
+            'scheme_name': row.scheme_name,
+        }
+        for row in read_protean_zip(content)
+    }
+
+
+def fetch_protean(dt):
+    """Fetch NAV data from the Protean ZIP for one date. Returns {scheme_code: info} or {}.
+
+    A past date's file never changes, so once downloaded it is served from the
+    download cache; today's file is revalidated.
+    """
+    url = protean_url(dt)
+    try:
+        download = download_cache.fetch(url, immutable=dt.date() < date.today(), min_size=100,
+                                        verify=False, timeout=REQUEST_TIMEOUT)
+        if not download.ok:
+            return {}
+        return parse_protean_zip(download.content)
+    except Exception as e:
+        download_cache.discard(url)
+        logger.warning(f"Protean fetch failed for {dt.strftime('%d-%m-%Y')}: {e}")
+        return {}
+
+
+def candidate_dates(today, scan_days=SCAN_DAYS):
+    """Weekdays from today back over scan_days calendar days, newest first."""
+    return [today - timedelta(days=days_back) for days_back in range(scan_days)
+            if (today - timedelta(days=days_back)).weekday() < 5]
+
+
+async def _fetch_all(candidates, last_stored_fn, fetch):
+    total = asyncio.Semaphore(MAX_CONCURRENCY)
+    hosts = {}
+
+    async def fetch_one(dt):
+        host = urlsplit(protean_url(dt)).netloc
+        per_host = hosts.setdefault(host, asyncio.Semaphore(PER_HOST_LIMIT))
+        async with total, per_host:
+            return await asyncio.to_thread(fetch, dt)
+
+    tasks = {dt: asyncio.create_task(fetch_one(dt)) for dt in candidates}
+
+    # Find the newest stored date while the downloads start, then drop every date it covers
+    last_stored = await asyncio.to_thread(last_stored_fn)
+    if last_stored:
+        for dt, task in tasks.items():
+            if dt <= last_stored:
+                task.cancel()
+
+    results = {}
+    for dt, task in tasks.items():
+        try:
+            results[dt] = await task
+        except asyncio.CancelledError:
+            continue
+    return results
+
+
+def fetch_protean_range(today, last_stored_fn, fetch=fetch_protean):
+    """Fetch every weekday file newer than the newest stored date; returns {date_str: {scheme_code: info}}.
+
+    last_stored_fn returns the newest stored date (datetime) or None; it runs
+    concurrently with the downloads. Dates without a file are left out.
+    """
+    candidates = candidate_dates(today)
+    results = asyncio.run(_fetch_all(candidates, last_stored_fn, fetch))
+
+    protean_by_date = {}
+    for dt in candidates:
+        if dt not in results:
+            continue
+        if results[dt]:
+            protean_by_date[dt.strftime(DATE_FORMAT)] = results[dt]
+            logger.info(f"Protean: fetched {len(results[dt])} records for {dt.strftime('%d-%m-%Y')}")
+        else:
+            logger.debug(f"Protean: no file for {dt.strftime('%d-%m-%Y')}")
+    return protean_by_date
+
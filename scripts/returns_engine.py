@@ -0,0 +1,112 @@
+"""
+Vectorised returns engine for calculate.py.
+
+All scheme histories are laid out once as one sorted key array
+(row << 32 | day ordinal), so the as-of NAV for every (fund, period) pair is a
+single batched np.searchsorted, and simple / CAGR returns are array
+operations. The results match calculate_returns_for_fund() field for field:
+same target dates (relativedelta from each fund's latest date), same
+"on or before the target" rule, same staleness thresholds and the same
+two-decimal formatting. tests/test_returns_engine.py compares the two
+implementations on the committed data.
+"""
+
+from datetime import datetime
+
+import numpy as np
+from dateutil.relativedelta import relativedelta
+
+DATE_FORMAT = '%m/%d/%Y'
+
+# (field, offset from the fund's latest date, staleness threshold in days, CAGR years)
+# A period is only calculated if the fund's data is fresh enough; None = always calculated
+PERIODS = [
+    ('1D', relativedelta(days=1), 2, None),
+    ('7D', relativedelta(days=7), 9, None),
+    ('1M', relativedelta(months=1), 35, None),
+    ('3M', relativedelta(months=3), 100, None),
+    ('6M', relativedelta(months=6), 190, None),
+    ('1Y', relativedelta(years=1), 380, None),
+    ('3Y', relativedelta(years=3), None, 3),
+    ('5Y', relativedelta(years=5), None, 5),
+]
+RETURN_FIELDS = [period[0] for period in PERIODS]
+STALENESS_THRESHOLDS = [period[2] for period in PERIODS if period[2] is not None]
+
+_ROW_SHIFT = 32
+
+
+def period_targets(latest_ordinals):
+    """(funds x periods) target ordinals; relativedelta is evaluated once per distinct latest date."""
+    unique, inverse = np.unique(latest_ordinals, return_inverse=True)
+    table = np.empty((len(unique), len(PERIODS)), dtype=np.int64)
+    for i, ordinal in enumerate(unique):
+        latest = datetime.fromordinal(int(ordinal))
+        for j, (_, offset, _, _) in enumerate(PERIODS):
+            table[i, j] = (latest - offset).toordinal()
+    return table[inverse]
+
+
+def asof_navs(series_list, targets):
+    """As-of NAVs for each (row, target): last NAV on or before the target, NaN if none.
+
+    series_list holds one NavSeries (or None) per row; targets is a (rows x k) ordinal array.
+    """
+    lengths = np.array([len(s) if s is not None else 0 for s in series_list], dtype=np.int64)
+    rows = np.repeat(np.arange(len(series_list), dtype=np.int64), lengths)
+    present = [s for s in series_list if s is not None and len(s)]
+    ordinals = np.concatenate([s.ordinals for s in present]).astype(np.int64) if present else np.empty(0, np.int64)
+    navs = np.concatenate([s.navs for s in present]) if present else np.empty(0)
+    keys = (rows << _ROW_SHIFT) | ordinals
+
+    query_rows = np.arange(len(series_list), dtype=np.int64)[:, None]
+    queries = (query_rows << _ROW_SHIFT) | targets
+    pos = np.searchsorted(keys, queries.ravel(), side='right') - 1
+    valid = pos >= 0
+    valid[valid] = rows[pos[valid]] == np.broadcast_to(query_rows, targets.shape).ravel()[valid]
+    result = np.full(pos.shape, np.nan)
+    result[valid] = navs[pos[valid]]
+    return result.reshape(targets.shape)
+
+
+def _format_pct(values, mask):
+    """format(x, ".2f") where mask is set, None elsewhere."""
+    return [format(float(v), ".2f") if m else None for v, m in zip(values, mask)]
+
+
+def compute_returns(base_data, store, global_latest_date):
+    """Return one {field: value} dict per fund in base_data (None for funds without history)."""
+    codes = [fund['Scheme Code'] for fund in base_data]
+    series_list = [store.get(code) for code in codes]
+    has_history = np.array([s is not None and len(s) > 0 for s in series_list])
+
+    latest = np.array([datetime.strptime(fund['Date'], DATE_FORMAT).toordinal() for fund in base_data],
+                      dtype=np.int64)
+    days_behind = global_latest_date.toordinal() - latest
+    # The latest NAV comes from data.json, exactly like calculate_returns_for_fund
+    current_ok = np.array([bool(fund['NAV']) for fund in base_data])
+    current = np.array([float(fund['NAV']) if fund['NAV'] else np.nan for fund in base_data])
+
+    past = asof_navs(series_list, period_targets(latest))
+    past_ok = ~np.isnan(past)
+
+    columns = {}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for j, (field, _, threshold, years) in enumerate(PERIODS):
+            mask = current_ok & past_ok[:, j]
+            if years is None:
+                values = (current - past[:, j]) / past[:, j] * 100
+                if threshold is not None:
+                    mask &= days_behind <= threshold
+            else:
+                mask &= past[:, j] != 0
+                values = ((current / past[:, j]) ** (1 / years) - 1) * 100
+            columns[field] = _format_pct(values, mask)
+
+    results = []
+    for i in range(len(base_data)):
+        if not has_history[i]:
+            results.append(None)
+        else:
+            results.append({field: columns[field][i] for field in RETURN_FIELDS})
+    return results
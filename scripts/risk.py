@@ -0,0 +1,193 @@
+"""
+Risk metrics for every scheme over the 1Y, 3Y and 5Y windows.
+
+Runs after calculate.py and adds a "Risk" entry to every fund in
+data/data.json, so the detailed API and latest.json publish it:
+
+    "Risk": {
+        "1Y": {"Volatility": "4.12", "Max Drawdown": "-3.05",
+               "Drawdown Peak": "24-09-2025", "Drawdown Trough": "04-03-2026",
+               "Sharpe": "0.91", "Sortino": "1.32", "Beta": "0.21", "Correlation": "0.64"},
+        "3Y": {...}, "5Y": {...}
+    }
+
+Every window ends at the fund's latest NAV date and starts at the as-of NAV
+one horizon earlier (the same rule calculate.py uses). All schemes are
+computed together on the aligned schemes x trading-days NAV matrix
+(navmatrix.py), one vectorised pass per window:
+    - daily returns are taken between a scheme's consecutive NAVs;
+    - volatility is their standard deviation, annualised with sqrt(252);
+    - Sharpe and Sortino use the window's CAGR in excess of the risk-free rate,
+      over volatility and downside deviation (returns below the daily
+      risk-free rate) respectively;
+    - beta and correlation against Nifty 50 use returns over the dates on
+      which both the scheme and Nifty have a value.
+Values are percentages (volatility, drawdown) or ratios, formatted to two
+decimals like the returns fields; a window longer than the history is null.
+
+The risk-free rate defaults to RISK_FREE_RATE below and can be overridden
+with the RISK_FREE_RATE environment variable (annual, e.g. 0.065 for 6.5%).
+"""
+
+import os
+import json
+import warnings
+
+import numpy as np
+
+from navmatrix import load_matrix, forward_fill
+from navstore import NIFTY_CODE, date_to_ordinal, ordinal_to_display_date
+from navseries import shift_months
+
+# Configurable variables
+RISK_FREE_RATE = float(os.getenv('RISK_FREE_RATE', '0.065'))  # Annual risk-free rate
+TRADING_DAYS = 252  # Annualisation factor for daily returns
+WINDOWS = [('1Y', 1), ('3Y', 3), ('5Y', 5)]
+
+
+def _format(values, valid):
+    return [format(float(v), ".2f") if ok and np.isfinite(v) else None for v, ok in zip(values, valid)]
+
+
+def _last_present_index(values):
+    """For every cell, the column of the last non-NaN value at or before it (-1 if none)."""
+    present = ~np.isnan(values)
+    idx = np.where(present, np.arange(values.shape[1]), -1)
+    return np.maximum.accumulate(idx, axis=1)
+
+
+def _previous_value_returns(values, present):
+    """Returns between consecutive present values of each row (NaN where not present or no previous)."""
+    filled = forward_fill(np.where(present, values, np.nan))
+    previous = np.full_like(filled, np.nan)
+    previous[:, 1:] = filled[:, :-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(present, values / previous - 1, np.nan)
+
+
+def window_metrics(values, axis, end_cols, years, nifty, risk_free_rate=RISK_FREE_RATE):
+    """Risk metrics for every row of values (rows x trading days) over a window ending at end_cols."""
+    rows, days = values.shape
+    cols = np.arange(days)
+    last_present = _last_present_index(values)
+
+    # Window start: the as-of NAV one horizon before each row's end date
+    end_ordinals = axis[end_cols]
+    start_ordinals = shift_months(end_ordinals, -12 * years)
+    start_axis_cols = np.searchsorted(axis, start_ordinals, side='right') - 1
+    start_cols = np.where(start_axis_cols >= 0,
+                          last_present[np.arange(rows), np.maximum(start_axis_cols, 0)], -1)
+    valid = start_cols >= 0
+
+    in_window = (cols >= start_cols[:, None]) & (cols <= end_cols[:, None]) & valid[:, None]
+    present = in_window & ~np.isnan(values)
+    window_values = np.where(present, values, np.nan)
+
+    # Rows without a complete window are all-NaN; their empty-slice warnings are expected
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        # Daily returns between consecutive NAVs inside the window
+        daily = _previous_value_returns(window_values, present)
+        observations = np.sum(~np.isnan(daily), axis=1)
+        valid &= observations >= 2
+        volatility = np.nanstd(np.where(valid[:, None], daily, np.nan), axis=1, ddof=1) * np.sqrt(TRADING_DAYS)
+
+        start_navs = values[np.arange(rows), np.maximum(start_cols, 0)]
+        end_navs = values[np.arange(rows), end_cols]
+        cagr = (end_navs / start_navs) ** (1 / years) - 1
+        excess = cagr - risk_free_rate
+        sharpe = excess / volatility
+
+        daily_risk_free = (1 + risk_free_rate) ** (1 / TRADING_DAYS) - 1
+        shortfall = np.minimum(daily - daily_risk_free, 0)
+        downside = np.sqrt(np.nanmean(np.where(valid[:, None], shortfall ** 2, np.nan), axis=1)) * np.sqrt(TRADING_DAYS)
+        sortino = excess / downside
+
+        # Max drawdown with its peak and trough dates
+        filled = forward_fill(window_values)
+        running_peak = np.fmax.accumulate(filled, axis=1)
+        drawdown = np.where(in_window, filled / running_peak - 1, np.nan)
+        trough_cols = np.argmin(np.where(np.isnan(drawdown), np.inf, drawdown), axis=1)
+        max_drawdown = drawdown[np.arange(rows), trough_cols]
+        peak_values = running_peak[np.arange(rows), trough_cols]
+        peak_cols = np.argmax(present & (values == peak_values[:, None]) & (cols <= trough_cols[:, None]), axis=1)
+
+        # Beta / correlation against Nifty over the dates where both have a value
+        joint = present & ~np.isnan(nifty)[None, :]
+        fund_joint = _previous_value_returns(np.where(joint, values, np.nan), joint)
+        nifty_joint = _previous_value_returns(np.where(joint, nifty[None, :], np.nan), joint)
+        both = ~np.isnan(fund_joint) & ~np.isnan(nifty_joint)
+        fund_joint = np.where(both, fund_joint, np.nan)
+        nifty_joint = np.where(both, nifty_joint, np.nan)
+        fund_dev = fund_joint - np.nanmean(fund_joint, axis=1)[:, None]
+        nifty_dev = nifty_joint - np.nanmean(nifty_joint, axis=1)[:, None]
+        covariance = np.nanmean(fund_dev * nifty_dev, axis=1)
+        nifty_variance = np.nanmean(nifty_dev ** 2, axis=1)
+        beta = covariance / nifty_variance
+        correlation = covariance / np.sqrt(np.nanmean(fund_dev ** 2, axis=1) * nifty_variance)
+        has_pairs = np.sum(both, axis=1) >= 2
+
+    return {
+        'Volatility': _format(volatility * 100, valid),
+        'Max Drawdown': _format(max_drawdown * 100, valid),
+        'Drawdown Peak': [ordinal_to_display_date(axis[c]) if ok else None for c, ok in zip(peak_cols, valid)],
+        'Drawdown Trough': [ordinal_to_display_date(axis[c]) if ok else None for c, ok in zip(trough_cols, valid)],
+        'Sharpe': _format(sharpe, valid),
+        'Sortino': _format(sortino, valid),
+        'Beta': _format(beta, valid & has_pairs),
+        'Correlation': _format(correlation, valid & has_pairs),
+    }
+
+
+def calculate_risk(funds, matrix, risk_free_rate=RISK_FREE_RATE):
+    """Return one {"1Y": {...}, "3Y": {...}, "5Y": {...}} dict per fund (None without history)."""
+    codes = [fund['Scheme Code'] for fund in funds]
+    known = [code in matrix.row_index for code in codes]
+    rows = [matrix.row_index[code] for code, ok in zip(codes, known) if ok]
+    axis = np.asarray(matrix.ordinals)
+    values = np.asarray(matrix.values[rows]) if rows else np.empty((0, len(axis)))
+    nifty = (np.asarray(matrix.values[matrix.row_index[NIFTY_CODE]]) if NIFTY_CODE in matrix.row_index
+             else np.full(len(axis), np.nan))
+
+    # Windows end at each fund's latest date (as of data.json), on its last NAV on or before it
+    fund_dates = np.array([date_to_ordinal(fund['Date']) for fund, ok in zip(funds, known) if ok], dtype=np.int64)
+    end_axis_cols = np.searchsorted(axis, fund_dates, side='right') - 1
+    end_cols = _last_present_index(values)[np.arange(len(rows)), np.maximum(end_axis_cols, 0)]
+    has_history = end_cols >= 0
+    end_cols = np.maximum(end_cols, 0)
+
+    per_window = {label: window_metrics(values, axis, end_cols, years, nifty, risk_free_rate)
+                  for label, years in WINDOWS}
+
+    results = []
+    row = 0
+    for ok in known:
+        if not ok or not has_history[row]:
+            results.append(None)
+        else:
+            results.append({
+                label: {metric: column[row] for metric, column in metrics.items()}
+                for label, metrics in per_window.items()
+            })
+        row += ok
+    return results
+
+
+if __name__ == "__main__":
+    with open('data/data.json', 'r') as file:
+        base_data = json.load(file)
+
+    risk = calculate_risk(base_data, load_matrix())
+    changed = 0
+    for fund, fund_risk in zip(base_data, risk):
+        if fund_risk is None:
+            print(f"No NAV history for {fund['Scheme Code']}. Skipping risk metrics...")
+            continue
+        if fund.get('Risk') != fund_risk:
+            fund['Risk'] = fund_risk
+            changed += 1
+
+    if changed:
+        with open('data/data.json', 'w') as file:
+            json.dump(base_data, file, indent=4)
+    print(f"Risk metrics (risk-free rate {RISK_FREE_RATE:.2%}) updated for {changed} of {len(base_data)} funds.")
@@ -0,0 +1,123 @@
+"""
+Rolling-returns distributions for every scheme.
+
+For every trading day of a scheme's history, the 1Y/3Y/5Y rolling return is
+the NAV on that day against the as-of NAV (last NAV on or before) exactly one
+horizon earlier, the same rule calculate.py uses for point-to-point returns.
+1Y is a simple return; 3Y and 5Y are annualised (CAGR). All windows of a
+series are computed with array operations (vectorised date shift + one
+searchsorted), and the distribution of each horizon is summarised as count,
+min, max, mean, median, 5th/25th/75th/95th percentiles and the share of
+negative windows, all in percent.
+
+Output: public/api/rolling/{scheme_code}.json (plus nifty.json), e.g.
+    {"data": {"1Y": {"windows": 4300, "min": -21.4, ..., "negative": 8.35}, ...},
+     "metadata": {"dataType": "Rolling Returns", "from": ..., "lastUpdated": ...}}
+"""
+
+import os
+import json
+
+import numpy as np
+
+from navstore import NavStore, ordinal_to_display_date
+from navseries import shift_months
+from tasks import DEFAULT_JOBS, jobs_from_argv, run_per_scheme
+
+OUTPUT_DIR = 'public/api/rolling'
+
+# (label, horizon in months, CAGR years or None for a simple return)
+HORIZONS = [
+    ('1Y', 12, None),
+    ('3Y', 36, 3),
+    ('5Y', 60, 5),
+]
+PERCENTILES = [5, 25, 75, 95]
+
+
+def rolling_returns(series, months, years=None):
+    """(end ordinals, returns in percent) of every complete rolling window of the given horizon."""
+    if not len(series):
+        return series.ordinals[:0], np.empty(0)
+    starts = shift_months(series.ordinals, -months)
+    complete = starts >= series.ordinals[0]
+    ends = series.ordinals[complete]
+    past = series.asof_many(starts[complete])
+    current = series.navs[complete]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = current / past
+        returns = (ratio ** (1 / years) - 1) * 100 if years else (ratio - 1) * 100
+    valid = np.isfinite(returns)
+    return ends[valid], returns[valid]
+
+
+def summarise(returns):
+    """Distribution summary of a returns array (None when there are no windows)."""
+    if not len(returns):
+        return None
+    quantiles = np.percentile(returns, [0, 50, 100] + PERCENTILES)
+    summary = {
+        'windows': int(len(returns)),
+        'min': round(float(quantiles[0]), 2),
+        'max': round(float(quantiles[2]), 2),
+        'mean': round(float(returns.mean()), 2),
+        'median': round(float(quantiles[1]), 2),
+    }
+    for p, value in zip(PERCENTILES, quantiles[3:]):
+        summary[f'p{p}'] = round(float(value), 2)
+    summary['negative'] = round(float((returns < 0).mean() * 100), 2)
+    return summary
+
+
+def rolling_summary(series):
+    """{horizon: summary} for one series."""
+    return {label: summarise(rolling_returns(series, months, years)[1]) for label, months, years in HORIZONS}
+
+
+_store = None
+
+
+def get_store():
+    """The NAV store, loaded once per (worker) process."""
+    global _store
+    if _store is None:
+        _store = NavStore.load()
+    return _store
+
+
+def write_rolling_files(scheme_codes):
+    """Write the files of one shard of scheme codes; returns {code: output path}."""
+    store = get_store()
+    written = {}
+    for scheme_code in scheme_codes:
+        series = store.get(scheme_code)
+        if not len(series):
+            continue
+
+        output_data = {
+            "data": rolling_summary(series),
+            "metadata": {
+                "dataType": "Rolling Returns",
+                "unit": "percent",
+                "annualised": [label for label, _, years in HORIZONS if years],
+                "from": ordinal_to_display_date(series.ordinals[0]),
+                "lastUpdated": ordinal_to_display_date(series.ordinals[-1])
+            }
+        }
+
+        output_file_path = os.path.join(OUTPUT_DIR, f"{scheme_code}.json")
+        with open(output_file_path, 'w') as output_file:
+            json.dump(output_data, output_file, indent=4)
+        written[scheme_code] = output_file_path
+    return written
+
+
+def generate_rolling_api_files(jobs=DEFAULT_JOBS):
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    for output_file_path in run_per_scheme(write_rolling_files, get_store().codes(), jobs).values():
+        print(f"Generated {output_file_path}")
+
+
+if __name__ == "__main__":
+    # `--jobs N`: number of worker processes (1 = serial)
+    generate_rolling_api_files(jobs_from_argv())
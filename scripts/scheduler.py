@@ -0,0 +1,202 @@
+"""
+Rate-limited task scheduler for per-scheme downloads from the NPS Trust endpoint.
+
+backfill.py and fetch.py's new-scheme backfill submit one task per scheme:
+
+    scheduler = Scheduler()
+    scheduler.submit(scheme_code, download_fn, *args, priority=0)
+    results = scheduler.run()            # {key: result} of the tasks that succeeded
+    scheduler.run(on_result)             # or hand each result to on_result instead of keeping it
+    scheduler.completed                  # tasks that succeeded so far
+    scheduler.failures                   # {key: last exception} of the tasks that gave up
+
+Requests start at the rate a token bucket allows: RATE tokens per second,
+holding up to BURST tokens. At most CONCURRENCY tasks are in flight at once,
+or, with a controller (aimd.AIMDController), as many as its current window
+allows. The controller is told every task's latency and failures.
+Ready tasks start in priority order (lower first, e.g. schemes with no
+history before the rest), then in submission order.
+
+A task fails by raising. It is then put back on a delay queue with
+exponential backoff (BACKOFF * 2 ** (attempt - 1), capped at MAX_BACKOFF,
+plus jitter; at least the Retry-After of a RetryableError). It is retried
+up to MAX_ATTEMPTS times in all. A waiting task does not hold a worker:
+the other tasks keep running meanwhile. Tasks should therefore download
+with http_client's retries=0 and leave retrying to the scheduler.
+
+on_result(key, result) is called from the calling thread as each task
+succeeds, so it may write files without locking. Results handed to it are
+not kept, so a long run holds no more than the tasks in flight.
+"""
+
+import os
+import time
+import heapq
+import queue
+import random
+import logging
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Configurable variables
+RATE = float(os.getenv('SCHEDULER_RATE', '2.0'))  # Task starts per second (token refill rate)
+BURST = 4  # Tokens the bucket holds; starts allowed back to back after an idle spell
+CONCURRENCY = int(os.getenv('SCHEDULER_CONCURRENCY', '4'))  # Tasks in flight at once
+MAX_ATTEMPTS = 4  # Attempts per task before it is given up
+BACKOFF = 2.0  # Seconds before the first retry; doubles with every retry
+MAX_BACKOFF = 60.0  # Cap on the retry delay (seconds)
+
+
+class RetryableError(Exception):
+    """A transient failure (throttling, 5xx); retry_after is the server's requested delay in seconds."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def retry_after_seconds(response):
+    """The Retry-After header of a response in seconds, if it is given as a number."""
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Token bucket: `rate` tokens per second, holding at most `burst`."""
+
+    def __init__(self, rate=RATE, burst=BURST, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = float(burst)
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def take(self):
+        """Take a token if one is available and return 0, else return the seconds until one is."""
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+
+class Task:
+    __slots__ = ('key', 'fn', 'args', 'priority', 'attempts')
+
+    def __init__(self, key, fn, args, priority):
+        self.key = key
+        self.fn = fn
+        self.args = args
+        self.priority = priority
+        self.attempts = 0
+
+
+class Scheduler:
+    """Runs submitted tasks under a token-bucket rate, a concurrency cap and retry-with-backoff."""
+
+    def __init__(self, rate=RATE, burst=BURST, concurrency=CONCURRENCY, max_attempts=MAX_ATTEMPTS,
+                 backoff=BACKOFF, max_backoff=MAX_BACKOFF, controller=None):
+        self.bucket = TokenBucket(rate, burst)
+        self.concurrency = concurrency
+        self.controller = controller  # e.g. aimd.AIMDController; sizes the in-flight window instead of concurrency
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.results = {}
+        self.completed = 0
+        self.failures = {}
+        self.retries = 0
+        self._ready = []  # heap of (priority, seq, task)
+        self._delayed = []  # heap of (due, seq, task)
+        self._seq = itertools.count()
+
+    def submit(self, key, fn, *args, priority=0):
+        """Queue fn(*args) under key; lower priority values start first."""
+        heapq.heappush(self._ready, (priority, next(self._seq), Task(key, fn, args, priority)))
+
+    def __len__(self):
+        return len(self._ready) + len(self._delayed)
+
+    def _retry_delay(self, task, error):
+        delay = min(self.max_backoff, self.backoff * 2 ** (task.attempts - 1)) + random.uniform(0, self.backoff / 2)
+        return max(delay, getattr(error, 'retry_after', None) or 0)
+
+    @staticmethod
+    def _run_task(task, done):
+        started = time.monotonic()
+        try:
+            result, error = task.fn(*task.args), None
+        except Exception as e:
+            result, error = None, e
+        done.put((task, result, error, started, time.monotonic() - started))
+
+    def _limit(self):
+        return self.controller.limit if self.controller else self.concurrency
+
+    def _finish(self, task, result, error, started, latency, on_result):
+        if self.controller:
+            if error is None:
+                self.controller.on_success(latency, started)
+            else:
+                self.controller.on_congestion(str(error), started)
+        if error is None:
+            self.completed += 1
+            if on_result:
+                on_result(task.key, result)
+            else:
+                self.results[task.key] = result
+        elif task.attempts < self.max_attempts:
+            delay = self._retry_delay(task, error)
+            self.retries += 1
+            logger.warning(f"{task.key}: attempt {task.attempts} failed ({error}); retrying in {delay:.1f}s")
+            heapq.heappush(self._delayed, (time.monotonic() + delay, next(self._seq), task))
+        else:
+            self.failures[task.key] = error
+            logger.error(f"{task.key}: giving up after {task.attempts} attempts ({error})")
+
+    def run(self, on_result=None):
+        """Run every queued task to success or final failure.
+
+        Returns {key: result} of the successes, or an empty dict when on_result consumed them.
+        """
+        done = queue.Queue()
+        in_flight = 0
+        workers = self.controller.maximum if self.controller else self.concurrency
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while self._ready or self._delayed or in_flight:
+                now = time.monotonic()
+                while self._delayed and self._delayed[0][0] <= now:
+                    _, seq, task = heapq.heappop(self._delayed)
+                    heapq.heappush(self._ready, (task.priority, seq, task))
+
+                timeout = None
+                if self._ready and in_flight < self._limit():
+                    wait = self.bucket.take()
+                    if not wait:
+                        _, _, task = heapq.heappop(self._ready)
+                        task.attempts += 1
+                        in_flight += 1
+                        executor.submit(self._run_task, task, done)
+                        continue
+                    timeout = wait
+                if self._delayed:
+                    due = self._delayed[0][0] - now
+                    timeout = due if timeout is None else min(timeout, due)
+
+                try:
+                    task, result, error, started, latency = done.get(timeout=timeout)
+                except queue.Empty:
+                    continue
+                in_flight -= 1
+                self._finish(task, result, error, started, latency, on_result)
+        return self.results
+
@@ -0,0 +1,207 @@
+"""
+SIP and lumpsum outcomes per fund, fund vs Nifty 50, with a vectorised XIRR.
+
+For every scheme and each of the 1Y, 3Y, 5Y and ALL ranges (ending at the
+fund's latest NAV), on the dates where both the fund and Nifty have a value
+(the same matching the fund page does):
+    lumpsum  LUMPSUM_AMOUNT invested on the first date of the range
+    sip      SIP_INSTALLMENT invested every month on the first date on or
+             after each monthly anniversary of the range start
+Each outcome reports the amount invested, final value, absolute return and
+XIRR (actual/365) for the fund and for Nifty. A range longer than the fund's
+history is null (ALL always starts at the first matched date).
+
+xirr() solves many cash-flow sets at once: Newton iterations on all sets in
+parallel, with a bisection fallback for the sets that do not converge. It is
+independent of the data layout so it can back a server-side SIP calculator.
+
+Output: public/api/sip/{scheme_code}.json
+"""
+
+import os
+import json
+from datetime import date
+
+import numpy as np
+
+from navstore import NavStore, NIFTY_CODE, ordinal_to_display_date
+from navseries import shift_months
+
+OUTPUT_DIR = 'public/api/sip'
+
+# Configurable variables
+LUMPSUM_AMOUNT = 10000
+SIP_INSTALLMENT = 1000
+RANGES = [('1Y', 12), ('3Y', 36), ('5Y', 60), ('ALL', None)]
+START_TOLERANCE_DAYS = 7  # A range counts as covered if the history starts within this many days of its start
+
+
+def xirr(amounts, days, tol=1e-9, max_iter=50):
+    """Annual IRR of many cash-flow sets at once.
+
+    amounts and days are (sets x flows) arrays: cash flows (negative = invested)
+    and their day offsets from the first flow; pad unused slots with amount 0.
+    Returns an array of rates (NaN where no sign change / no solution).
+    """
+    amounts = np.asarray(amounts, dtype=float)
+    years = np.asarray(days, dtype=float) / 365.0
+
+    def npv(rate, rows):
+        return np.sum(amounts[rows] * (1 + rate[:, None]) ** -years[rows], axis=1)
+
+    def npv_derivative(rate, rows):
+        return np.sum(-years[rows] * amounts[rows] * (1 + rate[:, None]) ** (-years[rows] - 1), axis=1)
+
+    rate = np.full(len(amounts), 0.1)
+    active = np.arange(len(amounts))
+    with np.errstate(all='ignore'):
+        # Newton on every set still iterating
+        for _ in range(max_iter):
+            if not len(active):
+                break
+            step = npv(rate[active], active) / npv_derivative(rate[active], active)
+            new_rate = rate[active] - step
+            # Sets that jump out of the domain are left to the bisection fallback
+            new_rate = np.where(np.isfinite(new_rate) & (new_rate > -1), new_rate, np.nan)
+            rate[active] = new_rate
+            active = active[~np.isnan(new_rate) & (np.abs(step) >= tol)]
+        rate[active] = np.nan  # Did not converge within max_iter
+
+        # Bisection fallback on [-99.99%, 10000%] for everything Newton did not settle
+        fallback = np.flatnonzero(np.isnan(rate))
+        if len(fallback):
+            lo = np.full(len(fallback), -0.9999)
+            hi = np.full(len(fallback), 100.0)
+            f_lo = npv(lo, fallback)
+            bracketed = np.sign(f_lo) != np.sign(npv(hi, fallback))
+            for _ in range(200):
+                mid = (lo + hi) / 2
+                f_mid = npv(mid, fallback)
+                left = np.sign(f_mid) == np.sign(f_lo)
+                lo = np.where(left, mid, lo)
+                f_lo = np.where(left, f_mid, f_lo)
+                hi = np.where(left, hi, mid)
+            rate[fallback] = np.where(bracketed, (lo + hi) / 2, np.nan)
+    return rate
+
+
+def matched_points(series, nifty):
+    """(ordinals, fund navs, nifty navs) on the dates where both have a value."""
+    common, fund_idx, nifty_idx = np.intersect1d(series.ordinals, nifty.ordinals, assume_unique=True,
+                                                 return_indices=True)
+    return common, series.navs[fund_idx], nifty.navs[nifty_idx]
+
+
+def range_flows(ordinals, months):
+    """Positions of the lumpsum start and the SIP installment dates for one range (None if not covered)."""
+    end = int(ordinals[-1])
+    if months is None:
+        start_pos = 0
+        start = int(ordinals[0])
+    else:
+        start = int(shift_months([end], -months)[0])
+        start_pos = int(np.searchsorted(ordinals, start, side='left'))
+        if int(ordinals[start_pos]) - start > START_TOLERANCE_DAYS:
+            return None  # History is shorter than the range
+        start = int(ordinals[start_pos])
+    first, last = date.fromordinal(start), date.fromordinal(end)
+    months_between = (last.year - first.year) * 12 + last.month - first.month
+    targets = shift_months(np.full(months_between + 1, start), np.arange(months_between + 1))
+    targets = targets[targets <= end]
+    sip_pos = np.unique(np.searchsorted(ordinals, targets, side='left'))
+    sip_pos = sip_pos[sip_pos < len(ordinals) - 1]  # No installment on the valuation date itself
+    return start_pos, sip_pos
+
+
+def _outcome(invested, value, rate):
+    return {
+        "invested": round(float(invested), 2),
+        "value": round(float(value), 2),
+        "return": round(float((value - invested) / invested * 100), 2),
+        "xirr": round(float(rate * 100), 2) if np.isfinite(rate) else None,
+    }
+
+
+def sip_scenarios(store, codes):
+    """{code: {range: {...}}} for the given scheme codes, with all XIRRs solved in one batch."""
+    nifty = store.get(NIFTY_CODE)
+    cases = []  # (code, label, kind, side, invested, value, amounts, days, start, end, installments)
+    for code in codes:
+        series = store.get(code)
+        if series is None or not len(series) or nifty is None:
+            continue
+        ordinals, fund_navs, nifty_navs = matched_points(series, nifty)
+        if len(ordinals) < 2:
+            continue
+        for label, months in RANGES:
+            flows = range_flows(ordinals, months)
+            if flows is None:
+                cases.append((code, label, None, None, None, None, None, None, None, None, None))
+                continue
+            start_pos, sip_pos = flows
+            end_pos = len(ordinals) - 1
+            day_offsets = ordinals[sip_pos] - ordinals[start_pos]
+            horizon = ordinals[end_pos] - ordinals[start_pos]
+            for side, navs in (('fund', fund_navs), ('nifty', nifty_navs)):
+                lumpsum_value = LUMPSUM_AMOUNT * navs[end_pos] / navs[start_pos]
+                cases.append((code, label, 'lumpsum', side, LUMPSUM_AMOUNT, lumpsum_value,
+                              [-LUMPSUM_AMOUNT, lumpsum_value], [0, horizon],
+                              ordinals[start_pos], ordinals[end_pos], 1))
+                units = np.sum(SIP_INSTALLMENT / navs[sip_pos])
+                sip_value = units * navs[end_pos]
+                cases.append((code, label, 'sip', side, SIP_INSTALLMENT * len(sip_pos), sip_value,
+                              np.append(np.full(len(sip_pos), -SIP_INSTALLMENT), sip_value),
+                              np.append(day_offsets, horizon),
+                              ordinals[start_pos], ordinals[end_pos], len(sip_pos)))
+
+    solvable = [case for case in cases if case[2] is not None]
+    width = max((len(case[6]) for case in solvable), default=1)
+    amounts = np.zeros((len(solvable), width))
+    days = np.zeros((len(solvable), width))
+    for i, case in enumerate(solvable):
+        amounts[i, :len(case[6])] = case[6]
+        days[i, :len(case[7])] = case[7]
+    rates = xirr(amounts, days) if solvable else np.empty(0)
+
+    results = {}
+    rate_iter = iter(rates)
+    for code, label, kind, side, invested, value, _, _, start, end, installments in cases:
+        ranges = results.setdefault(code, {})
+        if kind is None:
+            ranges[label] = None
+            continue
+        entry = ranges.setdefault(label, {
+            "from": ordinal_to_display_date(start),
+            "to": ordinal_to_display_date(end),
+            "lumpsum": {"amount": LUMPSUM_AMOUNT},
+            "sip": {"installment": SIP_INSTALLMENT},
+        })
+        if kind == 'sip':
+            entry['sip']['installments'] = installments
+        entry[kind][side] = _outcome(invested, value, next(rate_iter))
+    return results
+
+
+def generate_sip_api_files(store):
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    results = sip_scenarios(store, store.scheme_codes())
+
+    for scheme_code, ranges in results.items():
+        output_data = {
+            "data": ranges,
+            "metadata": {
+                "currency": "INR",
+                "dataType": "SIP",
+                "benchmark": "Nifty 50",
+                "lastUpdated": ordinal_to_display_date(store.get(scheme_code).ordinals[-1])
+            }
+        }
+        output_file_path = os.path.join(OUTPUT_DIR, f"{scheme_code}.json")
+        with open(output_file_path, 'w') as output_file:
+            json.dump(output_data, output_file, indent=4)
+
+        print(f"Generated {output_file_path}")
+
+
+if __name__ == "__main__":
+    generate_sip_api_files(NavStore.load())
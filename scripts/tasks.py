@@ -0,0 +1,69 @@
+"""
+Per-scheme task runner shared by the build scripts.
+
+run_per_scheme(worker, codes, jobs) splits the scheme codes into contiguous
+shards, one per job, and runs worker(shard) for each shard in a
+ProcessPoolExecutor. A worker only receives its own scheme codes and loads
+what it needs (NAV store, data.json, templates) once per process. It returns
+{code: result}, and the shard results are merged back in the order of
+`codes`, so output and log order do not depend on scheduling.
+
+jobs defaults to the CPU count. jobs=1 runs everything serially in the
+calling process, which is the mode to use with a debugger or profiler.
+Scripts read the value from a `--jobs N` command-line option
+(jobs_from_argv); build.py forwards its own --jobs to them.
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_JOBS = os.cpu_count() or 1
+
+
+def jobs_from_argv(argv=None):
+    """Value of a `--jobs N` / `--jobs=N` option, or DEFAULT_JOBS."""
+    argv = sys.argv[1:] if argv is None else argv
+    for i, arg in enumerate(argv):
+        if arg == '--jobs' and i + 1 < len(argv):
+            value = argv[i + 1]
+        elif arg.startswith('--jobs='):
+            value = arg.split('=', 1)[1]
+        else:
+            continue
+        jobs = int(value)
+        if jobs < 1:
+            raise ValueError(f"--jobs must be at least 1, got {jobs}")
+        return jobs
+    return DEFAULT_JOBS
+
+
+def shard(codes, jobs):
+    """Split codes into at most `jobs` contiguous shards of nearly equal size."""
+    size, extra = divmod(len(codes), jobs)
+    shards = []
+    start = 0
+    for i in range(jobs):
+        stop = start + size + (i < extra)
+        if stop > start:
+            shards.append(codes[start:stop])
+        start = stop
+    return shards
+
+
+def run_per_scheme(worker, codes, jobs=DEFAULT_JOBS):
+    """Run worker over shards of codes and return {code: result} in the order of codes.
+
+    worker must be a module-level function taking a list of scheme codes and
+    returning a {code: result} dict (codes it skips may be left out).
+    """
+    codes = list(codes)
+    shards = shard(codes, max(1, jobs))
+    if len(shards) <= 1:
+        results = worker(codes)
+    else:
+        results = {}
+        with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+            for shard_results in executor.map(worker, shards):
+                results.update(shard_results)
+    return {code: results[code] for code in codes if code in results}
@@ -1,8 +1,7 @@
 import os
-import requests
-import json
+import http_client
 from datetime import datetime
-from pathlib import Path
+from navstore import NavStore, NIFTY_CODE
 
 # Set the base URL for your Cloudflare Worker
 WORKER_BASE_URL = 'https://npsnav-write.rishikeshsreehari.workers.dev'
@@ -19,7 +18,7 @@ headers = {'Authorization': f'Bearer {AUTH_TOKEN}'}
 print("Using AUTH_TOKEN:", AUTH_TOKEN)  # Confirm token value
 
 # Make the GET request to the Cloudflare Worker endpoint with the Authorization header
-response = requests.get(f"{WORKER_BASE_URL}/latest-fund?fund_id=SM003007", headers=headers)
+response = http_client.get(f"{WORKER_BASE_URL}/latest-fund?fund_id=SM003007", headers=headers)
 print("Status Code:", response.status_code)
 print("Response Content:", response.text)
 
@@ -35,7 +34,7 @@ def reformat_date(date_str):
 
 def get_latest_date_for_fund(fund_id):
     """Fetch the latest NAV date for a given fund using the Cloudflare Worker."""
-    response = requests.get(f"{WORKER_BASE_URL}/latest-fund", params={'fund_id': fund_id}, headers=headers)
+    response = http_client.get(f"{WORKER_BASE_URL}/latest-fund", params={'fund_id': fund_id}, headers=headers)
     if response.ok:
         result = response.json()
         return datetime.strptime(result['date'], DATE_FORMAT).date() if result['date'] else None
@@ -44,7 +43,7 @@ def get_latest_date_for_fund(fund_id):
 
 def get_latest_nifty_date():
     """Fetch the latest NAV date for Nifty using the Cloudflare Worker."""
-    response = requests.get(f"{WORKER_BASE_URL}/latest-nifty", headers=headers)
+    response = http_client.get(f"{WORKER_BASE_URL}/latest-nifty", headers=headers)
     if response.ok:
         result = response.json()
         return datetime.strptime(result['date'], DATE_FORMAT).date() if result['date'] else None
@@ -57,7 +56,7 @@ def update_fund_nav_data(fund_id, new_data):
         # Reformat date to match the database format
         formatted_date = reformat_date(date)
         data = {'fund_id': fund_id, 'date': formatted_date, 'nav': nav}
-        response = requests.post(f"{WORKER_BASE_URL}/update-fund", json=data, headers=headers)
+        response = http_client.post(f"{WORKER_BASE_URL}/update-fund", json=data, headers=headers)
         if not response.ok:
             raise Exception(f"Failed to update NAV for fund {fund_id} on {formatted_date}")
 
@@ -67,23 +66,13 @@ def update_nifty_data(new_data):
         # Reformat date to match the database format
         formatted_date = reformat_date(date)
         data = {'date': formatted_date, 'nav': nav}
-        response = requests.post(f"{WORKER_BASE_URL}/update-nifty", json=data, headers=headers)
+        response = http_client.post(f"{WORKER_BASE_URL}/update-nifty", json=data, headers=headers)
         if not response.ok:
             raise Exception(f"Failed to update Nifty data for {formatted_date}")
 
-def load_json_data(file_path):
-    """Load data from a JSON file."""
-    with open(file_path, 'r') as f:
-        return json.load(f)
-
-def update_fund_data(data_dir='data'):
-    """Update NAV data for each fund from its JSON file."""
-    for json_file in Path(data_dir).glob("*.json"):
-        # Skip specific files
-        if json_file.stem in ['data', 'nifty']:
-            continue
-
-        fund_id = json_file.stem
+def update_fund_data(store):
+    """Update NAV data for each fund from its series in the NAV store."""
+    for fund_id in store.scheme_codes():
         # Skip ignored fund IDs
         if fund_id in ignore_fund_ids:
             print(f"Skipping fund {fund_id} as it's in the ignore list.")
@@ -92,7 +81,7 @@ def update_fund_data(data_dir='data'):
         print(f"Processing fund {fund_id}...")
         latest_date = get_latest_date_for_fund(fund_id)
         
-        fund_data = load_json_data(json_file)
+        fund_data = store.to_dict(fund_id)
         
         # Filter new data only (dates after the latest date)
         new_data = {
@@ -107,11 +96,11 @@ def update_fund_data(data_dir='data'):
         else:
             print(f"No new data for {fund_id}.")
 
-def update_nifty_data_from_json(nifty_json_path='data/nifty.json'):
-    """Update Nifty data from the JSON file."""
+def update_nifty_data_from_store(store):
+    """Update Nifty data from its series in the NAV store."""
     latest_date = get_latest_nifty_date()
     
-    nifty_data = load_json_data(nifty_json_path)
+    nifty_data = store.to_dict(NIFTY_CODE)
     
     # Filter new data only
     new_data = {
@@ -128,8 +117,9 @@ def update_nifty_data_from_json(nifty_json_path='data/nifty.json'):
 
 def main():
     try:
-        update_fund_data('data')  # Directory containing JSON data for funds
-        update_nifty_data_from_json('data/nifty.json')  # Path to Nifty JSON file
+        store = NavStore.load()
+        update_fund_data(store)  # Fund series from the NAV store
+        update_nifty_data_from_store(store)  # Nifty series from the NAV store
         print("Database updated successfully.")
     except Exception as e:
         print(f"Error: {e}")
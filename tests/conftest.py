@@ -0,0 +1,22 @@
+import os
+import shutil
+
+import pytest
+
+from navstore import NavStore
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """A scratch copy of the committed data/ (derived .bin files are rebuilt from it), as the working directory."""
+    shutil.copytree(os.path.join(REPO, 'data'), tmp_path / 'data', ignore=shutil.ignore_patterns('*.bin', '*.tmp'))
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture(scope='session')
+def store(tmp_path_factory):
+    """The committed series as a NavStore (read-only: its file lives in a scratch directory)."""
+    return NavStore.from_json_dir(os.path.join(REPO, 'data'), path=str(tmp_path_factory.mktemp('store') / 'navstore.bin'))
@@ -0,0 +1,69 @@
+"""AIMDController driving a Scheduler against a local stand-in server that throttles above its capacity."""
+
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+import http_client
+from aimd import AIMDController
+from scheduler import Scheduler, RetryableError, retry_after_seconds
+
+CAPACITY = 6  # Requests in flight the server serves; more get a 429
+TASKS = 300
+
+
+@pytest.fixture
+def url():
+    lock = threading.Lock()
+    state = {'in_flight': 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with lock:
+                state['in_flight'] += 1
+                load = state['in_flight']
+            try:
+                if load > CAPACITY:
+                    self.send_response(429)
+                    self.send_header('Retry-After', '0')
+                    self.end_headers()
+                    return
+                time.sleep(0.02 + 0.01 * load)  # Slower as it fills up
+                body = b"ID\tDATE OF NAV\tNAV VALUE\n1\t2026-08-24\t10.5\n"
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            finally:
+                with lock:
+                    state['in_flight'] -= 1
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/scheme-wise-nav-report-excel"
+    server.shutdown()
+
+
+def test_window_settles_near_the_servers_capacity(url):
+    def download(scheme_code):
+        response = http_client.get(url, retries=0, params={'navsubdataxls': scheme_code}, timeout=10)
+        if response.status_code in http_client.RETRY_STATUSES:
+            raise RetryableError(f"HTTP {response.status_code}", retry_after_seconds(response))
+        return response.content
+
+    controller = AIMDController(initial=2, maximum=16)
+    scheduler = Scheduler(rate=500, burst=16, controller=controller, max_attempts=8, backoff=0.05, max_backoff=0.2)
+    for i in range(TASKS):
+        scheduler.submit(f"SM{i:06d}", download, f"SM{i:06d}")
+    limits = []
+    scheduler.run(lambda key, result: limits.append(controller.limit))
+
+    assert scheduler.completed == TASKS and not scheduler.failures
+    settled = limits[len(limits) // 2:]
+    assert CAPACITY / 2 <= sum(settled) / len(settled) <= CAPACITY * 1.5
+    assert any(new < old for _, old, new, _ in controller.decisions), "throttling never decreased the window"
@@ -0,0 +1,39 @@
+"""backfill.py: completed schemes are committed to the store before they are checkpointed."""
+
+import json
+
+import pytest
+
+import backfill
+import checkpoint
+from navstore import NavStore
+
+
+def record(date_str, nav):
+    return {"Date": date_str, "PFM Code": "PFM001", "PFM Name": "SBI Pension Funds Pvt. Ltd.",
+            "Scheme Code": "SM001001", "Scheme Name": "SBI PENSION FUND SCHEME - CENTRAL GOVT", "NAV": nav}
+
+
+@pytest.fixture
+def journal(workdir, monkeypatch):
+    monkeypatch.setattr(checkpoint, 'CHECKPOINT_DIR', str(workdir / 'checkpoints'))
+    monkeypatch.setattr(backfill, '_store', None)
+    return checkpoint.CheckpointJournal('backfill', params={'months': backfill.BACKFILL_MONTHS})
+
+
+def test_batch_is_committed_then_journaled(workdir, journal):
+    backfill.commit_schemes([('SM001001', [record('12/30/2030', '60.5'), record('12/31/2030', '61.25')]),
+                             ('SM001002', [])], journal)
+
+    assert json.loads((workdir / 'data' / 'SM001001.json').read_text())['12/31/2030'] == '61.25'
+    assert NavStore.load().to_dict('SM001001')['12/30/2030'] == '60.5'
+    assert journal.done == {'SM001001', 'SM001002'}
+    assert backfill.checkpointed_latest_records(journal) == [record('12/31/2030', '61.25')]
+
+
+def test_resumed_run_reports_the_interrupted_runs_schemes(workdir, journal):
+    backfill.commit_schemes([('SM001001', [record('12/31/2030', '61.25')])], journal)
+
+    resumed = checkpoint.CheckpointJournal('backfill', params={'months': backfill.BACKFILL_MONTHS})
+    assert resumed.done == {'SM001001'}
+    assert backfill.checkpointed_latest_records(resumed) == [record('12/31/2030', '61.25')]
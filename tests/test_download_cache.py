@@ -0,0 +1,74 @@
+"""download_cache: revalidation and what happens when upstream cannot be reached."""
+
+import pytest
+import requests
+
+import download_cache
+import http_client
+from navdump import DumpSnapshot
+
+URL = 'https://example.invalid/nav-report-excel'
+DUMP = (b'SCHEME ID\tSCHEME NAME\tPFM NAME\tNAV VALUE\tDATE OF NAV\n'
+        b'SM001001\tSBI PENSION FUND SCHEME - CENTRAL GOVT\tSBI Pension Funds Pvt. Ltd.\t50.9874\t2026-08-21\n')
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=b'', headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+    def iter_content(self, chunk_size):
+        yield self.body
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(download_cache, 'CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setattr(download_cache, '_index', None)
+    monkeypatch.setattr(http_client, 'get', lambda url, **kwargs: FakeResponse(200, DUMP, {'ETag': '"v1"'}))
+    first = download_cache.fetch(URL)
+    assert first.ok and first.source == 'network'
+    return first
+
+
+def go_offline(monkeypatch):
+    def fail(url, **kwargs):
+        raise requests.ConnectionError('upstream down')
+    monkeypatch.setattr(http_client, 'get', fail)
+
+
+def test_not_modified_serves_the_cached_blob(cache, monkeypatch):
+    sent = {}
+
+    def not_modified(url, headers=None, **kwargs):
+        sent.update(headers)
+        return FakeResponse(304)
+    monkeypatch.setattr(http_client, 'get', not_modified)
+    download = download_cache.fetch(URL)
+    assert sent['If-None-Match'] == '"v1"'
+    assert download.source == 'revalidated' and download.sha256 == cache.sha256
+
+
+def test_network_failure_is_raised_by_default(cache, monkeypatch):
+    go_offline(monkeypatch)
+    with pytest.raises(requests.ConnectionError):
+        download_cache.fetch(URL)
+
+
+def test_stale_copy_is_opt_in_and_flagged(cache, monkeypatch):
+    go_offline(monkeypatch)
+    download = download_cache.fetch(URL, allow_stale=True)
+    assert download.ok and download.stale and download.sha256 == cache.sha256
+
+
+def test_unreachable_dump_is_unavailable_not_unchanged(cache, monkeypatch):
+    assert DumpSnapshot.fetch(URL).sha256 == cache.sha256
+    go_offline(monkeypatch)
+    assert DumpSnapshot.fetch(URL) is None
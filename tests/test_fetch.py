@@ -0,0 +1,26 @@
+"""fetch.py's scheme-list sync from the NPS Trust dump."""
+
+import json
+
+import fetch
+from navdump import DumpSnapshot
+
+
+def row(name, nav, date):
+    return {'name': name, 'pfm_name': 'SBI Pension Funds Pvt. Ltd.', 'nav': nav, 'date': date}
+
+
+def test_new_scheme_without_a_valid_nav_is_not_added(workdir):
+    data = json.loads((workdir / 'data' / 'data.json').read_text())
+    rows = {fund['Scheme Code']: row(fund['Scheme Name'], fund['NAV'], '2026-08-21') for fund in data}
+    rows['SM001901'] = row('NEW SCHEME - TIER I', '12.3456', '2026-08-21')
+    rows['SM001902'] = row('NO NAV SCHEME - TIER I', '', '2026-08-21')
+    rows['SM001903'] = row('NO DATE SCHEME - TIER I', '10.5', '')
+
+    added = fetch.sync_schemes_from_dump(DumpSnapshot(rows))
+
+    assert [fund['Scheme Code'] for fund in added] == ['SM001901']
+    saved = {fund['Scheme Code']: fund for fund in json.loads((workdir / 'data' / 'data.json').read_text())}
+    assert saved['SM001901']['NAV'] == '12.3456' and saved['SM001901']['Date'] == '08/21/2026'
+    assert 'SM001902' not in saved and 'SM001903' not in saved
+    assert all(float(fund['NAV']) for fund in saved.values())
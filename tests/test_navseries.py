@@ -0,0 +1,60 @@
+"""NavSeries primitives against plain scans over the committed series."""
+
+from datetime import date
+
+import numpy as np
+import pytest
+
+SAMPLE_EVERY = 5  # Series checked: every 5th code (the plain scans are slow)
+
+
+def sampled_series(store):
+    for code in store.codes()[::SAMPLE_EVERY]:
+        series = store.get(code)
+        if len(series):
+            yield code, series, [(int(o), float(v)) for o, v in zip(series.ordinals, series.navs)]
+
+
+def pairs(series):
+    return [(int(o), float(v)) for o, v in zip(series.ordinals, series.navs)]
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+def test_asof(store, rng):
+    for code, series, points in sampled_series(store):
+        for target in rng.integers(points[0][0] - 10, points[-1][0] + 10, 50).tolist():
+            earlier = [p for p in points if p[0] <= target]
+            assert series.asof(target) == (earlier[-1] if earlier else None), (code, target)
+
+
+def test_between(store, rng):
+    for code, series, points in sampled_series(store):
+        a, b = sorted(rng.integers(points[0][0] - 10, points[-1][0] + 10, 2).tolist())
+        assert pairs(series.between(a, b)) == [p for p in points if a <= p[0] <= b], (code, a, b)
+
+
+def test_resample_monthly(store):
+    for code, series, points in sampled_series(store):
+        month_ends = {}
+        for ordinal, nav in points:
+            d = date.fromordinal(ordinal)
+            month_ends[(d.year, d.month)] = (ordinal, nav)
+        assert pairs(series.resample('M')) == list(month_ends.values()), code
+
+
+def test_resample_weekly_is_monday_to_sunday(store):
+    for code, series, points in sampled_series(store):
+        week_ends = {}
+        for ordinal, nav in points:
+            week_ends[date.fromordinal(ordinal).isocalendar()[:2]] = (ordinal, nav)
+        assert pairs(series.resample('W')) == list(week_ends.values()), code
+
+
+def test_pct_change(store):
+    for code, series, points in sampled_series(store):
+        _, changes = series.pct_change(5)
+        assert changes.tolist() == [points[i][1] / points[i - 5][1] - 1 for i in range(5, len(points))], code
@@ -0,0 +1,84 @@
+"""protean.py's concurrent fetcher against a local stand-in server serving fixture ZIPs."""
+
+import threading
+import time
+import zipfile
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from io import BytesIO
+
+import pytest
+
+import download_cache
+import protean
+from protean import DATE_FORMAT, candidate_dates, fetch_protean_range, parse_protean_zip
+
+TODAY = datetime(2026, 8, 21, 10, 0)  # A Friday
+LAST_STORED = datetime(2026, 8, 14)
+HOLIDAY = 19  # No file is published on the 19th
+LATENCY = 0.2  # Seconds the server takes per request
+
+
+def fixture_zip(dt):
+    """A small Protean-format ZIP for one date."""
+    rows = [f"{dt.strftime(DATE_FORMAT)},PFM00{i},PFM {i},SM00{i}001,SCHEME {i} - TIER I,{10 + i + dt.day / 100:.4f}"
+            for i in range(1, 6)]
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as z:
+        z.writestr(f"NAV_File_{dt.strftime('%d%m%Y')}.out", "\n".join(rows))
+    return buffer.getvalue()
+
+
+SERVED = {dt.strftime('%d%m%Y'): fixture_zip(dt) for dt in candidate_dates(TODAY) if dt.day != HOLIDAY}
+# The serial loop's rule: every weekday candidate after the newest stored date
+EXPECTED = {dt.strftime(DATE_FORMAT): parse_protean_zip(SERVED[dt.strftime('%d%m%Y')])
+            for dt in candidate_dates(TODAY) if dt > LAST_STORED and dt.day != HOLIDAY}
+
+
+@pytest.fixture
+def requested(tmp_path, monkeypatch):
+    """Start the stand-in server and point the fetcher and an empty download cache at it; yields its request log."""
+    log = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            log.append(self.path)
+            time.sleep(LATENCY)
+            body = SERVED.get(self.path.rsplit('_', 1)[-1].split('.')[0])
+            self.send_response(200 if body else 404)
+            self.end_headers()
+            self.wfile.write(body or b'')
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(protean, 'PROTEAN_URL', f"http://127.0.0.1:{server.server_port}/NAV_File_{{date_str}}.zip")
+    monkeypatch.setattr(download_cache, 'CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setattr(download_cache, '_index', None)
+    yield log
+    server.shutdown()
+
+
+def last_stored():
+    time.sleep(0.05)
+    return LAST_STORED
+
+
+def test_fetches_every_date_after_the_newest_stored_one(requested):
+    assert fetch_protean_range(TODAY, last_stored) == EXPECTED
+
+
+def test_dates_already_stored_are_cancelled(requested):
+    fetch_protean_range(TODAY, last_stored)
+    assert len(requested) < len(candidate_dates(TODAY))
+
+
+def test_rerun_serves_fetched_dates_from_the_cache(requested):
+    fetch_protean_range(TODAY, last_stored)
+    issued = len(requested)
+    assert fetch_protean_range(TODAY, last_stored) == EXPECTED
+    refetched = [path for path in requested[issued:]
+                 if datetime.strptime(path.rsplit('_', 1)[-1][:8], '%d%m%Y').strftime(DATE_FORMAT) in EXPECTED]
+    assert not refetched
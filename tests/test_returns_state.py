@@ -0,0 +1,47 @@
+"""Incremental returns (calculate.py with data/returns_state.json) against a full recompute."""
+
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+SCRIPTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts')
+
+
+def run_calculate(cwd, *args):
+    subprocess.run([sys.executable, os.path.join(SCRIPTS, 'calculate.py'), *args], cwd=cwd, check=True,
+                   capture_output=True)
+    with open(os.path.join(cwd, 'data', 'data.json')) as f:
+        return {fund['Scheme Code']: fund for fund in json.load(f)}
+
+
+def test_json_edit_is_picked_up_incrementally(workdir):
+    before = run_calculate(workdir)
+
+    # Hand-edit a NAV inside the 1Y window after navstore.bin was built from the JSON
+    series_path = workdir / 'data' / 'SM001001.json'
+    series = json.loads(series_path.read_text())
+    latest = datetime.strptime(before['SM001001']['Date'], '%m/%d/%Y')
+    year_ago = latest.replace(year=latest.year - 1)
+    date = max((d for d in series if datetime.strptime(d, '%m/%d/%Y') <= year_ago),
+               key=lambda d: datetime.strptime(d, '%m/%d/%Y'))
+    series[date] = str(round(float(series[date]) / 2, 4))
+    series_path.write_text(json.dumps(series, indent=4))
+    store_mtime = os.stat(workdir / 'data' / 'navstore.bin').st_mtime_ns
+    os.utime(series_path, ns=(store_mtime + 1_000_000_000, store_mtime + 1_000_000_000))
+
+    incremental = run_calculate(workdir)
+    full = run_calculate(workdir, '--full')
+    assert incremental == full
+    assert incremental['SM001001']['1Y'] != before['SM001001']['1Y']
+
+
+def test_periodic_returns_are_written_by_the_returns_stage(workdir):
+    run_calculate(workdir, '--state-only')
+    assert not (workdir / 'public').exists()
+
+    run_calculate(workdir)
+    periodic = json.loads((workdir / 'public' / 'api' / 'periodic' / 'SM001001.json').read_text())
+    assert periodic['data']['monthly'] and periodic['data']['yearly']
+    assert (workdir / 'public' / 'api' / 'periodic.json').exists()
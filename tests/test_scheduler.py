@@ -0,0 +1,84 @@
+"""Scheduler: rate, concurrency, priority and retry behaviour with short synthetic tasks."""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from scheduler import Scheduler, RetryableError
+
+RATE, BURST, CONCURRENCY = 40.0, 2, 3
+
+
+@pytest.fixture(scope='module')
+def run():
+    """Run 27 synthetic tasks once: 20 old (priority 1), 5 new, one flaky and one that never succeeds."""
+    lock = threading.Lock()
+    state = {'running': 0, 'peak': 0}
+    starts = []
+    attempts = {}
+
+    def task(key, fail_times, seconds):
+        with lock:
+            starts.append((time.monotonic(), key))
+            attempts[key] = attempts.get(key, 0) + 1
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+            attempt = attempts[key]
+        try:
+            time.sleep(seconds)
+            if attempt <= fail_times:
+                raise RetryableError(f"simulated 503 for {key}")
+            return key
+        finally:
+            with lock:
+                state['running'] -= 1
+
+    scheduler = Scheduler(rate=RATE, burst=BURST, concurrency=CONCURRENCY, max_attempts=3, backoff=0.1, max_backoff=0.2)
+    for i in range(20):
+        scheduler.submit(f"old{i:02d}", task, f"old{i:02d}", 0, 0.05, priority=1)
+    for i in range(5):
+        scheduler.submit(f"new{i}", task, f"new{i}", 0, 0.05, priority=0)
+    scheduler.submit("flaky", task, "flaky", 2, 0.01, priority=0)  # Succeeds on the 3rd attempt
+    scheduler.submit("broken", task, "broken", 9, 0.01, priority=0)  # Never succeeds
+    started = time.perf_counter()
+    results = scheduler.run()
+    return SimpleNamespace(scheduler=scheduler, results=results, elapsed=time.perf_counter() - started,
+                           starts=[key for _, key in sorted(starts)], times=sorted(t for t, _ in starts),
+                           attempts=attempts, peak=state['peak'])
+
+
+def test_priority(run):
+    first_starts = list(dict.fromkeys(run.starts))
+    assert not any(key.startswith('old') for key in first_starts[:7])
+
+
+def test_concurrency_cap(run):
+    assert run.peak <= CONCURRENCY
+
+
+def test_rate(run):
+    # No more than burst + rate * window starts inside any window
+    for i, t in enumerate(run.times):
+        assert len([u for u in run.times[i:] if u - t <= 0.25]) <= BURST + RATE * 0.25 + 1
+
+
+def test_retries(run):
+    assert run.results['flaky'] == 'flaky' and run.attempts['flaky'] == 3
+    assert 'broken' in run.scheduler.failures and run.attempts['broken'] == 3
+    assert len(run.results) == 26 and run.scheduler.completed == 26
+
+
+def test_waiting_retries_do_not_hold_workers(run):
+    # While flaky/broken wait out their backoff, the other tasks keep the workers busy
+    assert run.elapsed <= (len(run.times) - BURST) / RATE + 0.5
+
+
+def test_results_handed_to_on_result_are_not_kept():
+    scheduler = Scheduler(rate=1000, burst=10)
+    for i in range(10):
+        scheduler.submit(i, lambda i: i * i, i)
+    seen = {}
+    assert scheduler.run(seen.__setitem__) == {}
+    assert seen == {i: i * i for i in range(10)} and scheduler.completed == 10